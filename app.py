@@ -1,228 +1,1998 @@
+import base64
+import csv
+import hashlib
+import io
 import json
+import logging
 import pandas as pd
+import numpy as np
 import os
+import threading
+import time
+import hmac
+import multiprocessing
+import tempfile
+import uuid
+import zlib
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from datetime import datetime
-from reportlab.lib.pagesizes import landscape, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm, mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from flask import Flask, render_template, request, jsonify, send_file
+from io import BytesIO
+from flask import Flask, render_template, request, jsonify, send_file, g
+from converter_csv_para_json import COLUNAS_NUMERICAS, COLUNA_SUB_JUDICE, ARQUIVO_ESQUEMA, ler_colunar, marcar_sub_judice
+from dados_compartilhados import publicar_arrays, anexar_arrays, liberar_blocos
+from relatorio_pdf import registrar_fontes, renderizar_lista_convocados
+from probabilidade import perfil_convocacao, estimar_convocacao
+from politica_vagas import DESTINO_AMPLA, POLITICA_PADRAO, PoliticaVagas, ler_politica
+from busca_nomes import IndiceNomes
+from linha_do_tempo import agrupar_rodadas, codigos_nomeacao, divisoes_projetadas
+from reclassificacao import COLUNAS_DESEMPATE, COLUNAS_ALTERAVEIS, COLUNAS_OBJETIVAS, OrdemPorNotas, chaves_classificacao
+from metricas import registro as registro_metricas, medir, duracao_etapa, requisicoes, duracao_requisicao, acessos_cache
 
 app = Flask(__name__)
+logger = logging.getLogger("simulador")
+
+# Arquivos de dados dos candidatos (o diretório colunar é gerado por converter_csv_para_json.py --colunar)
+ARQUIVO_DADOS_JSON = "dados_candidatos.json"
+ARQUIVO_DADOS_COLUNAR = "dados_candidatos.colunar"
+
+# Variável de ambiente com o manifesto dos dados publicados em memória compartilhada
+VARIAVEL_DADOS_COMPARTILHADOS = "DADOS_COMPARTILHADOS"
+
+# Variáveis de ambiente da recarga dos dados: token do endpoint administrativo e intervalo do monitor (segundos)
+VARIAVEL_TOKEN_ADMIN = "TOKEN_ADMIN"
+VARIAVEL_INTERVALO_RECARGA = "INTERVALO_RECARGA"
+# Nível do log (DEBUG, INFO, WARNING...) quando o servidor é iniciado diretamente
+VARIAVEL_NIVEL_LOG = "NIVEL_LOG"
+
+# Variáveis de ambiente da geração de PDFs em segundo plano: processos do pool e diretório das tarefas
+VARIAVEL_PROCESSOS_PDF = "PROCESSOS_PDF"
+VARIAVEL_DIRETORIO_TAREFAS_PDF = "DIRETORIO_TAREFAS_PDF"
+
+# Processos do pool da estimativa de probabilidade (padrão: um por CPU), divididos entre os workers do gunicorn
+VARIAVEL_PROCESSOS_MONTE_CARLO = "PROCESSOS_MONTE_CARLO"
+
+# Arquivo JSON com a política de vagas (listas de reserva); sem ele vale a regra de 20% para cotas
+VARIAVEL_POLITICA_VAGAS = "POLITICA_VAGAS"
+
+# Colunas mantidas em memória compartilhada (as únicas usadas pela simulação e pelo PDF)
+COLUNAS_COMPARTILHADAS = ['INSCRIÇÃO', 'NOME', 'CLAS. AMPLA', 'CLAS. COTAS', COLUNA_SUB_JUDICE]
+
+# Colunas de notas usadas na reclassificação por alteração de notas (as ausentes no arquivo são ignoradas)
+COLUNAS_NOTAS = list(dict.fromkeys(COLUNAS_DESEMPATE + COLUNAS_ALTERAVEIS + ['TOTAL OBJETIVA']))
+
+# Colunas dos já convocados usadas na linha do tempo das convocações (além da situação)
+COLUNAS_HISTORICO = ['SITUAÇÃO', 'DATA CONVOCAÇÃO', 'NOMEADO NA VAGA DE']
+
+# Rótulos dos tipos de convocação
+TIPO_AMPLA = 'Ampla Concorrência'
+TIPO_COTAS = 'Cotas'
+TIPO_REMANEJADA = 'Ampla Concorrência (Remanejada)'
+
+# Códigos dos tipos de convocação usados nas tabelas do índice
+CODIGOS_TIPO = {1: TIPO_AMPLA, 2: TIPO_COTAS, 3: TIPO_REMANEJADA}
+
+# Quantidade máxima de simulações mantidas no cache
+CAPACIDADE_CACHE_RESULTADOS = 512
+
+# Quantidade máxima de índices reclassificados (cenários de alteração de notas) mantidos no cache
+CAPACIDADE_CACHE_RECLASSIFICACOES = 32
+
+# Tamanho máximo (em bytes) dos PDFs mantidos em cache
+CAPACIDADE_CACHE_PDFS = 64 * 1024 * 1024
+
+# Busca por nome: resultados por padrão e limite por requisição
+RESULTADOS_BUSCA_PADRAO = 10
+LIMITE_RESULTADOS_BUSCA = 50
+
+# Listagem de convocados: itens por página (padrão e limite), linhas por bloco do CSV em streaming
+# e tempo (segundos) em que navegadores e proxies podem reaproveitar uma resposta sem revalidar
+ITENS_POR_PAGINA_PADRAO = 100
+LIMITE_ITENS_POR_PAGINA = 1000
+LINHAS_POR_BLOCO_CSV = 2000
+VALIDADE_CACHE_CONVOCADOS = 60
+
+# Cabeçalho do CSV de convocados
+COLUNAS_CSV_CONVOCADOS = ['ORDEM', 'INSCRIÇÃO', 'NOME', 'TIPO_CONVOCACAO', 'CLAS. AMPLA', 'CLAS. RESERVA', 'COTISTA']
+
+# Linha do tempo das convocações: retratos (candidatos restantes após uma rodada) mantidos em
+# cache e limite de rodadas projetadas por requisição
+CAPACIDADE_CACHE_RETRATOS = 16
+LIMITE_RODADAS_PROJETADAS = 100
+
+# Limite de células (inscrições x cenários de vagas) em uma simulação em lote
+LIMITE_CELULAS_LOTE = 500000
+
+# Processos do pool de PDFs e tempo (segundos) em que uma tarefa concluída fica disponível. Os processos
+# são o limite do servidor inteiro: sob o gunicorn, são divididos entre os workers (ao menos um por
+# worker), então o limite efetivo é o maior entre PROCESSOS_PDF e o número de workers
+PROCESSOS_PDF_PADRAO = 2
+VALIDADE_TAREFAS_PDF = 3600
+
+# Estimativa de probabilidade: cenários por padrão, limite por requisição e a partir de quantas
+# células (cenários x candidatos à frente) os lotes são distribuídos no pool de processos
+CENARIOS_PADRAO = 10000
+LIMITE_CENARIOS = 1000000
+CELULAS_MINIMAS_POOL_MONTE_CARLO = 5000000
+
+class IndiceClassificacao:
+    """
+    Índice de classificação pré-calculado a partir das colunas dos candidatos.
+    Guarda a ordem ampla, a ordem das cotas e a contagem acumulada de cotistas
+    dentro do prefixo da ampla, permitindo simular qualquer número de vagas com
+    buscas binárias e fatias de arrays, sem reordenar o dataframe.
+    As colunas e os arrays do índice podem vir de memória compartilhada (somente leitura).
+    """
+    def __init__(self, colunas, arrays=None):
+        self.colunas = colunas
+        self.inscricoes = colunas["INSCRIÇÃO"]
+        self.nomes = colunas["NOME"]
+        self.clas_ampla = np.asarray(colunas["CLAS. AMPLA"], dtype=float)
+        self.clas_cotas = np.asarray(colunas["CLAS. COTAS"], dtype=float)
+        self.total = len(self.inscricoes)
+        if COLUNA_SUB_JUDICE not in colunas:
+            colunas[COLUNA_SUB_JUDICE] = marcar_sub_judice(self.nomes)
+        self.sub_judice = colunas[COLUNA_SUB_JUDICE]
+
+        if arrays is None:
+            arrays = self.calcular_arrays(self.inscricoes, self.clas_ampla, self.clas_cotas)
+        self.arrays = arrays
+        for nome, valores in arrays.items():
+            setattr(self, nome, valores)
+        self.total_cotistas = len(self.ordem_cotas)
+
+        # Tabelas da varredura de vagas (por política), listas de reserva além das cotas, ordens
+        # pelas notas, índice de nomes e índice sem Sub Judice, calculados sob demanda
+        self._varreduras = {}
+        self._lock_varreduras = threading.Lock()
+        self._reservas = {}
+        self._ordens_notas = {}
+        self._indice_nomes = None
+        self._sem_sub_judice = None
+
+    @staticmethod
+    def calcular_arrays(inscricoes, clas_ampla, clas_cotas):
+        """Calcula os arrays do índice (ordens, posições e contagens acumuladas)."""
+        cotista = ~np.isnan(clas_cotas)
+
+        # Busca de inscrições por busca binária sobre as inscrições ordenadas
+        ordem_inscricoes = np.argsort(inscricoes, kind="stable")
+
+        # Ordem pela classificação ampla (NaN ao final, como no sort_values)
+        ordem_ampla = np.argsort(clas_ampla, kind="stable")
+
+        # Ordem pela classificação de cotas, apenas entre os cotistas
+        linhas_cotistas = np.flatnonzero(cotista)
+        ordem_cotas = linhas_cotistas[np.argsort(clas_cotas[linhas_cotistas], kind="stable")]
+
+        return IndiceClassificacao._arrays_das_ordens(inscricoes, cotista, ordem_inscricoes, ordem_ampla, ordem_cotas)
+
+    @staticmethod
+    def _arrays_das_ordens(inscricoes, cotista, ordem_inscricoes, ordem_ampla, ordem_cotas):
+        """Completa os arrays do índice (posições e contagens) a partir das três ordens, sem ordenar nada."""
+        total = len(inscricoes)
+        posicao_ampla = np.empty(total, dtype=np.int64)
+        posicao_ampla[ordem_ampla] = np.arange(total)
+        posicao_cotas = np.full(total, -1, dtype=np.int64)
+        posicao_cotas[ordem_cotas] = np.arange(len(ordem_cotas))
+
+        # Quantidade de cotistas e não cotistas entre os k primeiros da ampla (k = 0..total)
+        cotistas_prefixo_ampla = np.concatenate(([0], np.cumsum(cotista[ordem_ampla])))
+
+        return {
+            'cotista': cotista,
+            'ordem_inscricoes': ordem_inscricoes,
+            'inscricoes_ordenadas': inscricoes[ordem_inscricoes],
+            'ordem_ampla': ordem_ampla,
+            'posicao_ampla': posicao_ampla,
+            'ordem_cotas': ordem_cotas,
+            'posicao_cotas': posicao_cotas,
+            # Posição na ampla de cada cotista, na ordem das cotas
+            'posicao_ampla_cotas': posicao_ampla[ordem_cotas],
+            'cotistas_prefixo_ampla': cotistas_prefixo_ampla,
+            'nao_cotistas_prefixo_ampla': np.arange(total + 1) - cotistas_prefixo_ampla,
+        }
+
+    def filtrar(self, manter, colunas=None):
+        """
+        Retorna um novo índice só com as linhas marcadas em manter, aproveitando as ordens
+        já calculadas (filtradas e renumeradas, sem reordenar). Se informadas, colunas já
+        devem estar alinhadas às linhas mantidas (por exemplo, com nomes atualizados).
+        """
+        manter = np.asarray(manter, dtype=bool)
+        nova_linha = np.cumsum(manter) - 1
+        if colunas is None:
+            colunas = {nome: valores[manter] for nome, valores in self.colunas.items()}
+
+        def filtrar_ordem(ordem):
+            return nova_linha[ordem[manter[ordem]]]
+
+        arrays = self._arrays_das_ordens(
+            colunas["INSCRIÇÃO"],
+            self.cotista[manter],
+            filtrar_ordem(self.ordem_inscricoes),
+            filtrar_ordem(self.ordem_ampla),
+            filtrar_ordem(self.ordem_cotas),
+        )
+        indice = IndiceClassificacao(colunas, arrays)
+        # Índice de nomes e listas de reserva já calculados também são filtrados, sem reordenar
+        if self._indice_nomes is not None and np.array_equal(colunas["NOME"], self.nomes[manter]):
+            indice._indice_nomes = self._indice_nomes.filtrar(manter)
+        for coluna, reserva in list(self._reservas.items()):
+            if isinstance(coluna, str):
+                indice._reservas[coluna] = indice._reserva_da_ordem(filtrar_ordem(reserva['ordem']), colunas[coluna])
+        return indice
+
+    @property
+    def sem_sub_judice(self):
+        """Índice derivado sem os candidatos Sub Judice, calculado sob demanda."""
+        if self._sem_sub_judice is None:
+            with medir("filtro"):
+                self._sem_sub_judice = self.filtrar(~self.sub_judice)
+        return self._sem_sub_judice
+
+    @property
+    def indice_nomes(self):
+        """Índice de prefixos dos nomes normalizados (sem acentos e sem diferença de maiúsculas)."""
+        if self._indice_nomes is None:
+            with medir("indice_nomes"):
+                self._indice_nomes = IndiceNomes(self.nomes)
+        return self._indice_nomes
+
+    def buscar_nomes(self, consulta, limite=RESULTADOS_BUSCA_PADRAO):
+        """Linhas cujos nomes contêm uma palavra iniciada pela consulta, na ordem da ampla (nomes que começam com ela primeiro)."""
+        return self.indice_nomes.buscar(consulta, self.posicao_ampla, limite)
+
+    def linhas(self, inscricoes):
+        """Retorna a linha de cada inscrição (-1 quando não encontrada), por busca binária."""
+        inscricoes = np.asarray(inscricoes, dtype=object)
+        if self.total == 0:
+            return np.full(len(inscricoes), -1, dtype=np.int64)
+        posicoes = np.minimum(np.searchsorted(self.inscricoes_ordenadas, inscricoes), self.total - 1)
+        encontrada = self.inscricoes_ordenadas[posicoes] == inscricoes
+        return np.where(encontrada, self.ordem_inscricoes[posicoes], -1)
+
+    def linha(self, inscricao):
+        """Retorna a linha da inscrição, ou None quando não encontrada."""
+        linha = int(self.linhas([inscricao])[0])
+        return linha if linha >= 0 else None
+
+    @staticmethod
+    def _saltar_excluidas(quantidade, excluidas):
+        """
+        Dadas as posições (ordenadas e distintas) das linhas excluídas em uma ordem, retorna quantas
+        delas aparecem antes do item de número quantidade entre os não excluídos.
+        """
+        return int(np.searchsorted(excluidas - np.arange(len(excluidas)), quantidade, side="left"))
+
+    def reserva(self, coluna):
+        """
+        Lista de reserva da coluna de classificação informada: a classificação, quem pertence à lista
+        (membro), a ordem de classificação entre os membros, a posição de cada linha nessa ordem
+        (-1 fora da lista) e a posição na ampla de cada membro, na ordem da lista.
+        A lista de cotas usa os arrays do índice; as demais são calculadas sob demanda.
+        """
+        if coluna == "CLAS. COTAS":
+            return {'membro': self.cotista, 'ordem': self.ordem_cotas, 'posicao': self.posicao_cotas,
+                    'classificacao': self.clas_cotas, 'posicao_ampla': self.posicao_ampla_cotas}
+        reserva = self._reservas.get(coluna)
+        if reserva is None:
+            classificacao = np.asarray(self.colunas[coluna], dtype=float)
+            linhas_membros = np.flatnonzero(~np.isnan(classificacao))
+            ordem = linhas_membros[np.argsort(classificacao[linhas_membros], kind="stable")]
+            reserva = self._reservas[coluna] = self._reserva_da_ordem(ordem, classificacao)
+        return reserva
+
+    def _reserva_da_ordem(self, ordem, classificacao):
+        """Monta a lista de reserva (no formato de reserva()) a partir da ordem dos seus membros."""
+        posicao = np.full(self.total, -1, dtype=np.int64)
+        posicao[ordem] = np.arange(len(ordem))
+        return {'membro': posicao >= 0, 'ordem': ordem, 'posicao': posicao,
+                'classificacao': np.asarray(classificacao, dtype=float), 'posicao_ampla': self.posicao_ampla[ordem]}
+
+    def membros_reservas(self, politica):
+        """
+        Linhas que pertencem a alguma lista de reserva da política (os "cotistas"): a marcação por
+        linha, o total e a quantidade entre os k primeiros da ampla (k = 0..total).
+        """
+        colunas = tuple(politica.colunas)
+        if colunas == ("CLAS. COTAS",):
+            return {'membro': self.cotista, 'total': self.total_cotistas, 'prefixo_ampla': self.cotistas_prefixo_ampla}
+        membros = self._reservas.get(colunas)
+        if membros is None:
+            membro = np.zeros(self.total, dtype=bool)
+            for coluna in colunas:
+                membro |= self.reserva(coluna)['membro']
+            prefixo_ampla = np.concatenate(([0], np.cumsum(membro[self.ordem_ampla])))
+            membros = self._reservas[colunas] = {'membro': membro, 'total': int(prefixo_ampla[-1]), 'prefixo_ampla': prefixo_ampla}
+        return membros
+
+    def ordem_por_notas(self, coluna):
+        """
+        Lista de classificação da coluna (CLAS. AMPLA ou a de uma lista de reserva) na ordem publicada,
+        com as chaves pelas notas (COLUNAS_DESEMPATE), calculada uma única vez por índice.
+        """
+        ordem = self._ordens_notas.get(coluna)
+        if ordem is None:
+            classificacao = np.asarray(self.colunas[coluna], dtype=float)
+            linhas = np.arange(self.total) if coluna == "CLAS. AMPLA" else np.flatnonzero(~np.isnan(classificacao))
+            notas = [self.colunas[nome] for nome in COLUNAS_DESEMPATE]
+            ordem = self._ordens_notas[coluna] = OrdemPorNotas(linhas, chaves_classificacao(notas, classificacao), self.total)
+            if ordem.divergencias:
+                # Só as alterações em volta das divergências são recusadas (ver reclassificar)
+                logger.warning("ordem_notas_divergente coluna=%s posicoes=%d", coluna, ordem.divergencias)
+        return ordem
+
+    def reclassificar(self, alteracoes, politica=POLITICA_PADRAO):
+        """
+        Retorna um novo índice com as listas (ampla e reservas da política) classificadas pelas notas,
+        depois de aplicar alteracoes ({linha: {coluna: nova nota}}, colunas de COLUNAS_ALTERAVEIS).
+        A nota total e a objetiva acompanham a diferença. Só as linhas alteradas são reposicionadas,
+        por busca binária nas ordens por notas já calculadas; as classificações exibidas passam a
+        ser as estimadas para a nova ordem. Se a nova posição de uma alterada for ambígua (as notas
+        em volta dela contradizem a classificação publicada), gera ValueError com as inscrições.
+        """
+        linhas = np.array(sorted(alteracoes), dtype=np.int64)
+        colunas = dict(self.colunas)
+        for nome in COLUNAS_ALTERAVEIS + ['TOTAL OBJETIVA', 'NOTA TOTAL']:
+            if nome in colunas:
+                colunas[nome] = np.array(colunas[nome], dtype=float)
+        for linha, notas in alteracoes.items():
+            for nome, valor in notas.items():
+                diferenca = valor - colunas[nome][linha]
+                colunas[nome][linha] = valor
+                colunas['NOTA TOTAL'][linha] += diferenca
+                if nome in COLUNAS_OBJETIVAS and 'TOTAL OBJETIVA' in colunas:
+                    colunas['TOTAL OBJETIVA'][linha] += diferenca
+
+        notas = [colunas[nome][linhas] for nome in COLUNAS_DESEMPATE]
+        ordens = {}
+        ambiguas = set()
+        for coluna in dict.fromkeys(["CLAS. AMPLA", "CLAS. COTAS"] + politica.colunas):
+            chaves = chaves_classificacao(notas, np.asarray(self.colunas[coluna], dtype=float)[linhas])
+            ordem_notas = self.ordem_por_notas(coluna)
+            ordens[coluna], ambiguas_coluna = ordem_notas.reposicionar(linhas, list(zip(*[chave.tolist() for chave in chaves])))
+            ambiguas.update(ambiguas_coluna.tolist())
+            colunas[coluna] = ordem_notas.classificacoes(ordens[coluna], self.colunas[coluna], linhas)
+        if ambiguas:
+            inscricoes = ', '.join(str(self.inscricoes[linha]) for linha in sorted(ambiguas))
+            raise ValueError(f"Não é possível reclassificar as inscrições {inscricoes}: na nova nota, a classificação "
+                             f"publicada contradiz a ordem pelas notas e a nova posição é ambígua.")
+
+        arrays = self._arrays_das_ordens(self.inscricoes, self.cotista, self.ordem_inscricoes, ordens["CLAS. AMPLA"], ordens["CLAS. COTAS"])
+        indice = IndiceClassificacao(colunas, arrays)
+        for coluna in politica.colunas:
+            if coluna != "CLAS. COTAS":
+                indice._reservas[coluna] = indice._reserva_da_ordem(ordens[coluna], colunas[coluna])
+        return indice
+
+    def alocar(self, total_vagas, excluidas=None, politica=POLITICA_PADRAO, divisao=None):
+        """
+        Distribui as vagas segundo a política (por padrão 80% ampla e 20% cotas) e devolve as
+        linhas convocadas de cada tipo, na ordem de convocação. Depois do prefixo da ampla, cada
+        lista de reserva avança um ponteiro sobre a sua ordem pré-calculada, pulando quem já foi
+        convocado; as vagas não preenchidas seguem a ordem de remanejamento da categoria e, por fim,
+        vão para os próximos não convocados da ampla. Cada ordem é percorrida uma única vez.
+        Linhas em excluidas (por exemplo, desistentes) são puladas do mesmo modo, sem filtrar nem
+        reordenar o índice. divisao, se informada, substitui a divisão da política:
+        (vagas da ampla, tupla com as vagas de cada categoria), somando total_vagas.
+        """
+        total_vagas = max(int(total_vagas), 0)
+        vagas_ampla, vagas_categorias = divisao if divisao is not None else politica.distribuir(total_vagas)
+        excluidas = np.unique(np.asarray(excluidas if excluidas is not None else [], dtype=np.int64))
+        membros = self.membros_reservas(politica)
+        excluidas_membros = excluidas[membros['membro'][excluidas]]
+
+        # 1. Prefixo da ordem ampla, estendido para pular as linhas excluídas
+        with medir("ampla"):
+            posicoes_excluidas = np.sort(self.posicao_ampla[excluidas])
+            limite_ampla = min(vagas_ampla + self._saltar_excluidas(vagas_ampla, posicoes_excluidas), self.total)
+            linhas_ampla = self.ordem_ampla[:limite_ampla]
+            if len(excluidas):
+                linhas_ampla = np.delete(linhas_ampla, posicoes_excluidas[posicoes_excluidas < limite_ampla])
+            cotistas_na_ampla = int(membros['prefixo_ampla'][limite_ampla]) - int(np.count_nonzero(self.posicao_ampla[excluidas_membros] < limite_ampla))
+
+        # 2. Listas de reserva, na ordem da política, com o remanejamento entre elas
+        with medir("cotas"):
+            cotistas_restantes = membros['total'] - len(excluidas_membros) - cotistas_na_ampla
+            # Linhas fora do prefixo da ampla que não podem mais ser convocadas: excluídas e já convocadas
+            indisponivel = np.zeros(self.total, dtype=bool)
+            indisponivel[excluidas] = True
+            marcadas = [len(excluidas) > 0]
+
+            reservas = [self.reserva(categoria.coluna) for categoria in politica.categorias]
+            ponteiros = [0] * len(reservas)
+            selecionadas = [[] for _ in reservas]
+            numero_categoria = {categoria.nome: k for k, categoria in enumerate(politica.categorias)}
+
+            def preencher(k, quantidade):
+                """
+                Convoca até quantidade linhas disponíveis da lista k, a partir do seu ponteiro, examinando
+                trechos crescentes da ordem da lista; retorna quantas convocou.
+                """
+                ordem, posicao_ampla = reservas[k]['ordem'], reservas[k]['posicao_ampla']
+                partes = []
+                faltantes = quantidade
+                tamanho = max(2 * quantidade, 1024)
+                while faltantes > 0 and ponteiros[k] < len(ordem):
+                    inicio = ponteiros[k]
+                    trecho = ordem[inicio:inicio + tamanho]
+                    disponivel = posicao_ampla[inicio:inicio + tamanho] >= limite_ampla
+                    if marcadas[0]:
+                        disponivel &= ~indisponivel[trecho]
+                    livres = np.flatnonzero(disponivel)[:faltantes]
+                    # Quem ficou para trás já está indisponível e continuará assim
+                    ponteiros[k] = inicio + (int(livres[-1]) + 1 if len(livres) == faltantes else len(trecho))
+                    partes.append(trecho[livres])
+                    faltantes -= len(livres)
+                    tamanho *= 2
+                linhas = np.concatenate(partes) if partes else ordem[:0]
+                if len(linhas):
+                    indisponivel[linhas] = True
+                    marcadas[0] = True
+                    selecionadas[k].append(linhas)
+                return len(linhas)
+
+            vagas_remanejadas = 0
+            for k, categoria in enumerate(politica.categorias):
+                sobra = vagas_categorias[k] - preencher(k, vagas_categorias[k])
+                for destino in categoria.remanejamento:
+                    if sobra == 0 or destino == DESTINO_AMPLA:
+                        break
+                    sobra -= preencher(numero_categoria[destino], sobra)
+                vagas_remanejadas += sobra
+
+            linhas_por_categoria = [np.concatenate(linhas) if linhas else self.ordem_cotas[:0] for linhas in selecionadas]
+            linhas_cotas = np.concatenate(linhas_por_categoria) if linhas_por_categoria else self.ordem_cotas[:0]
+            categoria_cotas = np.repeat(np.arange(len(reservas), dtype=np.int8), [len(linhas) for linhas in linhas_por_categoria])
+
+        # 3. Vagas de reserva não preenchidas vão para os próximos não convocados da ampla
+        with medir("remanejamento"):
+            partes = []
+            inicio = limite_ampla
+            faltantes = vagas_remanejadas
+            while faltantes > 0 and inicio < self.total:
+                trecho = self.ordem_ampla[inicio:inicio + max(2 * faltantes, 1024)]
+                livres = trecho[~indisponivel[trecho]][:faltantes]
+                partes.append(livres)
+                faltantes -= len(livres)
+                inicio += len(trecho)
+            linhas_remanejadas = np.concatenate(partes) if partes else self.ordem_ampla[:0]
+
+        return {
+            'total_vagas': total_vagas,
+            'vagas_ampla': vagas_ampla,
+            'vagas_cotas': sum(vagas_categorias),
+            'ampla': linhas_ampla,
+            'cotas': linhas_cotas,
+            'remanejada': linhas_remanejadas,
+            'cotistas_na_ampla': cotistas_na_ampla,
+            'cotistas_restantes': cotistas_restantes,
+            'limite_ampla': limite_ampla,
+            'excluidas': excluidas,
+            'vagas_categorias': vagas_categorias,
+            'categoria_cotas': categoria_cotas,
+        }
+
+    def varredura(self, politica=POLITICA_PADRAO):
+        """
+        Tabelas da varredura de vagas (limiares por linha e cortes por vagas), calculadas uma única
+        vez por índice e política; requisições simultâneas esperam a primeira terminar a varredura.
+        """
+        varredura = self._varreduras.get(politica)
+        if varredura is None:
+            with self._lock_varreduras:
+                varredura = self._varreduras.get(politica)
+                if varredura is None:
+                    with medir("varredura"):
+                        if politica.simples:
+                            varredura = self._varrer_vagas(politica)
+                        else:
+                            varredura = self._varrer_vagas_categorias(politica)
+                    self._varreduras[politica] = varredura
+        return varredura
+
+    def _vagas_maximas(self, politica):
+        """
+        Menor quantidade de vagas a partir da qual todos os candidatos cabem na ampla. Com várias
+        listas de reserva, o arredondamento pode tirar uma vaga da ampla quando o total cresce, então
+        vale a última quantidade em que a ampla ainda não comporta todos, mais um.
+        """
+        # Cada lista reserva no máximo percentual x vagas + 1: acima deste limite a ampla comporta todos
+        percentuais = sum(categoria.percentual for categoria in politica.categorias)
+        fim = int(np.ceil((self.total + len(politica.categorias)) / (1 - percentuais))) + 2
+        while fim > self.total:
+            vagas = np.arange(max(fim - 1024, self.total), fim)
+            insuficientes = np.flatnonzero(politica.distribuir(vagas)[0] < self.total)
+            if len(insuficientes):
+                return int(vagas[insuficientes[-1]]) + 1
+            fim = int(vagas[0])
+        return self.total
+
+    def _varrer_vagas(self, politica):
+        """
+        Percorre o número de vagas de 1 até o ponto em que todos são convocados pela ampla,
+        atualizando a alocação de forma incremental (ponteiros na ordem ampla, na lista de
+        reserva e no remanejamento). Registra, para cada linha, a menor quantidade de vagas em
+        que ela é convocada e, para cada quantidade de vagas, os cortes das três listas.
+        Vale para políticas com uma única lista de reserva.
+        """
+        n = self.total
+        categoria = politica.categorias[0]
+        reserva = self.reserva(categoria.coluna)
+        ordem_ampla = self.ordem_ampla
+        ordem_cotas = reserva['ordem']
+        posicao_ampla = self.posicao_ampla
+        posicao_cotas = reserva['posicao']
+        cotista = reserva['membro']
+        total_cotistas = len(ordem_cotas)
+
+        # A partir de vagas_maximas todos os candidatos cabem na ampla
+        vagas_maximas = self._vagas_maximas(politica)
+        ampla_por_vagas, (cotas_por_vagas,) = politica.distribuir(np.arange(vagas_maximas + 1))
+        ampla_por_vagas = np.minimum(ampla_por_vagas, n).tolist()
+        cotas_por_vagas = cotas_por_vagas.tolist()
+
+        vagas_minimas = np.zeros(n, dtype=np.int64)
+        codigo_tipo = np.zeros(n, dtype=np.int8)
+        corte_ampla = np.zeros(vagas_maximas + 1, dtype=np.int64)
+        corte_cotas = np.zeros(vagas_maximas + 1, dtype=np.int64)
+        corte_remanejada = np.zeros(vagas_maximas + 1, dtype=np.int64)
+
+        prefixo = 0          # tamanho do prefixo convocado pela ampla
+        ponteiro_cotas = 0   # próxima posição a examinar na ordem das cotas
+        selecionados = 0     # cotistas convocados pelas cotas
+        ponteiro_reman = 0   # próxima posição a examinar na ordem ampla para remanejamento
+        remanejados = 0      # não cotistas convocados por remanejamento
+
+        for vagas in range(1, vagas_maximas + 1):
+            vagas_cotas = cotas_por_vagas[vagas]
+            vagas_ampla = ampla_por_vagas[vagas]
+
+            # 1. O prefixo da ampla cresce no máximo uma posição por passo
+            while prefixo < vagas_ampla:
+                linha = ordem_ampla[prefixo]
+                if cotista[linha]:
+                    if posicao_cotas[linha] < ponteiro_cotas:
+                        selecionados -= 1
+                elif prefixo < ponteiro_reman:
+                    remanejados -= 1
+                if not vagas_minimas[linha]:
+                    vagas_minimas[linha] = vagas
+                    codigo_tipo[linha] = 1
+                prefixo += 1
+            if ponteiro_reman < prefixo:
+                ponteiro_reman = prefixo
+                remanejados = 0
+
+            # 2. Completa as vagas de cotas com os próximos cotistas fora da ampla
+            while selecionados < vagas_cotas and ponteiro_cotas < total_cotistas:
+                linha = ordem_cotas[ponteiro_cotas]
+                if posicao_ampla[linha] >= prefixo:
+                    selecionados += 1
+                    if not vagas_minimas[linha]:
+                        vagas_minimas[linha] = vagas
+                        codigo_tipo[linha] = 2
+                ponteiro_cotas += 1
+
+            # 3. Vagas de cotas não preenchidas vão para os próximos não cotistas da ampla
+            faltantes = vagas_cotas - selecionados
+            while remanejados < faltantes and ponteiro_reman < n:
+                linha = ordem_ampla[ponteiro_reman]
+                if not cotista[linha]:
+                    remanejados += 1
+                    if not vagas_minimas[linha]:
+                        vagas_minimas[linha] = vagas
+                        codigo_tipo[linha] = 3
+                ponteiro_reman += 1
+
+            # Convocados em "vagas": posição ampla < corte_ampla; cotistas fora da ampla com
+            # posição nas cotas < corte_cotas; não cotistas fora da ampla com posição < corte_remanejada
+            corte_ampla[vagas] = prefixo
+            corte_cotas[vagas] = ponteiro_cotas
+            corte_remanejada[vagas] = ponteiro_reman
+
+        return {
+            'vagas_maximas': vagas_maximas,
+            'vagas_minimas': vagas_minimas,
+            'codigo_tipo': codigo_tipo,
+            'categoria': np.zeros(n, dtype=np.int8),
+            'corte_ampla': corte_ampla,
+            'corte_cotas': corte_cotas,
+            'cortes_reservas': corte_cotas[None, :],
+            'corte_remanejada': corte_remanejada,
+        }
+
+    def _varrer_vagas_categorias(self, politica):
+        """
+        Varredura para políticas com várias listas de reserva. Cada quantidade de vagas repete os
+        preenchimentos de alocar (a lista própria de cada categoria, os destinos do remanejamento e,
+        por fim, o remanejamento para a ampla), mas cada preenchimento só é corrigido nas linhas cujo
+        estado mudou desde a quantidade anterior: as que entraram ou saíram do prefixo da ampla e as
+        tomadas ou liberadas por preenchimentos anteriores. Registra a primeira convocação de cada
+        linha e os cortes de cada lista, como _varrer_vagas.
+        """
+        n = self.total
+        categorias = politica.categorias
+        reservas = [self.reserva(categoria.coluna) for categoria in categorias]
+        numero_categoria = {categoria.nome: k for k, categoria in enumerate(categorias)}
+        lista_ampla = len(reservas)
+        ordens = [reserva['ordem'].tolist() for reserva in reservas] + [self.ordem_ampla.tolist()]
+        posicoes = [reserva['posicao'].tolist() for reserva in reservas] + [self.posicao_ampla.tolist()]
+        posicao_ampla = posicoes[lista_ampla]
+
+        # Preenchimentos na ordem de alocar: (lista percorrida, categoria de origem das vagas, vagas próprias)
+        preenchimentos = []
+        for k, categoria in enumerate(categorias):
+            preenchimentos.append((k, k, True))
+            for destino in categoria.remanejamento:
+                if destino == DESTINO_AMPLA:
+                    break
+                preenchimentos.append((numero_categoria[destino], k, False))
+        remanejada = len(preenchimentos)
+        preenchimentos.append((lista_ampla, None, False))
+        # Cada preenchimento começa onde parou o anterior na mesma lista (ponteiro de alocar)
+        anteriores, ultimos = [], {}
+        for f, (lista, _, _) in enumerate(preenchimentos):
+            anteriores.append(ultimos.get(lista, -1))
+            ultimos[lista] = f
+
+        vagas_maximas = self._vagas_maximas(politica)
+        ampla_por_vagas, vagas_por_categoria = politica.distribuir(np.arange(vagas_maximas + 1))
+        ampla_por_vagas = np.minimum(ampla_por_vagas, n).tolist()
+        vagas_por_categoria = [vagas.tolist() for vagas in vagas_por_categoria]
+
+        vagas_minimas = [0] * n
+        codigo_tipo = np.zeros(n, dtype=np.int8)
+        categoria_linha = np.zeros(n, dtype=np.int8)
+        corte_ampla = np.zeros(vagas_maximas + 1, dtype=np.int64)
+        cortes_reservas = np.zeros((len(reservas), vagas_maximas + 1), dtype=np.int64)
+        corte_remanejada = np.zeros(vagas_maximas + 1, dtype=np.int64)
+
+        # Posições (na lista) tomadas por cada preenchimento, ordenadas, e onde cada um parou;
+        # dono[linha] é o preenchimento que convocou a linha (-1 quando nenhum)
+        tomadas = [[] for _ in preenchimentos]
+        fins = [0] * len(preenchimentos)
+        dono = [-1] * n
+        prefixo = 0
+
+        for vagas in range(1, vagas_maximas + 1):
+            vagas_ampla = ampla_por_vagas[vagas]
+            alteradas = self.ordem_ampla[min(prefixo, vagas_ampla):max(prefixo, vagas_ampla)].tolist()
+            prefixo = vagas_ampla
+            sobras = [0] * len(reservas)
+
+            for f, (lista, origem, propria) in enumerate(preenchimentos):
+                if propria:
+                    quantidade = vagas_por_categoria[origem][vagas]
+                elif lista == lista_ampla:
+                    quantidade = sum(sobras)
+                else:
+                    quantidade = sobras[origem]
+                ordem, posicao, tomadas_f = ordens[lista], posicoes[lista], tomadas[f]
+                inicio = fins[anteriores[f]] if anteriores[f] >= 0 else (prefixo if lista == lista_ampla else 0)
+                fim = fins[f]
+
+                # Fora de alteradas, a disponibilidade não mudou: as tomadas continuam sendo as linhas
+                # disponíveis entre inicio e o fim anterior, corrigidas só nas linhas alteradas
+                for linha in alteradas[:len(alteradas)]:
+                    p = posicao[linha]
+                    if p < 0:
+                        continue
+                    i = bisect_left(tomadas_f, p)
+                    tomada = i < len(tomadas_f) and tomadas_f[i] == p
+                    disponivel = posicao_ampla[linha] >= prefixo and (dono[linha] < 0 or dono[linha] >= f)
+                    if tomada and not disponivel:
+                        del tomadas_f[i]
+                        if dono[linha] == f:
+                            dono[linha] = -1
+                    elif not tomada and disponivel and inicio <= p < fim:
+                        tomadas_f.insert(i, p)
+                        dono[linha] = f
+
+                # Devolve as excedentes (do fim) ou avança sobre as próximas disponíveis
+                while len(tomadas_f) > quantidade:
+                    linha = ordem[tomadas_f.pop()]
+                    dono[linha] = -1
+                    alteradas.append(linha)
+                p = max(fim, inicio)
+                while len(tomadas_f) < quantidade and p < len(ordem):
+                    linha = ordem[p]
+                    if posicao_ampla[linha] >= prefixo and (dono[linha] < 0 or dono[linha] > f):
+                        tomadas_f.append(p)
+                        dono[linha] = f
+                        alteradas.append(linha)
+                    p += 1
+
+                if quantidade == 0:
+                    fins[f] = inicio
+                elif len(tomadas_f) == quantidade:
+                    fins[f] = tomadas_f[-1] + 1
+                else:
+                    fins[f] = len(ordem)
+                if lista != lista_ampla:
+                    if propria:
+                        sobras[origem] = quantidade - len(tomadas_f)
+                    else:
+                        sobras[origem] -= len(tomadas_f)
+
+            for linha in alteradas:
+                if vagas_minimas[linha]:
+                    continue
+                if posicao_ampla[linha] < prefixo:
+                    vagas_minimas[linha] = vagas
+                    codigo_tipo[linha] = 1
+                elif dono[linha] == remanejada:
+                    vagas_minimas[linha] = vagas
+                    codigo_tipo[linha] = 3
+                elif dono[linha] >= 0:
+                    vagas_minimas[linha] = vagas
+                    codigo_tipo[linha] = 2
+                    categoria_linha[linha] = preenchimentos[dono[linha]][0]
+
+            # Convocados em "vagas": posição ampla < corte_ampla; fora da ampla, membros da lista k com
+            # posição < cortes_reservas[k]; os demais fora da ampla com posição < corte_remanejada
+            corte_ampla[vagas] = prefixo
+            for k in range(len(reservas)):
+                cortes_reservas[k, vagas] = fins[ultimos[k]]
+            corte_remanejada[vagas] = fins[remanejada]
+
+        return {
+            'vagas_maximas': vagas_maximas,
+            'vagas_minimas': np.array(vagas_minimas, dtype=np.int64),
+            'codigo_tipo': codigo_tipo,
+            'categoria': categoria_linha,
+            'corte_ampla': corte_ampla,
+            'cortes_reservas': cortes_reservas,
+            'corte_remanejada': corte_remanejada,
+        }
+
+    def vagas_minimas(self, linha, politica=POLITICA_PADRAO):
+        """Retorna (menor número de vagas, tipo de convocação) para a linha informada."""
+        varredura = self.varredura(politica)
+        codigo = int(varredura['codigo_tipo'][linha])
+        if codigo == 2:
+            return int(varredura['vagas_minimas'][linha]), politica.categorias[int(varredura['categoria'][linha])].nome
+        return int(varredura['vagas_minimas'][linha]), CODIGOS_TIPO.get(codigo)
+
+    def lista_reserva(self, linha, politica=POLITICA_PADRAO):
+        """
+        Lista de reserva em que a linha concorre e a sua classificação nela: a lista pela qual ela é
+        convocada primeiro ou, se não for convocada por uma reserva, a primeira lista da política a
+        que pertence. Retorna (None, None) para quem não está em nenhuma lista.
+        """
+        varredura = self.varredura(politica)
+        categorias = politica.categorias
+        if varredura['codigo_tipo'][linha] == 2:
+            candidatas = [categorias[int(varredura['categoria'][linha])]]
+        else:
+            candidatas = categorias
+        for categoria in candidatas:
+            reserva = self.reserva(categoria.coluna)
+            if reserva['membro'][linha]:
+                return categoria.nome, int(reserva['classificacao'][linha])
+        return None, None
+
+    def situacao_lote(self, linhas, lista_vagas, politica=POLITICA_PADRAO):
+        """
+        Calcula, de forma vetorizada, o código do tipo de convocação (0 = não convocado)
+        de cada linha em cada quantidade de vagas, usando os cortes da varredura.
+        Retorna uma matriz len(linhas) x len(lista_vagas).
+        """
+        linhas = np.asarray(linhas, dtype=np.int64)
+        varredura = self.varredura(politica)
+        lista_vagas = np.clip(np.asarray(lista_vagas, dtype=np.int64), 0, varredura['vagas_maximas'])
+
+        posicao_ampla = self.posicao_ampla[linhas][:, None]
+        na_ampla = posicao_ampla < varredura['corte_ampla'][lista_vagas][None, :]
+
+        # Fora da ampla, quem está antes do corte de alguma das suas listas foi convocado por uma reserva
+        em_reserva = np.zeros(na_ampla.shape, dtype=bool)
+        for categoria, cortes in zip(politica.categorias, varredura['cortes_reservas']):
+            reserva = self.reserva(categoria.coluna)
+            membro = reserva['membro'][linhas][:, None]
+            em_reserva |= membro & (reserva['posicao'][linhas][:, None] < cortes[lista_vagas][None, :])
+        nas_reservas = ~na_ampla & em_reserva
+        remanejada = ~na_ampla & ~em_reserva & (posicao_ampla < varredura['corte_remanejada'][lista_vagas][None, :])
+
+        codigos = np.zeros(na_ampla.shape, dtype=np.int8)
+        codigos[na_ampla] = 1
+        codigos[nas_reservas] = 2
+        codigos[remanejada] = 3
+        return codigos
+
+@dataclass(frozen=True)
+class ResultadoSimulacao:
+    """
+    Resultado imutável de uma simulação: linhas convocadas de cada tipo sobre um índice.
+    Pode ser compartilhado entre requisições e threads; a lista completa de convocados
+    só é montada quando solicitada.
+    """
+    versao_dados: str
+    desconsiderar_sub_judice: bool
+    indice: IndiceClassificacao
+    total_vagas: int
+    vagas_ampla: int
+    vagas_cotas: int
+    ampla: np.ndarray
+    cotas: np.ndarray
+    remanejada: np.ndarray
+    cotistas_na_ampla: int
+    cotistas_restantes: int
+    # Corte na ordem ampla (incluindo as linhas excluídas puladas) e linhas excluídas, ordenadas
+    limite_ampla: int
+    excluidas: np.ndarray
+    # Política de vagas usada, vagas de cada lista de reserva e a lista de cada linha em cotas
+    politica: PoliticaVagas
+    vagas_categorias: tuple
+    categoria_cotas: np.ndarray
+
+    def __post_init__(self):
+        for linhas in (self.ampla, self.cotas, self.remanejada, self.excluidas, self.categoria_cotas):
+            linhas.flags.writeable = False
+
+    @property
+    def chave(self):
+        """
+        Identifica o cenário: versão dos dados, vagas, Sub Judice e inscrições excluídas (e não as
+        linhas, cuja numeração pode variar entre processos com os mesmos dados).
+        """
+        excluidas = sorted(self.indice.inscricoes[self.excluidas].tolist())
+        return (self.versao_dados, self.total_vagas, self.desconsiderar_sub_judice, tuple(excluidas))
+
+    @property
+    def total_convocados(self):
+        return len(self.ampla) + len(self.cotas) + len(self.remanejada)
+
+    @property
+    def total_cotistas(self):
+        return self.cotistas_na_ampla + len(self.cotas)
+
+    def tipo_convocacao(self, linha):
+        """Retorna o tipo de convocação da linha, ou None se ela não foi convocada."""
+        indice = self.indice
+        posicao = int(np.searchsorted(self.excluidas, linha))
+        if posicao < len(self.excluidas) and self.excluidas[posicao] == linha:
+            return None
+        if indice.posicao_ampla[linha] < self.limite_ampla:
+            return TIPO_AMPLA
+        posicao = np.flatnonzero(self.cotas == linha)
+        if len(posicao):
+            return self.politica.categorias[self.categoria_cotas[posicao[0]]].nome
+        if np.any(self.remanejada == linha):
+            return TIPO_REMANEJADA
+        return None
+
+    @property
+    def tipos_cotas(self):
+        """Nome da lista de reserva de cada linha convocada em cotas."""
+        return np.array([categoria.nome for categoria in self.politica.categorias], dtype=object)[self.categoria_cotas]
+
+    @property
+    def cotistas(self):
+        """Marca, por linha do índice, quem pertence a alguma lista de reserva da política."""
+        return self.indice.membros_reservas(self.politica)['membro']
+
+    def convocados(self):
+        """Monta o dataframe de convocados (ampla, reservas e remanejadas, nesta ordem)."""
+        linhas = np.concatenate([self.ampla, self.cotas, self.remanejada])
+        convocados = pd.DataFrame({nome: valores[linhas] for nome, valores in self.indice.colunas.items()})
+        convocados['cotista'] = self.cotistas[linhas]
+        convocados['TIPO_CONVOCACAO'] = np.concatenate([
+            np.repeat(TIPO_AMPLA, len(self.ampla)).astype(object),
+            self.tipos_cotas,
+            np.repeat(TIPO_REMANEJADA, len(self.remanejada)).astype(object),
+        ])
+        return convocados
+
+class CacheLRU:
+    """
+    Cache LRU limitado e seguro para threads; remove os itens menos usados ao exceder a capacidade.
+    A capacidade é medida em número de itens ou, se informada a função medir, na soma dos tamanhos.
+    """
+    def __init__(self, capacidade, medir=None):
+        self.capacidade = capacidade
+        self.medir = medir or (lambda valor: 1)
+        self.ocupacao = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            if chave not in self._itens:
+                return None
+            self._itens.move_to_end(chave)
+            return self._itens[chave]
+
+    def guardar(self, chave, valor):
+        tamanho = self.medir(valor)
+        if tamanho > self.capacidade:
+            return valor
+        with self._lock:
+            if chave in self._itens:
+                self.ocupacao -= self.medir(self._itens.pop(chave))
+            self._itens[chave] = valor
+            self.ocupacao += tamanho
+            while self.ocupacao > self.capacidade:
+                _, removido = self._itens.popitem(last=False)
+                self.ocupacao -= self.medir(removido)
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.ocupacao = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+def maior_classificacao(classificacoes):
+    """Maior classificação entre as informadas (None se não houver nenhuma)."""
+    classificacoes = np.asarray(classificacoes, dtype=float)
+    classificacoes = classificacoes[~np.isnan(classificacoes)]
+    return float(classificacoes.max()) if len(classificacoes) else None
+
+class LinhaDoTempo:
+    """
+    Convocações já feitas agrupadas em rodadas (uma por DATA CONVOCAÇÃO), sobre um índice com
+    todos os candidatos, convocados ou não. Cada rodada guarda só as linhas que convocou (o delta);
+    o retrato dos candidatos restantes depois da rodada k é montado filtrando o retrato mais
+    próximo já montado (sem reordenar) e os retratos ficam em um cache LRU pequeno.
+    """
+    def __init__(self, completo, rodada_linha, datas, tipos, politica):
+        self.completo = completo
+        # Rodada de cada linha: 0 para convocados sem data, 1..R para as rodadas, R + 1 para os não convocados
+        self.rodada_linha = rodada_linha
+        self.datas = datas
+        # Tipo de vaga de cada linha convocada (0 ampla, k + 1 categoria k da política)
+        self.tipos = tipos
+        self.politica = politica
+        self.total_rodadas = len(datas)
+        ordem = np.argsort(rodada_linha, kind="stable")
+        limites = np.searchsorted(rodada_linha[ordem], np.arange(self.total_rodadas + 3))
+        self.deltas = [ordem[limites[k]:limites[k + 1]] for k in range(self.total_rodadas + 2)]
+        self._retratos = CacheLRU(CAPACIDADE_CACHE_RETRATOS)
+
+    def rotulo_tipo(self, codigo):
+        return TIPO_AMPLA if codigo == 0 else self.politica.categorias[codigo - 1].nome
+
+    def retrato(self, rodada):
+        """Índice dos candidatos ainda não convocados depois da rodada informada (0: antes da primeira)."""
+        for anterior in range(rodada, -1, -1):
+            retrato = self._retratos.obter(anterior)
+            if retrato is not None:
+                break
+        else:
+            anterior, retrato = -1, (self.completo, np.arange(self.completo.total))
+        if anterior == rodada:
+            return retrato[0]
+
+        # Só as rodadas entre o retrato encontrado e o pedido são retiradas
+        indice, linhas = retrato
+        with medir("filtro"):
+            manter = self.rodada_linha[linhas] > rodada
+            retrato = (indice.filtrar(manter), linhas[manter])
+        return self._retratos.guardar(rodada, retrato)[0]
+
+    def resumo(self, rodada):
+        """Data, convocados por tipo de vaga e maior classificação convocada (ampla e por lista) da rodada."""
+        linhas = self.deltas[rodada]
+        tipos = self.tipos[linhas]
+        resumo = {
+            'rodada': rodada,
+            'data': self.datas[rodada - 1].isoformat() if rodada > 0 else None,
+            'convocados': len(linhas),
+            'por_tipo': {self.rotulo_tipo(codigo): int(np.count_nonzero(tipos == codigo)) for codigo in range(len(self.politica.categorias) + 1)},
+            'ultima_classificacao': {},
+        }
+        for codigo in range(len(self.politica.categorias) + 1):
+            coluna = "CLAS. AMPLA" if codigo == 0 else self.politica.categorias[codigo - 1].coluna
+            classificacoes = np.asarray(self.completo.colunas[coluna], dtype=float)[linhas[tipos == codigo]]
+            resumo['ultima_classificacao'][self.rotulo_tipo(codigo)] = maior_classificacao(classificacoes)
+        return resumo
+
+def criar_pool_processos(processos, initializer=None):
+    """
+    Cria um pool limitado de processos para trabalho pesado (PDFs, Monte Carlo). Usa forkserver,
+    que evita fazer fork de um processo com threads: o servidor de fork importa só os módulos de
+    trabalho, uma única vez, e os processos do pool são copiados dele. O módulo principal não é
+    pré-carregado: os processos do pool ainda o importam (como __mp_main__), o que é barato porque
+    importar o app não carrega os dados (ver obter_sistema).
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context('forkserver')
+        contexto.set_forkserver_preload(['relatorio_pdf', 'probabilidade'])
+    else:
+        contexto = multiprocessing.get_context('spawn')
+    return ProcessPoolExecutor(max_workers=processos, mp_context=contexto, initializer=initializer)
+
+class FilaPDF:
+    """
+    Geração de PDFs em segundo plano, em um pool limitado de processos. Cada pedido recebe o id
+    de uma tarefa, derivado do cenário (versão dos dados, vagas, Sub Judice, desistentes): pedidos
+    para o mesmo cenário recebem o mesmo id em qualquer processo, e o PDF é renderizado uma única
+    vez. O estado e o PDF de cada tarefa ficam em arquivos no diretório da fila, e a tarefa é
+    reivindicada pela criação exclusiva do arquivo de estado, para que qualquer processo do servidor
+    na mesma máquina (por exemplo, outro worker do gunicorn) consiga consultá-la sem duplicá-la.
+    """
+    def __init__(self, diretorio, processos=PROCESSOS_PDF_PADRAO, validade=VALIDADE_TAREFAS_PDF):
+        self.diretorio = diretorio
+        self.processos = processos
+        self.validade = validade
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = criar_pool_processos(self.processos, initializer=registrar_fontes)
+        return self._executor
+
+    def _caminho(self, id_tarefa, extensao):
+        return os.path.join(self.diretorio, f"{id_tarefa}.{extensao}")
+
+    def _gravar(self, caminho, conteudo):
+        # Grava em um arquivo temporário e renomeia, para que leitores nunca vejam um arquivo pela metade
+        temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+        with open(temporario, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+
+    def _gravar_estado(self, estado):
+        self._gravar(self._caminho(estado['id'], 'json'), json.dumps(estado).encode('utf-8'))
+
+    def _reivindicar(self, estado):
+        """Cria o arquivo de estado da tarefa só se ele ainda não existe; retorna se esta chamada o criou."""
+        try:
+            descritor = os.open(self._caminho(estado['id'], 'json'), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        try:
+            os.write(descritor, json.dumps(estado).encode('utf-8'))
+        finally:
+            os.close(descritor)
+        return True
+
+    def _descartar(self, id_tarefa):
+        """Remove o estado da tarefa (renomeado antes, para que só um processo o descarte)."""
+        temporario = f"{self._caminho(id_tarefa, 'json')}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.rename(self._caminho(id_tarefa, 'json'), temporario)
+            os.remove(temporario)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _abandonada(estado):
+        """Tarefa com erro, ou pendente em um processo que já terminou: pode ser reivindicada de novo."""
+        if estado is None:
+            return False
+        if estado['estado'] == 'erro':
+            return True
+        if estado['estado'] != 'pendente' or not estado.get('pid'):
+            return False
+        try:
+            os.kill(estado['pid'], 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def estado(self, id_tarefa):
+        """Estado da tarefa (pendente, concluida ou erro), ou None se ela não existe ou expirou."""
+        # Ids são sempre hexadecimais: impede que o id seja usado para ler outros arquivos
+        if not id_tarefa or not all(c in '0123456789abcdef' for c in id_tarefa):
+            return None
+        try:
+            with open(self._caminho(id_tarefa, 'json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def caminho_pdf(self, id_tarefa):
+        return self._caminho(id_tarefa, 'pdf')
+
+    def _limpar_expiradas(self):
+        limite = time.time() - self.validade
+        with os.scandir(self.diretorio) as entradas:
+            for entrada in entradas:
+                try:
+                    if entrada.stat().st_mtime < limite:
+                        os.remove(entrada.path)
+                except FileNotFoundError:
+                    pass
+
+    def submeter(self, chave, descricao, obter_dados, conteudo=None, ao_concluir=None):
+        """
+        Retorna o id da tarefa do cenário chave (versão dos dados, vagas, Sub Judice, ...), criando-a
+        se nenhum processo a criou; descricao (JSON) é incluída no estado da tarefa. Se conteudo (o PDF
+        já pronto, por exemplo do cache) for informado, a tarefa já nasce concluída; senão obter_dados()
+        monta os dados enviados ao pool. ao_concluir recebe os bytes do PDF quando a renderização termina.
+        Uma tarefa com erro ou abandonada (o processo que a criou terminou) é criada de novo.
+        """
+        id_tarefa = hashlib.sha256(repr(chave).encode('utf-8')).hexdigest()[:32]
+        os.makedirs(self.diretorio, exist_ok=True)
+        with self._lock:
+            self._limpar_expiradas()
+
+        estado = {'id': id_tarefa, 'estado': 'pendente', **descricao, 'criada_em': time.time(), 'pid': os.getpid()}
+        if not self._reivindicar(estado):
+            if not self._abandonada(self.estado(id_tarefa)):
+                return id_tarefa
+            self._descartar(id_tarefa)
+            if not self._reivindicar(estado):
+                return id_tarefa
+
+        try:
+            if conteudo is not None:
+                self._gravar(self.caminho_pdf(id_tarefa), conteudo)
+                estado['estado'] = 'concluida'
+                self._gravar_estado(estado)
+            else:
+                dados = obter_dados()
+                with self._lock:
+                    try:
+                        futuro = self._pool().submit(renderizar_lista_convocados, dados)
+                    except BrokenProcessPool:
+                        # Um processo do pool morreu (por exemplo, por falta de memória): recria o pool
+                        self._executor = None
+                        futuro = self._pool().submit(renderizar_lista_convocados, dados)
+                futuro.add_done_callback(lambda futuro: self._finalizar(estado, futuro, ao_concluir))
+        except BaseException:
+            # Sem a submissão, nenhuma tarefa fica pendente para sempre: a reivindicação é desfeita
+            self._descartar(id_tarefa)
+            raise
+        return id_tarefa
+
+    def _finalizar(self, estado, futuro, ao_concluir):
+        estado = dict(estado)
+        try:
+            conteudo = futuro.result()
+            self._gravar(self.caminho_pdf(estado['id']), conteudo)
+            estado['estado'] = 'concluida'
+            if ao_concluir:
+                ao_concluir(conteudo)
+        except Exception as e:
+            logger.exception("erro_tarefa_pdf id=%s erro=%s", estado['id'], e)
+            estado['estado'] = 'erro'
+            estado['erro'] = str(e)
+        duracao_etapa.observar(time.time() - estado['criada_em'], etapa="pdf_fila")
+        self._gravar_estado(estado)
 
 class SistemaConvocacao:
-    def __init__(self, caminho_arquivo_json):
-        """Inicializa o sistema de convocação com o arquivo JSON de candidatos."""
+    def __init__(self, caminho_arquivo_json, politica=None):
+        """
+        Inicializa o sistema de convocação com o arquivo JSON (ou diretório colunar) de candidatos
+        e a política de vagas (por padrão, a configurada em POLITICA_VAGAS ou a regra de 20% para cotas).
+        """
         self.caminho_arquivo_json = caminho_arquivo_json
+        self.politica = politica or politica_configurada()
         self.df = None
-        self.convocados_final = None
+        # Estado atual (versão dos dados, índice), trocado de uma só vez a cada carga
+        self._estado = None
+        self._assinatura_arquivo = None
+        self._lock_recarga = threading.Lock()
+        self._blocos_compartilhados = []
+        # Blocos publicados por este processo (o mestre do gunicorn), removidos a cada nova publicação
+        self._blocos_publicados = []
+        # Nos workers do gunicorn: função que pede ao processo mestre a recarga coordenada dos dados
+        self.pedir_recarga = None
+        self.cache_resultados = CacheLRU(CAPACIDADE_CACHE_RESULTADOS)
+        self.cache_pdfs = CacheLRU(CAPACIDADE_CACHE_PDFS, medir=len)
+        self.cache_reclassificacoes = CacheLRU(CAPACIDADE_CACHE_RECLASSIFICACOES)
+        self.fila_pdfs = FilaPDF(
+            os.environ.get(VARIAVEL_DIRETORIO_TAREFAS_PDF, os.path.join(tempfile.gettempdir(), "simulador_tarefas_pdf")),
+            int(os.environ.get(VARIAVEL_PROCESSOS_PDF, PROCESSOS_PDF_PADRAO)),
+        )
+        self.processos_monte_carlo = int(os.environ.get(VARIAVEL_PROCESSOS_MONTE_CARLO, 0)) or os.cpu_count() or 1
+        self._pool_monte_carlo = None
+        self._lock_pool_monte_carlo = threading.Lock()
+        # Colunas dos candidatos já convocados e linha do tempo montada a partir delas (por versão dos dados)
+        self._historico = None
+        self._linha_do_tempo = None
+        self._lock_linha_do_tempo = threading.Lock()
         self.data_geracao = datetime.now().strftime("%d/%m/%Y às %H:%M:%S")
 
         # Registrar fonte Arial
-        try:
-            pdfmetrics.registerFont(TTFont('Arial', 'Arial.ttf'))
-        except:
-            print("Aviso: Fonte Arial não encontrada. Usando Helvetica como alternativa.")
+        registrar_fontes()
 
     def carregar_dados(self):
-        """Carrega e prepara os dados do arquivo JSON, removendo convocados"""
+        """
+        Carrega e prepara os dados do arquivo JSON (ou do diretório colunar gerado pelo
+        conversor, aberto com memory-map), removendo convocados.
+        """
         try:
-            with open(self.caminho_arquivo_json, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            self.df = pd.DataFrame(data)
+            assinatura = self._ler_assinatura_arquivo()
+            with medir("carga"):
+                df, historico, versao_dados = self._ler_arquivo()
 
-            # Limpeza e preparação dos dados
-            self.df.columns = self.df.columns.str.strip()
+                # Índice de classificação usado pelas simulações
+                indice = IndiceClassificacao({coluna: df[coluna].to_numpy() for coluna in df.columns})
 
-            # Converter a coluna de inscrição para string para garantir compatibilidade
-            self.df["INSCRIÇÃO"] = self.df["INSCRIÇÃO"].astype(str).str.strip()
+            # Cria coluna para identificar cotistas
+            df["cotista"] = indice.cotista
+            self.df = df
+            self._historico = historico
+            self._assinatura_arquivo = assinatura
+            self._trocar_indice(indice, versao_dados)
 
-            # Remover candidatos já convocados
-            self.df = self.df[self.df["SITUAÇÃO"] != "CONVOCADO"].copy()
-            self.df.reset_index(drop=True, inplace=True) # Resetar o índice após a filtragem
+            logger.info("dados_carregados arquivo=%s candidatos=%d versao=%s", self.caminho_arquivo_json, len(self.df), self.versao_dados)
 
-            # Converter colunas numéricas (onde a conversão para float é possível)
-            numeric_cols = ['CLAS. AMPLA', 'CLAS. COTAS', 'LP', 'LI', 'RLM', 'AT', 'LEG. PMDF', 'CONH. BÁS.', 'CONH. ESP.', 'TOTAL OBJETIVA', 'REDAÇÃO', 'NOTA TOTAL']
-            for col in numeric_cols:
-                if col in self.df.columns:
-                    # Tentar converter para float, substituindo vírgula por ponto
-                    self.df[col] = pd.to_numeric(self.df[col].str.replace(',', '.'), errors='coerce')
+            return True
+        except Exception as e:
+            logger.exception("erro_carga arquivo=%s erro=%s", self.caminho_arquivo_json, e)
+            return False
 
-            # Cria coluna para identificar cotistas
-            self.df["cotista"] = self.df["CLAS. COTAS"].notna()
+    @property
+    def indice(self):
+        """Índice de classificação atual (None antes da primeira carga)."""
+        return self._estado[1] if self._estado else None
 
-            print(f"Dados carregados com sucesso do JSON. Total de {len(self.df)} candidatos.")
-            print(f"Primeiras 5 inscrições no dataframe: {self.df['INSCRIÇÃO'].head(5).tolist()}")
-            print(f"Últimas 5 inscrições no dataframe: {self.df['INSCRIÇÃO'].tail(5).tolist()}")
+    @property
+    def versao_dados(self):
+        """
+        Versão do conjunto de dados (None antes da primeira carga), derivada do conteúdo do arquivo:
+        usada nas chaves de cache, nas ETags e nos cursores de página.
+        """
+        return self._estado[0] if self._estado else None
+
+    def _trocar_indice(self, indice, versao_dados):
+        """Publica o novo índice e a versão dos dados em uma única atribuição."""
+        # Índice de nomes montado na carga, antes das primeiras buscas
+        indice.indice_nomes
+        self._estado = (versao_dados, indice)
+        self.cache_resultados.limpar()
+        self.cache_pdfs.limpar()
+
+    def _ler_assinatura_arquivo(self):
+        """Assinatura (data de modificação, tamanho) do arquivo de dados, usada para detectar alterações."""
+        caminho = self.caminho_arquivo_json
+        if os.path.isdir(caminho):
+            caminho = os.path.join(caminho, ARQUIVO_ESQUEMA)
+        estatisticas = os.stat(caminho)
+        return estatisticas.st_mtime_ns, estatisticas.st_size
+
+    def _versao_conteudo(self, partes):
+        """
+        Versão dos dados calculada sobre os bytes lidos do arquivo e a política de vagas (que também
+        muda os resultados): a mesma em todos os processos e reinícios que carregam o mesmo conteúdo,
+        ao contrário de um contador local. partes são objetos de bytes (ou arrays contíguos).
+        """
+        resumo = hashlib.sha256(repr(self.politica).encode('utf-8'))
+        for parte in partes:
+            resumo.update(parte)
+        return resumo.hexdigest()[:16]
+
+    def _ler_arquivo(self):
+        """
+        Lê o arquivo de dados (JSON ou diretório colunar). Retorna (candidatos não convocados,
+        colunas dos já convocados, guardadas para a linha do tempo das convocações, versão do conteúdo).
+        """
+        if os.path.isdir(self.caminho_arquivo_json):
+            return self._ler_colunar()
+        return self._ler_json()
+
+    def _separar_convocados(self, df):
+        """Separa os candidatos já convocados: retorna (demais candidatos, colunas dos convocados)."""
+        convocado = (df["SITUAÇÃO"] == "CONVOCADO").to_numpy()
+        historico = {coluna: df[coluna].to_numpy()[convocado] for coluna in df.columns}
+        df = df[~convocado].copy()
+        df.reset_index(drop=True, inplace=True) # Resetar o índice após a filtragem
+        return df, historico
+
+    def _ler_json(self):
+        """Lê o arquivo JSON (valores textuais) e converte as colunas numéricas."""
+        with open(self.caminho_arquivo_json, 'rb') as f:
+            conteudo = f.read()
+        df = pd.DataFrame(json.loads(conteudo))
+
+        # Limpeza e preparação dos dados
+        df.columns = df.columns.str.strip()
+
+        # Converter a coluna de inscrição para string para garantir compatibilidade
+        df["INSCRIÇÃO"] = df["INSCRIÇÃO"].astype(str).str.strip()
+
+        # Converter colunas numéricas (onde a conversão para float é possível)
+        for col in COLUNAS_NUMERICAS:
+            if col in df.columns:
+                # Tentar converter para float, substituindo vírgula por ponto
+                df[col] = pd.to_numeric(df[col].str.replace(',', '.'), errors='coerce')
+
+        # Marcação de Sub Judice calculada uma única vez, na carga
+        df[COLUNA_SUB_JUDICE] = marcar_sub_judice(df["NOME"].to_numpy())
+
+        # Separar candidatos já convocados (mantidos apenas para a linha do tempo)
+        return (*self._separar_convocados(self._converter_colunas_reserva(df)), self._versao_conteudo([conteudo]))
+
+    def _ler_colunar(self):
+        """
+        Abre com memory-map só as colunas usadas (simulação, notas, política e linha do tempo);
+        as colunas numéricas já vêm tipadas.
+        """
+        diretorio = self.caminho_arquivo_json
+        colunas = ler_colunar(diretorio, colunas=set(COLUNAS_COMPARTILHADAS + self.politica.colunas + COLUNAS_NOTAS + COLUNAS_HISTORICO))
+        with open(os.path.join(diretorio, ARQUIVO_ESQUEMA), 'rb') as f:
+            esquema = f.read()
+        # O conversor grava no esquema o hash das colunas; diretórios antigos, sem ele, são
+        # identificados pelo tamanho e pela data de modificação de cada arquivo de coluna
+        partes = [esquema]
+        dados_esquema = json.loads(esquema)
+        if 'hash_conteudo' not in dados_esquema:
+            for coluna in dados_esquema['colunas']:
+                estatisticas = os.stat(os.path.join(diretorio, coluna['arquivo']))
+                partes.append(f"{coluna['arquivo']}:{estatisticas.st_size}:{estatisticas.st_mtime_ns}".encode('utf-8'))
+        versao_dados = self._versao_conteudo(partes)
+
+        # Separar candidatos já convocados; sem convocados, as colunas mapeadas são usadas sem cópia
+        convocado = colunas["SITUAÇÃO"] == "CONVOCADO"
+        if convocado.any():
+            manter = np.flatnonzero(~convocado)
+            df = pd.DataFrame({nome: valores[manter] for nome, valores in colunas.items()})
+        else:
+            df = pd.DataFrame(colunas, copy=False)
+        historico = pd.DataFrame({nome: valores[np.flatnonzero(convocado)] for nome, valores in colunas.items()})
+
+        # Diretórios gerados antes da marcação de Sub Judice não trazem a coluna
+        for tabela in (df, historico):
+            if COLUNA_SUB_JUDICE not in tabela.columns:
+                tabela[COLUNA_SUB_JUDICE] = marcar_sub_judice(tabela["NOME"].to_numpy())
+        historico = self._converter_colunas_reserva(historico)
+        return self._converter_colunas_reserva(df), {coluna: historico[coluna].to_numpy() for coluna in historico.columns}, versao_dados
+
+    def _converter_colunas_reserva(self, df):
+        """
+        Converte para número as colunas de classificação das listas de reserva da política que
+        não estão entre as colunas numéricas do arquivo (por exemplo, uma coluna de PcD).
+        """
+        faltantes = [coluna for coluna in self.politica.colunas if coluna not in df.columns]
+        if faltantes:
+            raise ValueError(f"Colunas da política de vagas ausentes no arquivo: {', '.join(faltantes)}")
+        for coluna in self.politica.colunas:
+            if not pd.api.types.is_numeric_dtype(df[coluna]):
+                df[coluna] = pd.to_numeric(df[coluna].astype(str).str.replace(',', '.'), errors='coerce')
+        return df
+
+    def recarregar(self, forcar=False):
+        """
+        Relê o arquivo de dados, se ele mudou, e aplica ao índice apenas a diferença: candidatos
+        que passaram a CONVOCADO saem do índice (as ordens são filtradas, sem reordenar) e nomes
+        e marcações Sub Judice são atualizados. Inclusões de candidatos ou mudanças de
+        classificação exigem reconstruir o índice. O novo índice entra em uso de uma só vez,
+        com a versão calculada sobre o novo conteúdo. Sob o gunicorn, só o processo mestre
+        recarrega e republica os dados para todos os workers (ver gunicorn.conf.py).
+        Retorna um resumo da recarga.
+        """
+        with self._lock_recarga:
+            assinatura = self._ler_assinatura_arquivo()
+            if not forcar and assinatura == self._assinatura_arquivo:
+                return {'modo': 'sem_alteracoes', 'versao_dados': self.versao_dados}
+
+            with medir("carga"):
+                df, historico, versao_dados = self._ler_arquivo()
+            indice_atual = self.indice
+            linhas_atuais = indice_atual.linhas(df["INSCRIÇÃO"].to_numpy())
+
+            modo = 'completo'
+            if (linhas_atuais >= 0).all() and len(np.unique(linhas_atuais)) == len(linhas_atuais):
+                # Alinhar as linhas do arquivo à ordem das linhas do índice atual
+                ordem = np.argsort(linhas_atuais, kind="stable")
+                df = df.iloc[ordem].reset_index(drop=True)
+                linhas_atuais = linhas_atuais[ordem]
+                mesmas_classificacoes = (
+                    np.array_equal(df["CLAS. AMPLA"].to_numpy(dtype=float), indice_atual.clas_ampla[linhas_atuais], equal_nan=True)
+                    and np.array_equal(df["CLAS. COTAS"].to_numpy(dtype=float), indice_atual.clas_cotas[linhas_atuais], equal_nan=True)
+                )
+                if mesmas_classificacoes:
+                    modo = 'delta'
+
+            colunas = {coluna: df[coluna].to_numpy() for coluna in df.columns}
+            if modo == 'delta':
+                manter = np.zeros(indice_atual.total, dtype=bool)
+                manter[linhas_atuais] = True
+                with medir("filtro"):
+                    novo_indice = indice_atual.filtrar(manter, colunas)
+                removidos = indice_atual.total - len(linhas_atuais)
+                nomes_alterados = int(np.count_nonzero(indice_atual.nomes[linhas_atuais] != colunas["NOME"]))
+            else:
+                with medir("carga"):
+                    novo_indice = IndiceClassificacao(colunas)
+                removidos = None
+                nomes_alterados = None
+
+            df["cotista"] = novo_indice.cotista
+            self.df = df
+            self._historico = historico
+            self._assinatura_arquivo = assinatura
+            self._trocar_indice(novo_indice, versao_dados)
+
+            resumo = {
+                'modo': modo,
+                'versao_dados': self.versao_dados,
+                'total': novo_indice.total,
+                'removidos': removidos,
+                'nomes_alterados': nomes_alterados,
+            }
+            logger.info("dados_recarregados arquivo=%s modo=%s versao=%s total=%d removidos=%s nomes_alterados=%s",
+                        self.caminho_arquivo_json, modo, self.versao_dados, novo_indice.total, removidos, nomes_alterados)
+            return resumo
 
+    def monitorar_arquivo(self, intervalo=30, ao_alterar=None):
+        """
+        Inicia uma thread que verifica o arquivo de dados periodicamente e o recarrega quando ele muda.
+        Com ao_alterar (no mestre do gunicorn), a thread só chama ao_alterar, uma vez por alteração,
+        e a recarga fica a cargo de quem é avisado.
+        """
+        def monitorar():
+            avisada = None
+            while True:
+                time.sleep(intervalo)
+                try:
+                    if ao_alterar is None:
+                        self.recarregar()
+                        continue
+                    assinatura = self._ler_assinatura_arquivo()
+                    if assinatura != self._assinatura_arquivo and assinatura != avisada:
+                        avisada = assinatura
+                        ao_alterar()
+                except Exception as e:
+                    logger.exception("erro_recarga arquivo=%s erro=%s", self.caminho_arquivo_json, e)
+
+        thread = threading.Thread(target=monitorar, name="monitor-dados", daemon=True)
+        thread.start()
+        return thread
+
+    def publicar_compartilhado(self, prefixo=None):
+        """
+        Publica em memória compartilhada as colunas usadas pela simulação e pelo PDF e os arrays
+        dos índices (com e sem Sub Judice). Retorna (manifesto, blocos): o manifesto é pequeno e
+        serializável em JSON e basta para outros processos anexarem os dados com carregar_compartilhado.
+        """
+        versao_dados, indice_atual = self._estado
+        # Nomes curtos (alguns sistemas limitam os nomes dos blocos) e únicos a cada publicação
+        prefixo = prefixo or f"sc{os.getpid()}{uuid.uuid4().hex[:8]}"
+        manifesto = {'versao_dados': versao_dados, 'indices': {}}
+        blocos = []
+        for nome, desconsiderar_sub_judice in (('completo', False), ('sem_sub_judice', True)):
+            indice = self._indice_para(desconsiderar_sub_judice, indice_atual)
+            nomes_colunas = COLUNAS_COMPARTILHADAS + self.politica.colunas + [nota for nota in COLUNAS_NOTAS if nota in indice.colunas]
+            colunas = {coluna: indice.colunas[coluna] for coluna in dict.fromkeys(nomes_colunas)}
+            descricao_colunas, blocos_colunas = publicar_arrays(colunas, f"{prefixo}{nome[0]}c")
+            descricao_arrays, blocos_arrays = publicar_arrays(indice.arrays, f"{prefixo}{nome[0]}i")
+            manifesto['indices'][nome] = {'colunas': descricao_colunas, 'arrays': descricao_arrays}
+            blocos += blocos_colunas + blocos_arrays
+        return manifesto, blocos
+
+    def compartilhar_dados(self):
+        """
+        No processo que publica os dados (o mestre do gunicorn): publica o índice atual em memória
+        compartilhada, passa a usá-lo pelos novos blocos (descartando a cópia privada) e remove os
+        blocos publicados antes, que continuam mapeados nos processos que ainda os usam até eles
+        terminarem. Retorna o manifesto, herdado pelos workers criados depois.
+        """
+        manifesto, blocos = self.publicar_compartilhado()
+        if not self.carregar_compartilhado(manifesto, blocos):
+            liberar_blocos(blocos, remover=True)
+            raise RuntimeError("Não foi possível anexar os dados publicados em memória compartilhada.")
+        anteriores, self._blocos_publicados = self._blocos_publicados, blocos
+        liberar_blocos(anteriores, remover=True)
+        return manifesto
+
+    def liberar_publicados(self):
+        """Remove os blocos publicados por este processo (ao encerrar o mestre do gunicorn)."""
+        liberar_blocos(self._blocos_publicados, remover=True)
+        self._blocos_publicados = []
+
+    def carregar_compartilhado(self, manifesto, blocos_abertos=None):
+        """
+        Anexa os dados publicados por publicar_compartilhado, sem ler nem processar o arquivo:
+        as colunas e os índices passam a ser arrays somente leitura sobre a memória compartilhada.
+        O processo que publicou os dados informa seus próprios blocos em blocos_abertos.
+        """
+        try:
+            indices = {}
+            blocos = []
+            for nome, descricao in manifesto['indices'].items():
+                colunas, blocos_colunas = anexar_arrays(descricao['colunas'], blocos_abertos)
+                arrays, blocos_arrays = anexar_arrays(descricao['arrays'], blocos_abertos)
+                indices[nome] = IndiceClassificacao(colunas, arrays)
+                blocos += blocos_colunas + blocos_arrays
+
+            indice = indices['completo']
+            indice._sem_sub_judice = indices['sem_sub_judice']
+            self.df = None
+            self._blocos_compartilhados = blocos
+            self._trocar_indice(indice, manifesto['versao_dados'])
+
+            logger.info("dados_anexados origem=memoria_compartilhada candidatos=%d versao=%s", self.indice.total, self.versao_dados)
             return True
         except Exception as e:
-            print(f"Erro ao carregar o arquivo JSON: {e}")
+            logger.exception("erro_anexar_memoria_compartilhada erro=%s", e)
             return False
 
-    def simular_convocacao(self, num_inscricao, total_vagas, desconsiderar_sub_judice=False):
+    def _indice_para(self, desconsiderar_sub_judice=False, indice=None):
+        """Retorna o índice de classificação (o atual, se não informado), com ou sem os candidatos Sub Judice."""
+        indice = indice or self.indice
+        return indice.sem_sub_judice if desconsiderar_sub_judice else indice
+
+    @staticmethod
+    def _linhas_desistentes(indice, desistentes):
+        """Linhas (ordenadas, sem repetição) das inscrições desistentes; inscrições desconhecidas são ignoradas."""
+        if not desistentes:
+            return np.empty(0, dtype=np.int64)
+        excluidas = indice.linhas([str(inscricao).strip() for inscricao in desistentes])
+        return np.unique(excluidas[excluidas >= 0])
+
+    def buscar_candidatos(self, consulta, limite=RESULTADOS_BUSCA_PADRAO):
+        """
+        Candidatos não convocados cujo nome (ignorando acentos, maiúsculas e espaços extras)
+        tem uma palavra iniciada pela consulta, com inscrição e classificações.
+        """
+        indice = self.indice
+        with medir("busca"):
+            linhas = indice.buscar_nomes(consulta, limite)
+
+        def classificacao(valor):
+            return None if np.isnan(valor) else float(valor)
+
+        return [{
+            'inscricao': indice.inscricoes[linha],
+            'nome': str(indice.nomes[linha]).strip(),
+            'classificacao_ampla': classificacao(indice.clas_ampla[linha]),
+            'classificacao_cotas': classificacao(indice.clas_cotas[linha]),
+        } for linha in linhas]
+
+    def resultado_simulacao(self, total_vagas, desconsiderar_sub_judice=False, desistentes=None):
+        """
+        Retorna o resultado (imutável) da simulação para o número de vagas informado,
+        reaproveitando o cache LRU por (versão dos dados, vagas, Sub Judice, desistentes).
+        desistentes é uma lista de inscrições tratadas como desistentes (inscrições
+        desconhecidas são ignoradas).
+        """
+        total_vagas = max(int(total_vagas), 0)
+        desconsiderar_sub_judice = bool(desconsiderar_sub_judice)
+        versao_dados, indice = self._estado
+        indice = self._indice_para(desconsiderar_sub_judice, indice)
+
+        excluidas = self._linhas_desistentes(indice, desistentes)
+
+        chave = (versao_dados, total_vagas, desconsiderar_sub_judice, tuple(excluidas.tolist()))
+        resultado = self.cache_resultados.obter(chave)
+        if resultado is not None:
+            acessos_cache.incrementar(cache="resultados", resultado="acerto")
+            return resultado
+        acessos_cache.incrementar(cache="resultados", resultado="falha")
+
+        resultado = ResultadoSimulacao(versao_dados, desconsiderar_sub_judice, indice, politica=self.politica,
+                                       **indice.alocar(total_vagas, excluidas, self.politica))
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "simulacao versao=%s total_vagas=%d sub_judice=%s desistentes=%d candidatos=%d vagas_ampla=%d vagas_cotas=%d "
+                "convocados=%d cotistas_na_ampla=%d cotas=%d remanejadas=%d",
+                versao_dados, resultado.total_vagas, desconsiderar_sub_judice, len(excluidas), indice.total, resultado.vagas_ampla,
+                resultado.vagas_cotas, resultado.total_convocados, resultado.cotistas_na_ampla, len(resultado.cotas),
+                len(resultado.remanejada))
+
+        return self.cache_resultados.guardar(chave, resultado)
+
+    def simular_convocacao(self, num_inscricao, total_vagas, desconsiderar_sub_judice=False, desistentes=None):
         """
         Simula o processo de convocação baseado no número de vagas especificado.
         Implementa a regra: cotistas com classificação para ampla são convocados como ampla,
         liberando vaga para outros cotistas.
-        Opção para desconsiderar candidatos Sub Judice.
+        Opção para desconsiderar candidatos Sub Judice e para tratar inscrições como desistentes.
+        Não altera o estado do sistema; o resultado da simulação fica no cache compartilhado.
         """
-        if self.df is None:
-            print("É necessário carregar os dados primeiro.")
+        if self.indice is None:
+            logger.error("dados_nao_carregados")
             return "Erro: dados não carregados", None
 
-        # Filtrar candidatos Sub Judice se a opção estiver marcada
-        if desconsiderar_sub_judice:
-            print("ENTROU NO BLOCO DE DESCONSIDERAR SUB JUDICE")
-            self.df = self.df[~self.df['NOME'].str.contains('(Sub Judice)', case=False)].copy()
-            self.df.reset_index(drop=True, inplace=True)
-            print(f"Total de candidatos após remover Sub Judice: {len(self.df)}")
+        simulacao = self.resultado_simulacao(total_vagas, desconsiderar_sub_judice, desistentes)
+        return self._descrever_convocacao(simulacao, num_inscricao)
+
+    def _descrever_convocacao(self, simulacao, num_inscricao):
+        """Mensagem e dados do candidato na simulação informada (candidato_info é None se não convocado)."""
+        indice = simulacao.indice
 
         # Garantir que o número de inscrição seja tratado como string
         num_inscricao = str(num_inscricao).strip()
-
-        # NOVO: Logs adicionais para depuração
-        print(f"Verificando a inscrição: {num_inscricao}")
-        print(f"Total de candidatos no dataframe: {len(self.df)}")
-        print(f"Inscrição encontrada no dataframe original: {num_inscricao in self.df['INSCRIÇÃO'].values}")
-
-        # NOVO: Verificar informações do candidato no dataframe original
-        if num_inscricao in self.df["INSCRIÇÃO"].values:
-            candidato_df = self.df[self.df["INSCRIÇÃO"] == num_inscricao].iloc[0]
-            print(f"Candidato encontrado no dataframe original: {candidato_df['NOME']}")
-            print(f"Classificação ampla: {candidato_df['CLAS. AMPLA']}")
-            print(f"Classificação cotas: {candidato_df['CLAS. COTAS'] if not pd.isna(candidato_df['CLAS. COTAS']) else 'N/A'}")
-        else:
-            print(f"ATENÇÃO: A inscrição {num_inscricao} não foi encontrada no dataframe original!")
-            # Verificar se há alguma inscrição similar para detectar possíveis problemas de formatação
-            print("Verificando inscrições similares...")
-            for inscr in self.df['INSCRIÇÃO'].values[:20]:  # Verificar as primeiras 20 inscrições
-                print(f"Comparando com: '{inscr}' (tipo: {type(inscr)})")
-
-        # Calcular a quantidade de vagas para cotistas (20%) e ampla (80%)
-        vagas_cotas = int(total_vagas * 0.20)
-        vagas_ampla = total_vagas - vagas_cotas  # Garante que o total seja exato
-
-        print(f"Simulando convocação para {total_vagas} vagas ({vagas_ampla} ampla e {vagas_cotas} cotas)")
-
-        # Ordenar todos os candidatos por classificação ampla
-        df_ampla = self.df.sort_values(by="CLAS. AMPLA").copy()
-
-        # 1. Selecionar primeiro os candidatos dentro do limite de vagas de ampla concorrência
-        convocados_ampla_inicial = df_ampla.head(vagas_ampla).copy()
-        convocados_ampla_inicial['TIPO_CONVOCACAO'] = 'Ampla Concorrência'
-
-        # Contar quantos cotistas foram convocados pela ampla
-        cotistas_na_ampla = convocados_ampla_inicial[convocados_ampla_inicial['cotista'] == True]
-        print(f"Cotistas aprovados pela ampla concorrência: {len(cotistas_na_ampla)}")
-
-        # 2. Selecionar cotistas que não foram convocados pela ampla
-        todos_cotistas = self.df[self.df['cotista'] == True].copy()
-        cotistas_restantes = todos_cotistas[~todos_cotistas['INSCRIÇÃO'].isin(convocados_ampla_inicial['INSCRIÇÃO'])]
-        cotistas_restantes = cotistas_restantes.sort_values(by="CLAS. COTAS")
-
-        # 3. Definir o número necessário de cotistas adicionais para atingir o mínimo de 20%
-        # Precisamos convocar (vagas_cotas) cotistas no total
-        cotistas_adicionais_necessarios = vagas_cotas
-
-        # MODIFICAÇÃO: Verificar se há cotistas suficientes para preencher as vagas reservadas
-        if len(cotistas_restantes) < cotistas_adicionais_necessarios:
-            print(f"AVISO: Não há cotistas suficientes para preencher todas as vagas reservadas!")
-            print(f"- Vagas reservadas para cotas: {cotistas_adicionais_necessarios}")
-            print(f"- Cotistas disponíveis: {len(cotistas_restantes)}")
-
-            # Usar todos os cotistas disponíveis
-            convocados_cotas = cotistas_restantes.copy()
-            convocados_cotas['TIPO_CONVOCACAO'] = 'Cotas'
-
-            # Calcular quantas vagas de cotas sobraram para serem preenchidas por candidatos da ampla
-            vagas_cotas_nao_preenchidas = cotistas_adicionais_necessarios - len(convocados_cotas)
-            print(f"- Vagas de cotas não preenchidas: {vagas_cotas_nao_preenchidas}")
-
-            # Selecionar candidatos adicionais da ampla concorrência para preencher as vagas restantes
-            # Excluir candidatos já convocados (pela ampla ou cotas)
-            inscritos_ja_convocados = list(convocados_ampla_inicial['INSCRIÇÃO']) + list(convocados_cotas['INSCRIÇÃO'])
-            candidatos_ampla_adicional = df_ampla[~df_ampla['INSCRIÇÃO'].isin(inscritos_ja_convocados)].head(vagas_cotas_nao_preenchidas).copy()
-            candidatos_ampla_adicional['TIPO_CONVOCACAO'] = 'Ampla Concorrência (Remanejada)'
-
-            print(f"- Candidatos adicionais da ampla selecionados para completar o total: {len(candidatos_ampla_adicional)}")
-
-            # Combinar todos os convocados
-            self.convocados_final = pd.concat([convocados_ampla_inicial, convocados_cotas, candidatos_ampla_adicional])
-            print("--- Lista dos 50 primeiros convocados (após a simulação para 1200 vagas): ---")
-            print(self.convocados_final.head(50)['INSCRIÇÃO'].tolist())
-            print("--- Fim da lista ---")
-        else:
-            # Lógica original quando há cotistas suficientes
-            convocados_cotas = cotistas_restantes.head(cotistas_adicionais_necessarios).copy()
-            convocados_cotas['TIPO_CONVOCACAO'] = 'Cotas'
-
-            # Combinar todos os convocados
-            self.convocados_final = pd.concat([convocados_ampla_inicial, convocados_cotas])
-            print("--- Lista dos 50 primeiros convocados (após a simulação para 1200 vagas): ---")
-            print(self.convocados_final.head(50)['INSCRIÇÃO'].tolist())
-            print("--- Fim da lista ---")
-
-        # NOVO: Log para verificar o total de convocados
-        print(f"Total de candidatos convocados na simulação: {len(self.convocados_final)}")
-
-        # Estatísticas sobre a convocação
-        total_convocados = len(self.convocados_final)
-        total_cotistas = len(self.convocados_final[self.convocados_final['cotista'] == True])
-        percentual_cotistas = (total_cotistas / total_convocados) * 100 if total_convocados > 0 else 0
-
-        print(f"Total de candidatos convocados: {total_convocados}")
-        print(f"Total de cotistas convocados: {total_cotistas} ({percentual_cotistas:.1f}%)")
-        print(f"- Pela ampla concorrência: {len(cotistas_na_ampla)}")
-        print(f"- Pelas vagas reservadas: {len(convocados_cotas)}")
+        with medir("busca"):
+            linha = indice.linha(num_inscricao)
+            tipo_vaga = simulacao.tipo_convocacao(linha) if linha is not None else None
 
         # Verificar se o candidato informado está na lista
         resultado = "NÃO foi convocado"
         candidato_info = None
 
-        # NOVO: Converter para string antes de comparar
-        if num_inscricao in self.convocados_final["INSCRIÇÃO"].astype(str).str.strip().values:
-            candidato = self.convocados_final[self.convocados_final["INSCRIÇÃO"].astype(str).str.strip() == num_inscricao].iloc[0]
-            tipo_vaga = candidato['TIPO_CONVOCACAO']
-
+        if tipo_vaga is not None:
             # Definir qual classificação mostrar com base no tipo de vaga
             if tipo_vaga.startswith('Ampla'):
-                posicao = candidato['CLAS. AMPLA']
+                posicao = indice.clas_ampla[linha]
                 classificacao_str = f"Classificação Ampla: {posicao}"
             else:
-                posicao = candidato['CLAS. COTAS']
-                classificacao_str = f"Classificação Cotas: {posicao}"
+                categoria = next(categoria for categoria in simulacao.politica.categorias if categoria.nome == tipo_vaga)
+                posicao = indice.reserva(categoria.coluna)['classificacao'][linha]
+                classificacao_str = f"Classificação {tipo_vaga}: {posicao}"
 
             # Verificar se é cotista convocado pela ampla
-            e_cotista = candidato['cotista']
+            e_cotista = bool(simulacao.cotistas[linha])
             info_adicional = " (Cotista aprovado pela Ampla)" if e_cotista and tipo_vaga.startswith('Ampla') else ""
+            nome = indice.nomes[linha]
 
-            resultado = f"CONVOCADO! Nome: {candidato['NOME']}, Tipo: {tipo_vaga}{info_adicional}, {classificacao_str}"
+            resultado = f"CONVOCADO! Nome: {nome}, Tipo: {tipo_vaga}{info_adicional}, {classificacao_str}"
 
             candidato_info = {
-                'nome': candidato['NOME'],
-                'inscricao': candidato['INSCRIÇÃO'],
+                'nome': nome,
+                'inscricao': indice.inscricoes[linha],
                 'tipo': tipo_vaga,
                 'classificacao': posicao,
-                'cotista': bool(candidato['cotista']) # CONVERTER PARA bool DO PYTHON
+                'cotista': e_cotista
             }
         else:
-            print(f"ATENÇÃO: A inscrição {num_inscricao} NÃO foi encontrada na lista final de convocados!")
-            # Verificar se há alguma inscrição similar na lista final
-            for inscr in self.convocados_final['INSCRIÇÃO'].values[:10]:  # Verificar as primeiras 10 inscrições
-                print(f"Comparando com inscrição convocada: '{inscr}'")
-            
+            logger.debug("nao_convocado inscricao=%s encontrada=%s total_vagas=%d", num_inscricao, linha is not None, simulacao.total_vagas)
             resultado = f"Candidato com inscrição {num_inscricao} não encontrado na lista de convocados para a simulação com o número de vagas informado."
 
         return resultado, candidato_info
 
-    def gerar_pdf(self, nome_arquivo="lista_convocados.pdf"):
-        """Gera um PDF formatado com a lista de convocados."""
-        if self.convocados_final is None or len(self.convocados_final) == 0:
-            print("Não há convocados para gerar o PDF.")
+    def simular_reclassificado(self, num_inscricao, total_vagas, alteracoes, desconsiderar_sub_judice=False, desistentes=None):
+        """
+        Simula a convocação depois de alterar notas (por exemplo, após recursos): as listas são
+        reclassificadas pelas notas (nota total; empates seguem a classificação publicada) e a
+        simulação roda sobre a nova ordem. Sem mudança de notas, o resultado é o de simular_convocacao.
+        alteracoes é uma lista de {'inscricao': ..., <coluna de COLUNAS_ALTERAVEIS>: nova nota}.
+        Retorna (mensagem, candidato_info, classificações antes/depois das inscrições alteradas).
+        """
+        versao_dados, indice = self._estado
+        indice = self._indice_para(desconsiderar_sub_judice, indice)
+
+        por_linha = {}
+        for alteracao in alteracoes:
+            inscricao = str(alteracao.get('inscricao', '')).strip()
+            linha = indice.linha(inscricao)
+            if linha is None:
+                raise ValueError(f"Inscrição {inscricao} não encontrada entre os candidatos não convocados.")
+            notas = {coluna: float(valor) for coluna, valor in alteracao.items() if coluna != 'inscricao'}
+            invalidas = [coluna for coluna in notas if coluna not in COLUNAS_ALTERAVEIS or coluna not in indice.colunas]
+            if invalidas:
+                raise ValueError(f"Notas que não podem ser alteradas: {', '.join(invalidas)}. Use {', '.join(COLUNAS_ALTERAVEIS)}.")
+            por_linha.setdefault(linha, {}).update(notas)
+
+        # Índices reclassificados reaproveitados para o mesmo conjunto de alterações
+        chave = (versao_dados, bool(desconsiderar_sub_judice),
+                 tuple(sorted((linha, tuple(sorted(notas.items()))) for linha, notas in por_linha.items())))
+        reclassificado = self.cache_reclassificacoes.obter(chave)
+        if reclassificado is None:
+            with medir("reclassificacao"):
+                reclassificado = self.cache_reclassificacoes.guardar(chave, indice.reclassificar(por_linha, self.politica))
+
+        total_vagas = max(int(total_vagas), 0)
+        simulacao = ResultadoSimulacao(versao_dados, bool(desconsiderar_sub_judice), reclassificado, politica=self.politica,
+                                       **reclassificado.alocar(total_vagas, self._linhas_desistentes(reclassificado, desistentes), self.politica))
+        resultado, candidato_info = self._descrever_convocacao(simulacao, num_inscricao)
+
+        def valores(origem, linha):
+            numeros = {coluna: float(origem.colunas[coluna][linha]) for coluna in ['NOTA TOTAL', 'CLAS. AMPLA', 'CLAS. COTAS']}
+            return {coluna: None if np.isnan(numero) else numero for coluna, numero in numeros.items()}
+
+        alteradas = [{'inscricao': indice.inscricoes[linha], 'nome': indice.nomes[linha],
+                      'antes': valores(indice, linha), 'depois': valores(reclassificado, linha)} for linha in por_linha]
+        return resultado, candidato_info, alteradas
+
+    def linha_do_tempo(self):
+        """
+        Linha do tempo das convocações para a versão atual dos dados, montada uma vez por versão.
+        Processos que anexaram os dados pela memória compartilhada leem o histórico do arquivo.
+        """
+        with self._lock_linha_do_tempo:
+            versao_dados, indice = self._estado
+            if self._linha_do_tempo is not None and self._linha_do_tempo[0] == versao_dados:
+                return self._linha_do_tempo[1]
+
+            with medir("carga"):
+                if self._historico is None:
+                    self._historico = self._ler_arquivo()[1]
+                historico = self._historico
+                convocados = len(historico["INSCRIÇÃO"])
+                colunas = {coluna: np.concatenate([np.asarray(historico[coluna]), np.asarray(valores)])
+                           for coluna, valores in indice.colunas.items() if coluna in historico}
+                completo = IndiceClassificacao(colunas)
+
+            datas, rodadas = agrupar_rodadas(historico.get("DATA CONVOCAÇÃO", [''] * convocados))
+            rodada_linha = np.concatenate([rodadas, np.full(indice.total, len(datas) + 1, dtype=np.int64)])
+            nomes_categorias = [categoria.nome for categoria in self.politica.categorias]
+            tipos = np.concatenate([codigos_nomeacao(historico.get("NOMEADO NA VAGA DE", [''] * convocados), nomes_categorias),
+                                    np.full(indice.total, -1, dtype=np.int64)])
+            linha_do_tempo = LinhaDoTempo(completo, rodada_linha, datas, tipos, self.politica)
+            self._linha_do_tempo = (versao_dados, linha_do_tempo)
+            logger.info("linha_do_tempo versao=%s convocados=%d rodadas=%d sem_data=%d",
+                        versao_dados, convocados, len(datas), len(linha_do_tempo.deltas[0]))
+            return linha_do_tempo
+
+    def resumo_linha_do_tempo(self):
+        """Rodadas de convocação observadas, com o que cada uma convocou, e os candidatos restantes."""
+        linha_do_tempo = self.linha_do_tempo()
+        return {
+            'rodadas': [linha_do_tempo.resumo(rodada) for rodada in range(1, linha_do_tempo.total_rodadas + 1)],
+            'convocados_sem_data': len(linha_do_tempo.deltas[0]),
+            'restantes': self.indice.total,
+        }
+
+    def simular_rodada(self, rodada, total_vagas=None, num_inscricao=None, desconsiderar_sub_judice=False):
+        """
+        Simula a convocação com os candidatos restantes depois da rodada informada ("como se
+        estivéssemos na rodada k"). Sem total_vagas, usa o tamanho da rodada seguinte observada
+        e compara os convocados simulados com os que ela de fato convocou.
+        """
+        linha_do_tempo = self.linha_do_tempo()
+        if not 0 <= rodada <= linha_do_tempo.total_rodadas:
+            raise ValueError(f"Rodada inválida: use de 0 a {linha_do_tempo.total_rodadas}.")
+        seguinte = linha_do_tempo.resumo(rodada + 1) if rodada < linha_do_tempo.total_rodadas else None
+        if total_vagas is None:
+            if seguinte is None:
+                raise ValueError("Informe o total de vagas: não há rodada observada depois da última.")
+            total_vagas = seguinte['convocados']
+
+        indice = self._indice_para(desconsiderar_sub_judice, linha_do_tempo.retrato(rodada))
+        simulacao = ResultadoSimulacao(self.versao_dados, bool(desconsiderar_sub_judice), indice, politica=self.politica,
+                                       **indice.alocar(total_vagas, None, self.politica))
+        resposta = {
+            'rodada': rodada,
+            'data': linha_do_tempo.datas[rodada - 1].isoformat() if rodada > 0 else None,
+            'restantes': indice.total,
+            'total_vagas': simulacao.total_vagas,
+            'convocados': {TIPO_AMPLA: len(simulacao.ampla), TIPO_REMANEJADA: len(simulacao.remanejada),
+                           **{categoria.nome: int(np.count_nonzero(simulacao.categoria_cotas == k))
+                              for k, categoria in enumerate(self.politica.categorias)}},
+            'rodada_seguinte': seguinte,
+        }
+        if seguinte is not None:
+            simuladas = set(indice.inscricoes[np.concatenate([simulacao.ampla, simulacao.cotas, simulacao.remanejada])])
+            observadas = set(linha_do_tempo.completo.inscricoes[linha_do_tempo.deltas[rodada + 1]])
+            resposta['coincidentes'] = len(simuladas & observadas)
+        if num_inscricao is not None:
+            resposta['resultado'], resposta['candidato'] = self._descrever_convocacao(simulacao, num_inscricao)
+        return resposta
+
+    def projetar_rodadas(self, quantidade, tamanho=None, a_partir_da_rodada=None, num_inscricao=None, desconsiderar_sub_judice=False):
+        """
+        Projeta as próximas rodadas a partir da rodada informada (por padrão, a última observada):
+        cada rodada tem o tamanho informado ou, sem ele, a mediana das rodadas observadas depois da
+        primeira (a convocação inicial), e divide as vagas mantendo a proporção acumulada de cada
+        tipo de vaga observada. Cada rodada convoca sobre os restantes da anterior: os convocados
+        nas rodadas projetadas são pulados como excluídos, sem filtrar o índice a cada rodada.
+        """
+        linha_do_tempo = self.linha_do_tempo()
+        rodada = linha_do_tempo.total_rodadas if a_partir_da_rodada is None else a_partir_da_rodada
+        if not 0 <= rodada <= linha_do_tempo.total_rodadas:
+            raise ValueError(f"Rodada inválida: use de 0 a {linha_do_tempo.total_rodadas}.")
+
+        tamanhos_observados = [len(linha_do_tempo.deltas[k]) for k in range(1, rodada + 1)]
+        if tamanho is None:
+            if not tamanhos_observados:
+                raise ValueError("Informe o tamanho das rodadas: não há rodadas observadas até a rodada informada.")
+            tamanho = int(np.median(tamanhos_observados[1:] or tamanhos_observados))
+        tamanho = max(int(tamanho), 0)
+
+        observadas = np.concatenate([linha_do_tempo.deltas[k] for k in range(1, rodada + 1)] or [np.empty(0, dtype=np.int64)])
+        tipos = linha_do_tempo.tipos[observadas]
+        por_categoria = [int(np.count_nonzero(tipos == k + 1)) for k in range(len(self.politica.categorias))]
+        proporcoes = [contagem / len(observadas) for contagem in por_categoria] if len(observadas) else [
+            categoria.percentual for categoria in self.politica.categorias]
+        divisoes = divisoes_projetadas([tamanho] * quantidade, proporcoes, len(observadas), por_categoria)
+
+        indice = self._indice_para(desconsiderar_sub_judice, linha_do_tempo.retrato(rodada))
+        linha_candidato = indice.linha(str(num_inscricao).strip()) if num_inscricao is not None else None
+        rodada_candidato = None
+        projetadas = []
+        excluidas = np.empty(0, dtype=np.int64)
+        for numero, (vagas_ampla, vagas_categorias) in enumerate(divisoes, start=rodada + 1):
+            simulacao = ResultadoSimulacao(self.versao_dados, bool(desconsiderar_sub_judice), indice, politica=self.politica,
+                                           **indice.alocar(tamanho, excluidas, self.politica, (vagas_ampla, vagas_categorias)))
+            convocadas = np.concatenate([simulacao.ampla, simulacao.cotas, simulacao.remanejada])
+            excluidas = np.concatenate([excluidas, convocadas])
+            ampla = np.concatenate([simulacao.ampla, simulacao.remanejada])
+            ultima = {TIPO_AMPLA: maior_classificacao(indice.clas_ampla[ampla])}
+            convocados = {TIPO_AMPLA: len(ampla)}
+            for k, categoria in enumerate(self.politica.categorias):
+                linhas = simulacao.cotas[simulacao.categoria_cotas == k]
+                convocados[categoria.nome] = len(linhas)
+                ultima[categoria.nome] = maior_classificacao(indice.reserva(categoria.coluna)['classificacao'][linhas])
+            projetadas.append({'rodada': numero, 'vagas': {TIPO_AMPLA: vagas_ampla, **dict(zip(
+                [categoria.nome for categoria in self.politica.categorias], vagas_categorias))},
+                'convocados': convocados, 'ultima_classificacao': ultima, 'restantes': indice.total - len(excluidas)})
+
+            if linha_candidato is not None and rodada_candidato is None and simulacao.tipo_convocacao(linha_candidato) is not None:
+                rodada_candidato = numero
+
+        resposta = {
+            'a_partir_da_rodada': rodada,
+            'tamanho': tamanho,
+            'tamanhos_observados': tamanhos_observados,
+            'proporcoes': dict(zip([categoria.nome for categoria in self.politica.categorias], proporcoes)),
+            'rodadas': projetadas,
+        }
+        if num_inscricao is not None:
+            if linha_candidato is None:
+                raise ValueError(f"Inscrição {num_inscricao} não encontrada entre os candidatos restantes da rodada {rodada}.")
+            resposta['rodada_candidato'] = rodada_candidato
+        return resposta
+
+    @property
+    def rotulo_reservas(self):
+        """Tipo de convocação exibido para quem é convocado por uma lista de reserva nas simulações em lote."""
+        nomes = [categoria.nome for categoria in self.politica.categorias]
+        return nomes[0] if len(nomes) == 1 else f"Reserva ({', '.join(nomes)})"
+
+    def simular_lote(self, inscricoes, lista_vagas, desconsiderar_sub_judice=False):
+        """
+        Simula vários números de inscrição em vários cenários de vagas de uma só vez.
+        Retorna matrizes (inscrições x vagas) com situação, tipo de vaga e classificação,
+        calculadas de forma vetorizada sobre os cortes do índice.
+        """
+        if self.indice is None:
+            logger.error("dados_nao_carregados")
+            return None
+
+        indice = self._indice_para(desconsiderar_sub_judice)
+        inscricoes = [str(inscricao).strip() for inscricao in inscricoes]
+        lista_vagas = [max(int(vagas), 0) for vagas in lista_vagas]
+
+        linhas = indice.linhas(inscricoes)
+        encontrada = linhas >= 0
+        codigos = indice.situacao_lote(np.where(encontrada, linhas, 0), lista_vagas, self.politica)
+        codigos[~encontrada, :] = 0
+
+        # Classificação exibida: a da lista de reserva para convocados pelas reservas (com várias
+        # listas, a da primeira em que o candidato está), ampla para os demais
+        linhas_validas = np.where(encontrada, linhas, 0)
+        clas_reserva = np.full(len(linhas_validas), np.nan)
+        for categoria in reversed(self.politica.categorias):
+            reserva = indice.reserva(categoria.coluna)
+            clas_reserva = np.where(reserva['membro'][linhas_validas], reserva['classificacao'][linhas_validas], clas_reserva)
+        classificacao = np.where(codigos == 2, clas_reserva[:, None], indice.clas_ampla[linhas_validas][:, None])
+        classificacao[codigos == 0] = np.nan
+
+        return {
+            'inscricoes': inscricoes,
+            'total_vagas': lista_vagas,
+            'encontrada': encontrada,
+            'codigo_tipo': codigos,
+            'convocado': codigos > 0,
+            'classificacao': classificacao,
+        }
+
+    def dividir_pools(self, partes):
+        """
+        Divide os processos dos pools entre partes processos do servidor (os workers do gunicorn, em
+        post_fork), para que os limites configurados valham para o servidor inteiro.
+        """
+        partes = max(partes, 1)
+        self.fila_pdfs.processos = max(self.fila_pdfs.processos // partes, 1)
+        self.processos_monte_carlo = max(self.processos_monte_carlo // partes, 1)
+
+    def _pool_probabilidade(self, descartar=None):
+        """Pool da estimativa de probabilidade, criado no primeiro uso; descartar (um pool quebrado) força a recriação."""
+        with self._lock_pool_monte_carlo:
+            if descartar is not None and self._pool_monte_carlo is descartar:
+                self._pool_monte_carlo = None
+            if self._pool_monte_carlo is None:
+                self._pool_monte_carlo = criar_pool_processos(self.processos_monte_carlo)
+            return self._pool_monte_carlo
+
+    def probabilidade_convocacao(self, num_inscricao, total_vagas, taxa_desistencia, cenarios=CENARIOS_PADRAO,
+                                 semente=None, desconsiderar_sub_judice=False):
+        """
+        Estima, por Monte Carlo, a probabilidade de convocação da inscrição quando cada um dos
+        demais candidatos desiste com probabilidade taxa_desistencia, com as mesmas regras de
+        simular_convocacao. Retorna None se a inscrição não for encontrada.
+        """
+        indice = self._indice_para(desconsiderar_sub_judice)
+        linha = indice.linha(str(num_inscricao).strip())
+        if linha is None:
+            return None
+
+        perfil = perfil_convocacao(indice, linha, total_vagas, self.politica)
+        executor = None
+        if cenarios * len(perfil['cotista_a_frente']) >= CELULAS_MINIMAS_POOL_MONTE_CARLO:
+            executor = self._pool_probabilidade()
+        with medir("monte_carlo"):
+            try:
+                contagens, semente = estimar_convocacao(perfil, taxa_desistencia, cenarios, semente, executor)
+            except BrokenProcessPool:
+                # Um processo do pool morreu (por exemplo, por falta de memória): recria o pool e repete
+                executor = self._pool_probabilidade(descartar=executor)
+                contagens, semente = estimar_convocacao(perfil, taxa_desistencia, cenarios, semente, executor)
+
+        convocados = int(contagens[1:].sum())
+        probabilidade = convocados / cenarios
+        return {
+            'inscricao': indice.inscricoes[linha],
+            'nome': indice.nomes[linha],
+            'total_vagas': max(int(total_vagas), 0),
+            'taxa_desistencia': taxa_desistencia,
+            'cenarios': cenarios,
+            'semente': semente,
+            'probabilidade': probabilidade,
+            'erro_padrao': (probabilidade * (1 - probabilidade) / cenarios) ** 0.5,
+            'distribuicao': {
+                'Não convocado': int(contagens[0]) / cenarios,
+                TIPO_AMPLA: int(contagens[1]) / cenarios,
+                self.rotulo_reservas: int(contagens[2]) / cenarios,
+                TIPO_REMANEJADA: int(contagens[3]) / cenarios,
+            },
+        }
+
+    def vagas_minimas(self, num_inscricao, desconsiderar_sub_judice=False):
+        """
+        Retorna o menor número de vagas para o qual o candidato é convocado,
+        consultando a tabela de limiares do índice (calculada uma vez por conjunto de dados).
+        """
+        if self.indice is None:
+            logger.error("dados_nao_carregados")
+            return None
+
+        indice = self._indice_para(desconsiderar_sub_judice)
+        num_inscricao = str(num_inscricao).strip()
+        linha = indice.linha(num_inscricao)
+        if linha is None:
+            return None
+
+        vagas, tipo_vaga = indice.vagas_minimas(linha, self.politica)
+        # Classificação na lista em que o candidato concorre (não necessariamente a de cotas)
+        reserva, classificacao_reserva = indice.lista_reserva(linha, self.politica)
+        return {
+            'nome': indice.nomes[linha],
+            'inscricao': num_inscricao,
+            'vagas_minimas': vagas,
+            'tipo': tipo_vaga,
+            'classificacao_ampla': None if np.isnan(indice.clas_ampla[linha]) else int(indice.clas_ampla[linha]),
+            'classificacao_cotas': classificacao_reserva,
+            'reserva': reserva,
+            'cotista': reserva is not None
+        }
+
+    def pdf_simulacao(self, simulacao):
+        """
+        Retorna os bytes do PDF da simulação, reaproveitando o cache limitado por tamanho
+        e chaveado pelo cenário da simulação.
+        """
+        chave = simulacao.chave
+        conteudo = self.cache_pdfs.obter(chave)
+        if conteudo is not None:
+            acessos_cache.incrementar(cache="pdfs", resultado="acerto")
+            return conteudo
+        acessos_cache.incrementar(cache="pdfs", resultado="falha")
+        with medir("pdf"):
+            conteudo = self._renderizar_pdf(simulacao)
+        return self.cache_pdfs.guardar(chave, conteudo)
+
+    def exportar_pdf(self, simulacao):
+        """
+        Agenda a geração do PDF da simulação em segundo plano e retorna o id da tarefa.
+        O PDF já presente no cache é entregue sem nova renderização.
+        """
+        chave = simulacao.chave
+        descricao = {
+            'versao_dados': simulacao.versao_dados,
+            'total_vagas': simulacao.total_vagas,
+            'desconsiderar_sub_judice': simulacao.desconsiderar_sub_judice,
+            'desistentes': len(simulacao.excluidas),
+        }
+        return self.fila_pdfs.submeter(
+            chave,
+            descricao,
+            lambda: self.dados_pdf(simulacao),
+            conteudo=self.cache_pdfs.obter(chave),
+            ao_concluir=lambda conteudo: self.cache_pdfs.guardar(chave, conteudo),
+        )
+
+    def gerar_pdf(self, simulacao, nome_arquivo="lista_convocados.pdf"):
+        """Gera um PDF formatado com a lista de convocados da simulação informada e o grava em disco."""
+        if simulacao is None or simulacao.total_convocados == 0:
+            logger.warning("pdf_sem_convocados")
             return False
 
         # Criar diretório para relatórios se não existir
@@ -230,175 +2000,249 @@ class SistemaConvocacao:
         if diretorio and not os.path.exists(diretorio):
             os.makedirs(diretorio)
 
-        # Configurar o documento
-        doc = SimpleDocTemplate(
-            nome_arquivo,
-            pagesize=landscape(A4),
-            rightMargin=1.5*cm,    # Reduzindo as margens para aproveitar melhor o espaço A4
-            leftMargin=1.5*cm,
-            topMargin=1.5*cm,
-            bottomMargin=1.5*cm
-        )
-
-        # Estilos para o documento
-        styles = getSampleStyleSheet()
-        titulo_style = ParagraphStyle(
-            'TituloStyle',
-            parent=styles['Heading1'],
-            fontName='Arial' if 'Arial' in pdfmetrics.getRegisteredFontNames() else 'Helvetica',
-            fontSize=16,
-            alignment=1,  # Centralizado
-            spaceAfter=10
-        )
-
-        subtitulo_style = ParagraphStyle(
-            'SubtituloStyle',
-            parent=styles['Heading2'],
-            fontName='Arial' if 'Arial' in pdfmetrics.getRegisteredFontNames() else 'Helvetica',
-            fontSize=12,
-            alignment=1,
-            spaceAfter=5
-        )
-
-        normal_style = ParagraphStyle(
-            'NormalStyle',
-            parent=styles['Normal'],
-            fontName='Arial' if 'Arial' in pdfmetrics.getRegisteredFontNames() else 'Helvetica',
-            fontSize=12,
-            alignment=0  # Esquerda
-        )
-
-        # Elementos do documento
-        elementos = []
-
-        # Título do documento
-        titulo = Paragraph("POLÍCIA MILITAR DO DISTRITO FEDERAL", titulo_style)
-        elementos.append(titulo)
-        elementos.append(Spacer(1, 5*mm))
-
-        subtitulo = Paragraph("Lista de Convocados para o Curso de Formação", subtitulo_style)
-        elementos.append(subtitulo)
-        elementos.append(Spacer(1, 3*mm))
-
-        data_geracao = Paragraph(f"Gerado em: {self.data_geracao}", normal_style)
-        elementos.append(data_geracao)
-        elementos.append(Spacer(1, 10*mm))
-
-        # Estatísticas sobre as vagas
-        total_vagas = len(self.convocados_final)
-        convocados_ampla_regular = self.convocados_final[self.convocados_final['TIPO_CONVOCACAO'] == 'Ampla Concorrência']
-        convocados_ampla_remanejada = self.convocados_final[self.convocados_final['TIPO_CONVOCACAO'] == 'Ampla Concorrência (Remanejada)']
-        convocados_cotas = self.convocados_final[self.convocados_final['TIPO_CONVOCACAO'] == 'Cotas']
-
-        cotistas_na_ampla = convocados_ampla_regular[convocados_ampla_regular['cotista'] == True]
-
-        # Criar resumo estatístico
-        elementos.append(Paragraph("Resumo da simulação:", subtitulo_style))
-        elementos.append(Spacer(1, 3*mm))
-
-        elementos.append(Paragraph(f"• Total de convocados: {total_vagas} candidatos", normal_style))
-        elementos.append(Paragraph(f"• Convocados pela ampla concorrência: {len(convocados_ampla_regular) + len(convocados_ampla_remanejada)}", normal_style))
-        elementos.append(Paragraph(f"  - Sendo {len(cotistas_na_ampla)} cotistas aprovados pela ampla", normal_style))
-        if len(convocados_ampla_remanejada) > 0:
-            elementos.append(Paragraph(f"  - Sendo {len(convocados_ampla_remanejada)} por remanejamento de vagas de cotas não preenchidas", normal_style))
-        elementos.append(Paragraph(f"• Convocados pelas cotas: {len(convocados_cotas)}", normal_style))
-        elementos.append(Paragraph(f"• Total de cotistas convocados: {len(cotistas_na_ampla) + len(convocados_cotas)}", normal_style))
-
-        elementos.append(Spacer(1, 10*mm))
-
-        # Definir cores personalizadas para a tabela
-        cor_ampla = colors.Color(0.85, 0.95, 0.85)   # Verde claro
-        cor_cotas = colors.Color(0.95, 0.9, 0.8)     # Marrom claro (pardo)
-        cor_remanejada = colors.Color(0.9, 0.9, 1.0)  # Azul bem claro para vagas remanejadas
-        cor_cabecalho = colors.Color(0.2, 0.2, 0.7)  # Azul escuro para o cabeçalho
-
-        # Preparação dos dados para a tabela
-        colunas = ['Nº', 'Inscrição', 'Nome do Candidato', 'Tipo de Vaga', 'Class. Ampla', 'Class. Cotas', 'Observação']
-
-        # Ajustar o tamanho das colunas para melhor utilização do espaço A4
-        larguras_colunas = [1.0*cm, 2.5*cm, 10*cm, 4*cm, 2*cm, 2*cm, 6*cm]
-
-        # Adicionar os dados dos convocados
-        dados_tabela = [colunas]
-
-        # Em vez de usar itertuples, vamos trabalhar com valores diretamente
-        for i, (_, candidato) in enumerate(self.convocados_final.iterrows(), 1):
-            # Definir a observação para cotistas na ampla ou para vagas remanejadas
-            observacao = ""
-            if candidato['cotista'] and candidato['TIPO_CONVOCACAO'] == 'Ampla Concorrência':
-                observacao = "Cotista aprovado pela ampla"
-            elif candidato['TIPO_CONVOCACAO'] == 'Ampla Concorrência (Remanejada)':
-                observacao = "Vaga remanejada de cotas"
-
-            # Formatação das classificações - acessando colunas pelo nome, que é mais seguro
-            class_ampla = int(candidato['CLAS. AMPLA']) if not pd.isna(candidato['CLAS. AMPLA']) else "-"
-            class_cotas = int(candidato['CLAS. COTAS']) if not pd.isna(candidato['CLAS. COTAS']) else "-"
-
-            # Simplificar o tipo de vaga para exibição
-            tipo_vaga_exibicao = "Ampla Concorrência" if candidato['TIPO_CONVOCACAO'].startswith('Ampla') else candidato['TIPO_CONVOCACAO']
-
-            dados_tabela.append([
-                i,
-                candidato['INSCRIÇÃO'],
-                candidato['NOME'],
-                tipo_vaga_exibicao,
-                class_ampla,
-                class_cotas,
-                observacao
-            ])
-
-        # Criar a tabela com larguras específicas para cada coluna
-        tabela = Table(dados_tabela, colWidths=larguras_colunas)
-
-        # Estilos da tabela
-        tabela.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), cor_cabecalho),  # Cabeçalho azul
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Arial-Bold' if 'Arial-Bold' in pdfmetrics.getRegisteredFontNames() else 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), cor_ampla),  # Cor padrão para ampla
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-
-        # Aplicar cores específicas para cotas e vagas remanejadas
-        for i, linha in enumerate(dados_tabela[1:], 1):
-            if linha[3] == 'Cotas':
-                tabela.setStyle(TableStyle([('BACKGROUND', (0, i), (-1, i), cor_cotas)]))
-            elif linha[3] == 'Ampla Concorrência (Remanejada)':
-                tabela.setStyle(TableStyle([('BACKGROUND', (0, i), (-1, i), cor_remanejada)]))
-
-        elementos.append(tabela)
-
         try:
-            doc.build(elementos)
-            print(f"PDF gerado com sucesso: {nome_arquivo}")
+            conteudo = self.pdf_simulacao(simulacao)
+            with open(nome_arquivo, 'wb') as f:
+                f.write(conteudo)
+            logger.info("pdf_gravado arquivo=%s", nome_arquivo)
             return True
         except Exception as e:
-            print(f"Erro ao gerar o PDF: {e}")
+            logger.exception("erro_pdf arquivo=%s erro=%s", nome_arquivo, e)
             return False
 
-    def salvar_convocados_csv(self, nome_arquivo="convocados.csv"):
-        """Salva a lista de convocados em um arquivo CSV."""
-        if self.convocados_final is None or len(self.convocados_final) == 0:
-            print("Não há convocados para salvar em CSV.")
+    def dados_pdf(self, simulacao):
+        """
+        Reúne o que o PDF da simulação precisa (contagens e as colunas dos convocados, na ordem
+        de convocação), em arrays pequenos que podem ser enviados a outro processo.
+        """
+        indice = simulacao.indice
+        convocados_ampla, convocados_cotas, convocados_remanejada = len(simulacao.ampla), len(simulacao.cotas), len(simulacao.remanejada)
+        linhas = np.concatenate([simulacao.ampla, simulacao.cotas, simulacao.remanejada])
+        cotistas = simulacao.cotistas[linhas]
+
+        # No PDF, as vagas remanejadas aparecem como ampla, com uma observação
+        tipos = np.concatenate([
+            np.repeat(TIPO_AMPLA, convocados_ampla).astype(object),
+            simulacao.tipos_cotas,
+            np.repeat(TIPO_AMPLA, convocados_remanejada).astype(object),
+        ])
+        observacoes = np.repeat(["", "", "Vaga remanejada de cotas"], [convocados_ampla, convocados_cotas, convocados_remanejada]).astype(object)
+        observacoes[:convocados_ampla][cotistas[:convocados_ampla]] = "Cotista aprovado pela ampla"
+
+        # Classificação na lista de reserva: a de cotas e, para as demais listas, a da própria lista
+        clas_cotas = np.array(indice.clas_cotas[linhas])
+        for k, categoria in enumerate(simulacao.politica.categorias):
+            if categoria.coluna != "CLAS. COTAS":
+                na_categoria = np.flatnonzero(simulacao.categoria_cotas == k)
+                clas_cotas[convocados_ampla + na_categoria] = indice.reserva(categoria.coluna)['classificacao'][simulacao.cotas[na_categoria]]
+
+        return {
+            'data_geracao': self.data_geracao,
+            'convocados_ampla': convocados_ampla,
+            'convocados_cotas': convocados_cotas,
+            'convocados_remanejada': convocados_remanejada,
+            'cotistas_na_ampla': simulacao.cotistas_na_ampla,
+            'inscricoes': np.asarray(indice.inscricoes[linhas]),
+            'nomes': np.asarray(indice.nomes[linhas]),
+            'tipos': tipos,
+            'clas_ampla': np.asarray(indice.clas_ampla[linhas]),
+            'clas_cotas': clas_cotas,
+            'observacoes': observacoes,
+        }
+
+    def _renderizar_pdf(self, simulacao):
+        """Renderiza em memória o PDF com a lista de convocados da simulação."""
+        return renderizar_lista_convocados(self.dados_pdf(simulacao))
+
+    def pagina_convocados(self, simulacao, inicio=0, fim=None):
+        """
+        Convocados da simulação nas posições [inicio, fim) da ordem de convocação (ampla, reservas
+        e remanejadas), só com as colunas exibidas. Só as linhas da página são montadas.
+        """
+        convocados_ampla, convocados_cotas = len(simulacao.ampla), len(simulacao.cotas)
+        fim = simulacao.total_convocados if fim is None else min(fim, simulacao.total_convocados)
+        inicio = min(inicio, fim)
+        posicoes = np.arange(inicio, fim)
+        em_ampla = posicoes < convocados_ampla
+        em_cotas = ~em_ampla & (posicoes < convocados_ampla + convocados_cotas)
+        em_remanejada = ~em_ampla & ~em_cotas
+
+        linhas = np.empty(len(posicoes), dtype=np.int64)
+        linhas[em_ampla] = simulacao.ampla[posicoes[em_ampla]]
+        posicoes_cotas = posicoes[em_cotas] - convocados_ampla
+        linhas[em_cotas] = simulacao.cotas[posicoes_cotas]
+        linhas[em_remanejada] = simulacao.remanejada[posicoes[em_remanejada] - convocados_ampla - convocados_cotas]
+
+        tipos = np.where(em_ampla, TIPO_AMPLA, TIPO_REMANEJADA).astype(object)
+        tipos[em_cotas] = simulacao.tipos_cotas[posicoes_cotas]
+
+        # Classificação na lista de reserva: a de cotas e, para quem foi convocado por outra lista, a dela
+        indice = simulacao.indice
+        clas_reserva = np.array(indice.clas_cotas[linhas])
+        categorias = simulacao.categoria_cotas[posicoes_cotas]
+        for k, categoria in enumerate(simulacao.politica.categorias):
+            if categoria.coluna != "CLAS. COTAS":
+                na_categoria = np.flatnonzero(em_cotas)[categorias == k]
+                clas_reserva[na_categoria] = indice.reserva(categoria.coluna)['classificacao'][linhas[na_categoria]]
+
+        return {
+            'ordem': posicoes + 1,
+            'inscricoes': np.asarray(indice.inscricoes[linhas]),
+            'nomes': np.array([str(nome).strip() for nome in indice.nomes[linhas]], dtype=object),
+            'tipos': tipos,
+            'clas_ampla': np.asarray(indice.clas_ampla[linhas]),
+            'clas_reserva': clas_reserva,
+            'cotistas': simulacao.cotistas[linhas],
+        }
+
+    def blocos_csv_convocados(self, simulacao, linhas_por_bloco=LINHAS_POR_BLOCO_CSV):
+        """
+        Gera o CSV de convocados da simulação em blocos de bytes (UTF-8), montando uma página
+        de linhas por vez, sem materializar o arquivo inteiro.
+        """
+        def formatar(valores):
+            saida = io.StringIO()
+            csv.writer(saida, lineterminator='\n').writerows(valores)
+            return saida.getvalue().encode('utf-8')
+
+        def classificacao(valores):
+            return ['' if np.isnan(valor) else f"{valor:g}" for valor in valores]
+
+        yield formatar([COLUNAS_CSV_CONVOCADOS])
+        for inicio in range(0, simulacao.total_convocados, linhas_por_bloco):
+            pagina = self.pagina_convocados(simulacao, inicio, inicio + linhas_por_bloco)
+            yield formatar(zip(pagina['ordem'].tolist(), pagina['inscricoes'], pagina['nomes'], pagina['tipos'],
+                               classificacao(pagina['clas_ampla']), classificacao(pagina['clas_reserva']),
+                               np.where(pagina['cotistas'], 'SIM', 'NÃO')))
+
+    def salvar_convocados_csv(self, simulacao, nome_arquivo="convocados.csv"):
+        """Salva a lista de convocados da simulação informada em um arquivo CSV, bloco a bloco."""
+        if simulacao is None or simulacao.total_convocados == 0:
+            logger.warning("csv_sem_convocados")
             return False
 
         try:
-            self.convocados_final.to_csv(nome_arquivo, index=False, encoding='utf-8')
-            print(f"Lista de convocados salva em: {nome_arquivo}")
+            with open(nome_arquivo, 'wb') as f:
+                for bloco in self.blocos_csv_convocados(simulacao):
+                    f.write(bloco)
+            logger.info("csv_gravado arquivo=%s", nome_arquivo)
             return True
         except Exception as e:
-            print(f"Erro ao salvar em CSV: {e}")
+            logger.exception("erro_csv arquivo=%s erro=%s", nome_arquivo, e)
             return False
 
-# Instanciar o sistema de convocação com o arquivo JSON
-sistema = SistemaConvocacao("dados_candidatos.json")
-
-# Carregar os dados
-if not sistema.carregar_dados():
-    print("Erro ao carregar os dados do JSON. O programa será encerrado.")
-    exit()
+def politica_configurada():
+    """Política de vagas do arquivo JSON indicado em POLITICA_VAGAS ou, sem ele, a regra padrão."""
+    caminho = os.environ.get(VARIAVEL_POLITICA_VAGAS)
+    return ler_politica(caminho) if caminho else POLITICA_PADRAO
+
+def caminho_dados_padrao():
+    """Usa o diretório colunar quando ele existe e não é mais antigo que o JSON; caso contrário, o JSON."""
+    esquema = os.path.join(ARQUIVO_DADOS_COLUNAR, ARQUIVO_ESQUEMA)
+    if os.path.exists(esquema) and (not os.path.exists(ARQUIVO_DADOS_JSON) or os.path.getmtime(esquema) >= os.path.getmtime(ARQUIVO_DADOS_JSON)):
+        return ARQUIVO_DADOS_COLUNAR
+    return ARQUIVO_DADOS_JSON
+
+# Sistema de convocação do processo, criado no primeiro uso por obter_sistema
+_sistema = None
+_lock_sistema = threading.Lock()
+
+def obter_sistema(caminho=None):
+    """
+    Sistema de convocação do processo, criado e carregado no primeiro uso com o arquivo informado
+    (por padrão, caminho_dados_padrao ou os dados publicados em memória compartilhada pelo processo
+    mestre). Importar o módulo não carrega os dados: scripts que só usam as classes e os processos
+    dos pools, que reimportam o módulo principal, não leem o arquivo.
+    """
+    global _sistema
+    if _sistema is None:
+        with _lock_sistema:
+            if _sistema is None:
+                sistema = SistemaConvocacao(caminho or caminho_dados_padrao())
+                manifesto_compartilhado = None if caminho else os.environ.get(VARIAVEL_DADOS_COMPARTILHADOS)
+                if manifesto_compartilhado:
+                    dados_carregados = sistema.carregar_compartilhado(json.loads(manifesto_compartilhado))
+                else:
+                    dados_carregados = sistema.carregar_dados()
+                if not dados_carregados:
+                    raise RuntimeError("Erro ao carregar os dados dos candidatos.")
+                _sistema = sistema
+    return _sistema
+
+def parametro_booleano(nome, padrao=False):
+    """Lê um parâmetro booleano da query string (true/1/sim/on)."""
+    valor = request.args.get(nome)
+    if valor is None:
+        return padrao
+    return valor.strip().lower() in ('1', 'true', 'sim', 'on')
+
+def lista_desistentes(valor):
+    """Inscrições tratadas como desistentes: lista JSON ou texto separado por vírgulas."""
+    if not valor:
+        return []
+    if isinstance(valor, str):
+        valor = valor.split(',')
+    return [str(inscricao).strip() for inscricao in valor if str(inscricao).strip()]
+
+def cursor_pagina(versao_dados, posicao):
+    """Cursor opaco da próxima página: a versão dos dados e a posição na ordem de convocação."""
+    return base64.urlsafe_b64encode(f"{versao_dados}:{posicao}".encode()).decode().rstrip('=')
+
+def ler_cursor_pagina(cursor):
+    """Lê um cursor de cursor_pagina; retorna (versão dos dados, posição)."""
+    try:
+        versao_dados, posicao = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split(':')
+        return versao_dados, max(int(posicao), 0)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Página inválida.")
+
+def aceita_gzip():
+    return request.accept_encodings['gzip'] > 0
+
+def comprimir_gzip(blocos):
+    """Comprime blocos de bytes em um único fluxo gzip, liberando a saída a cada bloco."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for bloco in blocos:
+        yield compressor.compress(bloco) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def resposta_cacheavel(conteudo, mimetype, identificacao, headers=None):
+    """
+    Resposta com ETag derivada de identificacao (versão dos dados e cenário), comprimida com gzip
+    quando o cliente aceita. Repetições com If-None-Match recebem 304 sem montar o conteúdo;
+    conteudo é uma função que retorna bytes ou um gerador de blocos de bytes (streaming).
+    """
+    gzip = aceita_gzip()
+    etag = hashlib.sha1(repr(identificacao).encode()).hexdigest()[:24] + ('-gzip' if gzip else '')
+    cabecalhos = {'Cache-Control': f'public, max-age={VALIDADE_CACHE_CONVOCADOS}', 'Vary': 'Accept-Encoding'}
+    if request.if_none_match.contains(etag):
+        resposta = app.response_class(status=304, headers=cabecalhos)
+    else:
+        corpo = conteudo()
+        if gzip:
+            corpo = b''.join(comprimir_gzip([corpo])) if isinstance(corpo, bytes) else comprimir_gzip(corpo)
+            cabecalhos['Content-Encoding'] = 'gzip'
+        resposta = app.response_class(corpo, mimetype=mimetype, headers={**cabecalhos, **(headers or {})})
+    resposta.set_etag(etag)
+    return resposta
+
+@app.before_request
+def iniciar_cronometro():
+    g.inicio_requisicao = time.perf_counter()
+
+@app.after_request
+def registrar_requisicao(resposta):
+    # A regra da rota (e não a URL) evita uma série de métricas por inscrição
+    endpoint = request.url_rule.rule if request.url_rule else "nao_encontrado"
+    requisicoes.incrementar(endpoint=endpoint, metodo=request.method, status=resposta.status_code)
+    inicio = g.get("inicio_requisicao")
+    if inicio is not None:
+        duracao_requisicao.observar(time.perf_counter() - inicio, endpoint=endpoint)
+    return resposta
+
+@app.route('/metrics', methods=['GET'])
+def metricas():
+    return app.response_class(registro_metricas.exportar(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def index():
@@ -406,25 +2250,18 @@ def index():
 
 @app.route('/simular', methods=['POST'])
 def simular():
-    print("Requisição POST para /simular recebida!")
     try:
         data = request.get_json()
         inscricao = data['inscricao']
         total_vagas = int(data['total_vagas'])
         desconsiderar_sub_judice = data.get('desconsiderar_sub_judice', False) # Recebe o parâmetro, com valor padrão False se não vier
-        print(f"Inscrição recebida: {inscricao}, Total de Vagas: {total_vagas}, Desconsiderar Sub Judice: {desconsiderar_sub_judice}")
-
-        # NOVO: Adicionar logs para verificar o tipo de dados
-        print(f"Tipo de inscricao: {type(inscricao)}")
-        print(f"Tipo de total_vagas: {type(total_vagas)}")
-        print(f"Tipo de desconsiderar_sub_judice: {type(desconsiderar_sub_judice)}") # ADICIONEI O LOG FALTANTE
+        desistentes = lista_desistentes(data.get('desistentes'))
+        logger.debug("requisicao_simular inscricao=%s total_vagas=%d sub_judice=%s desistentes=%d", inscricao, total_vagas, desconsiderar_sub_judice, len(desistentes))
 
-        resultado, candidato_info = sistema.simular_convocacao(inscricao, total_vagas, desconsiderar_sub_judice)
-        print(f"Resultado da simulação: {resultado}")
-        print(f"Candidato Info: {candidato_info}")
+        resultado, candidato_info = obter_sistema().simular_convocacao(inscricao, total_vagas, desconsiderar_sub_judice, desistentes)
         return jsonify({'resultado': resultado, 'candidato': candidato_info})
     except Exception as e:
-        print(f"Ocorreu um erro na função simular: {e}")
+        logger.exception("erro_simular erro=%s", e)
         return jsonify({'erro': str(e)})
 
 @app.route('/gerar_pdf/<inscricao>', methods=['GET'])
@@ -432,33 +2269,301 @@ def gerar_pdf(inscricao):
     try:
         # Obter o total de vagas do parâmetro de consulta
         total_vagas = int(request.args.get('total_vagas', 0))
-        print(f"Requisição GET para /gerar_pdf/{inscricao}?total_vagas={total_vagas}")
-        
-        # Verificar se já existe uma simulação ou realizar nova simulação
-        if sistema.convocados_final is None or len(sistema.convocados_final) == 0:
-            resultado, _ = sistema.simular_convocacao(inscricao, total_vagas)
-            print(f"Nova simulação realizada para geração do PDF: {resultado}")
-        
-        # Gerar um PDF baseado na simulação atual
-        nome_arquivo = f"pdfs/simulacao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        
-        if sistema.gerar_pdf(nome_arquivo):
-            return send_file(nome_arquivo, as_attachment=True, download_name=f"convocados_{total_vagas}_vagas.pdf")
-        else:
+        desconsiderar_sub_judice = parametro_booleano('desconsiderar_sub_judice')
+        desistentes = lista_desistentes(request.args.get('desistentes'))
+        logger.debug("requisicao_gerar_pdf inscricao=%s total_vagas=%d sub_judice=%s desistentes=%d", inscricao, total_vagas, desconsiderar_sub_judice, len(desistentes))
+
+        # Simulação correspondente aos parâmetros desta requisição (reaproveitada do cache)
+        simulacao = obter_sistema().resultado_simulacao(total_vagas, desconsiderar_sub_judice, desistentes)
+
+        if simulacao.total_convocados == 0:
             return jsonify({'erro': 'Não foi possível gerar o PDF. Verifique se uma simulação foi realizada.'})
+
+        # PDF renderizado em memória e reaproveitado do cache para o mesmo cenário
+        conteudo = obter_sistema().pdf_simulacao(simulacao)
+        return send_file(BytesIO(conteudo), mimetype='application/pdf', as_attachment=True, download_name=f"convocados_{total_vagas}_vagas.pdf")
     except Exception as e:
-        print(f"Erro ao gerar PDF: {e}")
+        logger.exception("erro_gerar_pdf erro=%s", e)
         return jsonify({'erro': str(e)})
 
+def resposta_tarefa_pdf(estado):
+    resposta = {campo: valor for campo, valor in estado.items() if campo != 'pid'}
+    resposta['url_estado'] = f"/pdf/tarefas/{estado['id']}"
+    if estado['estado'] == 'concluida':
+        resposta['url_download'] = f"/pdf/tarefas/{estado['id']}/download"
+    return resposta
+
+@app.route('/pdf/tarefas', methods=['POST'])
+def criar_tarefa_pdf():
+    try:
+        dados = request.get_json(silent=True) or request.form
+        total_vagas = int(dados.get('total_vagas', 0))
+        desconsiderar_sub_judice = str(dados.get('desconsiderar_sub_judice', '')).strip().lower() in ('1', 'true', 'sim', 'on')
+        desistentes = lista_desistentes(dados.get('desistentes'))
+
+        simulacao = obter_sistema().resultado_simulacao(total_vagas, desconsiderar_sub_judice, desistentes)
+        if simulacao.total_convocados == 0:
+            return jsonify({'erro': 'Não foi possível gerar o PDF. Verifique se uma simulação foi realizada.'}), 400
+
+        id_tarefa = obter_sistema().exportar_pdf(simulacao)
+        # O estado pode estar sendo regravado por outro processo neste instante: a tarefa existe e está pendente
+        estado = obter_sistema().fila_pdfs.estado(id_tarefa) or {'id': id_tarefa, 'estado': 'pendente'}
+        return jsonify(resposta_tarefa_pdf(estado)), 202
+    except Exception as e:
+        logger.exception("erro_criar_tarefa_pdf erro=%s", e)
+        return jsonify({'erro': str(e)}), 500
+
+@app.route('/pdf/tarefas/<id_tarefa>', methods=['GET'])
+def estado_tarefa_pdf(id_tarefa):
+    estado = obter_sistema().fila_pdfs.estado(id_tarefa)
+    if estado is None:
+        return jsonify({'erro': 'Tarefa não encontrada ou expirada.'}), 404
+    return jsonify(resposta_tarefa_pdf(estado))
+
+@app.route('/pdf/tarefas/<id_tarefa>/download', methods=['GET'])
+def baixar_tarefa_pdf(id_tarefa):
+    estado = obter_sistema().fila_pdfs.estado(id_tarefa)
+    if estado is None:
+        return jsonify({'erro': 'Tarefa não encontrada ou expirada.'}), 404
+    if estado['estado'] == 'erro':
+        return jsonify({'erro': estado.get('erro', 'Erro ao gerar o PDF.')}), 500
+    if estado['estado'] != 'concluida':
+        return jsonify({'erro': 'O PDF ainda está sendo gerado.'}), 409
+    return send_file(obter_sistema().fila_pdfs.caminho_pdf(id_tarefa), mimetype='application/pdf', as_attachment=True,
+                     download_name=f"convocados_{estado['total_vagas']}_vagas.pdf")
+
+@app.route('/convocados', methods=['GET'])
+def listar_convocados():
+    try:
+        total_vagas = int(request.args['total_vagas'])
+        desconsiderar_sub_judice = parametro_booleano('desconsiderar_sub_judice')
+        desistentes = lista_desistentes(request.args.get('desistentes'))
+        formato = request.args.get('formato', 'json').strip().lower()
+        if formato not in ('json', 'csv'):
+            return jsonify({'erro': 'Formato inválido: use json ou csv.'}), 400
+
+        simulacao = obter_sistema().resultado_simulacao(total_vagas, desconsiderar_sub_judice, desistentes)
+        if formato == 'csv':
+            return resposta_cacheavel(lambda: obter_sistema().blocos_csv_convocados(simulacao), 'text/csv; charset=utf-8',
+                                      ('csv',) + simulacao.chave,
+                                      {'Content-Disposition': f'attachment; filename=convocados_{simulacao.total_vagas}_vagas.csv'})
+
+        limite = min(max(int(request.args.get('limite', ITENS_POR_PAGINA_PADRAO)), 1), LIMITE_ITENS_POR_PAGINA)
+        inicio = 0
+        if request.args.get('page'):
+            versao_dados, inicio = ler_cursor_pagina(request.args['page'])
+            if versao_dados != simulacao.versao_dados:
+                return jsonify({'erro': 'Os dados foram atualizados: recomece a listagem pela primeira página.'}), 409
+
+        def pagina_json():
+            pagina = obter_sistema().pagina_convocados(simulacao, inicio, inicio + limite)
+            fim = inicio + len(pagina['ordem'])
+            convocados = [{
+                'ordem': ordem,
+                'inscricao': inscricao,
+                'nome': nome,
+                'tipo': tipo,
+                'classificacao_ampla': None if np.isnan(clas_ampla) else clas_ampla,
+                'classificacao_reserva': None if np.isnan(clas_reserva) else clas_reserva,
+                'cotista': cotista,
+            } for ordem, inscricao, nome, tipo, clas_ampla, clas_reserva, cotista in zip(
+                pagina['ordem'].tolist(), pagina['inscricoes'].tolist(), pagina['nomes'].tolist(), pagina['tipos'].tolist(),
+                pagina['clas_ampla'].tolist(), pagina['clas_reserva'].tolist(), pagina['cotistas'].tolist())]
+            return json.dumps({
+                'versao_dados': simulacao.versao_dados,
+                'total_vagas': simulacao.total_vagas,
+                'total_convocados': simulacao.total_convocados,
+                'convocados': convocados,
+                'proxima_pagina': cursor_pagina(simulacao.versao_dados, fim) if fim < simulacao.total_convocados else None,
+            }, ensure_ascii=False).encode('utf-8')
+
+        return resposta_cacheavel(pagina_json, 'application/json', ('json', inicio, limite) + simulacao.chave)
+    except (KeyError, ValueError) as e:
+        return jsonify({'erro': f'Parâmetro inválido: {e}'}), 400
+    except Exception as e:
+        logger.exception("erro_listar_convocados erro=%s", e)
+        return jsonify({'erro': str(e)})
+
+@app.route('/linha_do_tempo', methods=['GET'])
+def linha_do_tempo():
+    try:
+        return jsonify(obter_sistema().resumo_linha_do_tempo())
+    except Exception as e:
+        logger.exception("erro_linha_do_tempo erro=%s", e)
+        return jsonify({'erro': str(e)})
+
+@app.route('/linha_do_tempo/simular', methods=['POST'])
+def simular_rodada():
+    try:
+        data = request.get_json()
+        rodada = int(data['rodada'])
+        total_vagas = data.get('total_vagas')
+        total_vagas = int(total_vagas) if total_vagas not in (None, '') else None
+        inscricao = data.get('inscricao') or None
+        desconsiderar_sub_judice = bool(data.get('desconsiderar_sub_judice', False))
+        return jsonify(obter_sistema().simular_rodada(rodada, total_vagas, inscricao, desconsiderar_sub_judice))
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        logger.exception("erro_simular_rodada erro=%s", e)
+        return jsonify({'erro': str(e)})
+
+@app.route('/linha_do_tempo/projetar', methods=['POST'])
+def projetar_rodadas():
+    try:
+        data = request.get_json()
+        quantidade = int(data.get('rodadas', 1))
+        tamanho = data.get('tamanho')
+        tamanho = int(tamanho) if tamanho not in (None, '') else None
+        a_partir_da_rodada = data.get('a_partir_da_rodada')
+        a_partir_da_rodada = int(a_partir_da_rodada) if a_partir_da_rodada not in (None, '') else None
+        inscricao = data.get('inscricao') or None
+        desconsiderar_sub_judice = bool(data.get('desconsiderar_sub_judice', False))
+
+        if not 1 <= quantidade <= LIMITE_RODADAS_PROJETADAS:
+            return jsonify({'erro': f'A quantidade de rodadas deve estar entre 1 e {LIMITE_RODADAS_PROJETADAS}.'}), 400
+        return jsonify(obter_sistema().projetar_rodadas(quantidade, tamanho, a_partir_da_rodada, inscricao, desconsiderar_sub_judice))
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        logger.exception("erro_projetar_rodadas erro=%s", e)
+        return jsonify({'erro': str(e)})
+
+@app.route('/simular_lote', methods=['POST'])
+def simular_lote():
+    try:
+        data = request.get_json()
+        inscricoes = data['inscricoes']
+        lista_vagas = data['total_vagas']
+        if not isinstance(lista_vagas, list):
+            lista_vagas = [lista_vagas]
+        desconsiderar_sub_judice = bool(data.get('desconsiderar_sub_judice', False))
+
+        if len(inscricoes) * len(lista_vagas) > LIMITE_CELULAS_LOTE:
+            return jsonify({'erro': f'Lote muito grande: o limite é de {LIMITE_CELULAS_LOTE} combinações de inscrição e vagas.'}), 400
+
+        lote = obter_sistema().simular_lote(inscricoes, lista_vagas, desconsiderar_sub_judice)
+        if lote is None:
+            return jsonify({'erro': 'Dados não carregados.'})
+
+        tipos = np.array([None, TIPO_AMPLA, obter_sistema().rotulo_reservas, TIPO_REMANEJADA], dtype=object)
+        classificacao = lote['classificacao'].astype(object)
+        classificacao[lote['codigo_tipo'] == 0] = None
+
+        return jsonify({
+            'inscricoes': lote['inscricoes'],
+            'total_vagas': lote['total_vagas'],
+            'encontrada': lote['encontrada'].tolist(),
+            'convocado': lote['convocado'].tolist(),
+            'tipo': tipos[lote['codigo_tipo']].tolist(),
+            'classificacao': classificacao.tolist()
+        })
+    except Exception as e:
+        logger.exception("erro_simular_lote erro=%s", e)
+        return jsonify({'erro': str(e)})
+
+@app.route('/limiar/<inscricao>', methods=['GET'])
+def limiar(inscricao):
+    try:
+        desconsiderar_sub_judice = parametro_booleano('desconsiderar_sub_judice')
+        limiar_info = obter_sistema().vagas_minimas(inscricao, desconsiderar_sub_judice)
+        if limiar_info is None:
+            return jsonify({'erro': f'Inscrição {inscricao} não encontrada entre os candidatos não convocados.'}), 404
+        return jsonify(limiar_info)
+    except Exception as e:
+        logger.exception("erro_limiar erro=%s", e)
+        return jsonify({'erro': str(e)})
+
+@app.route('/buscar', methods=['GET'])
+def buscar():
+    try:
+        consulta = request.args.get('q', '')
+        limite = min(max(int(request.args.get('limite', RESULTADOS_BUSCA_PADRAO)), 1), LIMITE_RESULTADOS_BUSCA)
+        return jsonify({'consulta': consulta, 'candidatos': obter_sistema().buscar_candidatos(consulta, limite)})
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        logger.exception("erro_buscar erro=%s", e)
+        return jsonify({'erro': str(e)})
+
+@app.route('/probabilidade', methods=['POST'])
+def probabilidade():
+    try:
+        data = request.get_json()
+        inscricao = str(data['inscricao']).strip()
+        total_vagas = int(data['total_vagas'])
+        taxa_desistencia = float(data['taxa_desistencia'])
+        cenarios = int(data.get('cenarios', CENARIOS_PADRAO))
+        semente = data.get('semente')
+        semente = int(semente) if semente not in (None, '') else None
+        desconsiderar_sub_judice = bool(data.get('desconsiderar_sub_judice', False))
+
+        if not 0 <= taxa_desistencia <= 1:
+            return jsonify({'erro': 'A taxa de desistência deve estar entre 0 e 1.'}), 400
+        if not 1 <= cenarios <= LIMITE_CENARIOS:
+            return jsonify({'erro': f'A quantidade de cenários deve estar entre 1 e {LIMITE_CENARIOS}.'}), 400
+
+        resultado = obter_sistema().probabilidade_convocacao(inscricao, total_vagas, taxa_desistencia, cenarios, semente, desconsiderar_sub_judice)
+        if resultado is None:
+            return jsonify({'erro': f'Inscrição {inscricao} não encontrada.'}), 404
+        return jsonify(resultado)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        logger.exception("erro_probabilidade erro=%s", e)
+        return jsonify({'erro': str(e)})
+
+@app.route('/reclassificar', methods=['POST'])
+def reclassificar():
+    try:
+        data = request.get_json()
+        inscricao = str(data['inscricao']).strip()
+        total_vagas = int(data['total_vagas'])
+        alteracoes = data.get('alteracoes') or []
+        desconsiderar_sub_judice = bool(data.get('desconsiderar_sub_judice', False))
+        desistentes = lista_desistentes(data.get('desistentes'))
+
+        if not isinstance(alteracoes, list) or not alteracoes:
+            return jsonify({'erro': 'Informe ao menos uma alteração de nota.'}), 400
+
+        resultado, candidato_info, alteradas = obter_sistema().simular_reclassificado(inscricao, total_vagas, alteracoes,
+                                                                              desconsiderar_sub_judice, desistentes)
+        return jsonify({'resultado': resultado, 'candidato': candidato_info, 'alteracoes': alteradas})
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        logger.exception("erro_reclassificar erro=%s", e)
+        return jsonify({'erro': str(e)})
+
+@app.route('/admin/recarregar', methods=['POST'])
+def recarregar_dados():
+    # Endpoint desabilitado quando não há token configurado
+    token = os.environ.get(VARIAVEL_TOKEN_ADMIN)
+    if not token or not hmac.compare_digest(request.headers.get('X-Token-Admin', ''), token):
+        return jsonify({'erro': 'Não autorizado.'}), 403
+    try:
+        sistema = obter_sistema()
+        if sistema.pedir_recarga:
+            # Sob o gunicorn, o mestre relê o arquivo, republica os dados e troca todos os workers
+            sistema.pedir_recarga()
+            return jsonify({'modo': 'coordenada', 'versao_dados': sistema.versao_dados}), 202
+        return jsonify(sistema.recarregar(forcar=parametro_booleano('forcar')))
+    except Exception as e:
+        logger.exception("erro_recarregar erro=%s", e)
+        return jsonify({'erro': str(e)}), 500
+
 if __name__ == '__main__':
-    print("Entrando no bloco if __name__ == '__main__':")
+    logging.basicConfig(level=os.environ.get(VARIAVEL_NIVEL_LOG, "INFO").upper(),
+                        format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    try:
+        sistema = obter_sistema()
+    except RuntimeError:
+        logger.critical("Erro ao carregar os dados dos candidatos. O programa será encerrado.")
+        exit()
     try:
-        # Criar diretório para PDFs se não existir
-        if not os.path.exists('pdfs'):
-            os.makedirs('pdfs')
-            print("Diretório 'pdfs' criado")
+        if os.environ.get(VARIAVEL_INTERVALO_RECARGA):
+            sistema.monitorar_arquivo(float(os.environ[VARIAVEL_INTERVALO_RECARGA]))
 
         app.run(debug=True, host='0.0.0.0', port=5001)  # Alterei a porta para 5001
-        print("Servidor Flask finalizou (isso geralmente não acontece em modo debug)")
     except Exception as e:
-        print(f"Erro ao executar app.run(): {e}")
\ No newline at end of file
+        logger.exception("Erro ao executar app.run(): %s", e)
\ No newline at end of file
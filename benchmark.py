@@ -0,0 +1,140 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from gerar_dados_sinteticos import gerar_candidatos, gravar_json, ler_quantidade
+from converter_csv_para_json import gravar_colunar
+from app import SistemaConvocacao
+
+# Frações dos candidatos não convocados usadas como total de vagas quando --vagas não é informado
+FRACOES_VAGAS_PADRAO = [0.001, 0.01, 0.1, 0.5, 1.0]
+
+def cronometrar(funcao, repeticoes, preparar=None):
+    """Executa funcao repetidas vezes (chamando preparar antes de cada uma, fora da medição) e retorna os tempos em segundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+def pico_memoria(funcao, preparar=None):
+    """Pico de memória alocada (Python e numpy) durante uma execução de funcao, em bytes."""
+    if preparar:
+        preparar()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        funcao()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def medir(resultados, linhas, etapa, detalhe, funcao, repeticoes, preparar=None):
+    """Mede tempo e memória de uma etapa e acrescenta a linha aos resultados."""
+    tempos = cronometrar(funcao, repeticoes, preparar)
+    resultado = {
+        'linhas': linhas,
+        'etapa': etapa,
+        'detalhe': detalhe,
+        'mediana_s': statistics.median(tempos),
+        'minimo_s': min(tempos),
+        'maximo_s': max(tempos),
+        'pico_memoria_mb': pico_memoria(funcao, preparar) / 2**20,
+    }
+    resultados.append(resultado)
+    print(f"{linhas:>9} {etapa:<18} {detalhe:<28} {resultado['mediana_s'] * 1000:>12.3f} {resultado['minimo_s'] * 1000:>12.3f} "
+          f"{resultado['pico_memoria_mb']:>10.2f}", flush=True)
+
+def executar(linhas, lista_vagas, repeticoes, formatos, semente, limite_pdf, desconsiderar_sub_judice, diretorio):
+    """
+    Gera os dados sintéticos de um tamanho e mede carregar_dados, simular_convocacao e gerar_pdf.
+    """
+    resultados = []
+    colunas = gerar_candidatos(linhas, semente)
+    caminhos = {}
+    for formato in formatos:
+        caminhos[formato] = os.path.join(diretorio, f'candidatos_{linhas}.{formato}')
+        (gravar_json if formato == 'json' else gravar_colunar)(colunas, caminhos[formato])
+    del colunas
+
+    # carregar_dados: um sistema novo a cada repetição
+    sistemas = {}
+    for formato, caminho in caminhos.items():
+        def preparar(formato=formato, caminho=caminho):
+            sistemas[formato] = SistemaConvocacao(caminho)
+        medir(resultados, linhas, 'carregar_dados', formato, lambda formato=formato: sistemas[formato].carregar_dados(),
+              repeticoes, preparar)
+
+    sistema = sistemas[formatos[0]]
+    sistema.carregar_dados()
+    indice = sistema._indice_para(desconsiderar_sub_judice)
+    if lista_vagas is None:
+        lista_vagas = sorted({max(int(indice.total * fracao), 1) for fracao in FRACOES_VAGAS_PADRAO})
+
+    for total_vagas in lista_vagas:
+        # Candidato logo após o corte da ampla, o caso típico de consulta
+        inscricao = indice.inscricoes[indice.ordem_ampla[min(total_vagas, indice.total - 1)]]
+        simular = lambda: sistema.simular_convocacao(inscricao, total_vagas, desconsiderar_sub_judice)
+        medir(resultados, linhas, 'simular_convocacao', f'vagas={total_vagas} sem cache', simular, repeticoes,
+              sistema.cache_resultados.limpar)
+        medir(resultados, linhas, 'simular_convocacao', f'vagas={total_vagas} com cache', simular, repeticoes)
+
+        simulacao = sistema.resultado_simulacao(total_vagas, desconsiderar_sub_judice)
+        if simulacao.total_convocados > limite_pdf:
+            print(f"{linhas:>9} {'gerar_pdf':<18} {f'vagas={total_vagas}':<28} {'(acima do limite de PDF)':>24}")
+            continue
+        # Mesmo caminho da rota /gerar_pdf: renderização em memória, sem o cache de PDFs
+        medir(resultados, linhas, 'gerar_pdf', f'vagas={total_vagas}', lambda: sistema.pdf_simulacao(simulacao),
+              repeticoes, sistema.cache_pdfs.limpar)
+    return resultados
+
+def comparar(resultados, caminho_base):
+    """Mostra a variação da mediana de cada medição em relação a um resultado salvo anteriormente."""
+    with open(caminho_base, 'r', encoding='utf-8') as f:
+        base = {(r['linhas'], r['etapa'], r['detalhe']): r for r in json.load(f)['resultados']}
+    print(f"\nComparação com '{caminho_base}' (mediana):")
+    for resultado in resultados:
+        anterior = base.get((resultado['linhas'], resultado['etapa'], resultado['detalhe']))
+        if anterior and anterior['mediana_s'] > 0:
+            variacao = (resultado['mediana_s'] / anterior['mediana_s'] - 1) * 100
+            print(f"{resultado['linhas']:>9} {resultado['etapa']:<18} {resultado['detalhe']:<28} {variacao:>+9.1f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede tempo e memória de carregar_dados, simular_convocacao e gerar_pdf com dados sintéticos.")
+    parser.add_argument('--linhas', type=ler_quantidade, nargs='+', default=[ler_quantidade('10k'), ler_quantidade('100k')],
+                        help="tamanhos dos conjuntos sintéticos (ex.: 10k 100k 1M)")
+    parser.add_argument('--vagas', type=int, nargs='+', help="valores de total_vagas (padrão: frações dos candidatos)")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--formatos', nargs='+', choices=['colunar', 'json'], default=['colunar', 'json'],
+                        help="formatos medidos em carregar_dados; o primeiro é usado nas simulações")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--limite-pdf', type=int, default=20000, help="maior quantidade de convocados para medir o PDF")
+    parser.add_argument('--desconsiderar-sub-judice', action='store_true')
+    parser.add_argument('--saida', help="grava os resultados em JSON")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior, para comparar as medianas")
+    args = parser.parse_args()
+
+    logging.getLogger("simulador").setLevel(logging.ERROR)
+
+    print(f"{'linhas':>9} {'etapa':<18} {'detalhe':<28} {'mediana (ms)':>12} {'mínimo (ms)':>12} {'pico (MB)':>10}")
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for linhas in args.linhas:
+            resultados += executar(linhas, args.vagas, args.repeticoes, args.formatos, args.semente, args.limite_pdf,
+                                   args.desconsiderar_sub_judice, diretorio)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'parametros': vars(args), 'resultados': resultados}, f, ensure_ascii=False, indent=4)
+    if args.comparar:
+        comparar(resultados, args.comparar)
@@ -0,0 +1,80 @@
+import unicodedata
+
+import numpy as np
+
+# Módulo sem dependência do app: índice de prefixos sobre os nomes normalizados, para a
+# busca por nome (digitação incremental) sem percorrer todos os candidatos a cada tecla.
+
+def normalizar_nome(nome):
+    """Nome sem acentos, em caixa única e com espaços simples (sem espaços nas pontas)."""
+    decomposto = unicodedata.normalize('NFKD', str(nome))
+    sem_acentos = ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+    return ' '.join(sem_acentos.casefold().split())
+
+class IndiceNomes:
+    """
+    Prefixos de nomes: para cada nome normalizado, guarda o trecho que começa em cada palavra
+    ("kayo fernando silva", "fernando silva", "silva"), ordenados uma única vez. Uma busca é
+    um par de buscas binárias pelo intervalo de trechos que começam com a consulta, então
+    "fern" encontra "Kayo Fernando" e "Fernanda Souza".
+    """
+    def __init__(self, nomes):
+        # Nomes repetidos são normalizados uma única vez
+        normalizados = {nome: normalizar_nome(nome) for nome in set(nomes)}
+        trechos, linhas, inicio_nome = [], [], []
+        for linha, nome in enumerate(nomes):
+            normalizado = normalizados[nome]
+            inicio = 0
+            for palavra in normalizado.split(' ') if normalizado else ():
+                trechos.append(normalizado[inicio:])
+                linhas.append(linha)
+                inicio_nome.append(inicio == 0)
+                inicio += len(palavra) + 1
+        # sorted compara as strings do Python mais rápido que o argsort de um array de objetos
+        ordem = np.array(sorted(range(len(trechos)), key=trechos.__getitem__), dtype=np.int64)
+        trechos_ordenados = np.empty(len(trechos), dtype=object)
+        trechos_ordenados[:] = [trechos[i] for i in ordem]
+        self._montar(trechos_ordenados, np.array(linhas, dtype=np.int64)[ordem], np.array(inicio_nome, dtype=bool)[ordem])
+
+    def _montar(self, trechos, linhas, inicio_nome):
+        self.trechos = trechos
+        self.linhas = linhas
+        self.inicio_nome = inicio_nome
+
+    def filtrar(self, manter):
+        """Índice só com as linhas marcadas em manter (renumeradas), sem reordenar os trechos."""
+        novas_linhas = np.cumsum(manter) - 1
+        mantidos = manter[self.linhas]
+        indice = IndiceNomes.__new__(IndiceNomes)
+        indice._montar(self.trechos[mantidos], novas_linhas[self.linhas[mantidos]], self.inicio_nome[mantidos])
+        return indice
+
+    def buscar(self, consulta, prioridade, limite=10):
+        """
+        Linhas cujos nomes têm alguma palavra (ou sequência de palavras) começando com a consulta.
+        Nomes que começam com a consulta vêm primeiro; depois vale a menor prioridade (por
+        exemplo, a posição na ampla). prioridade deve ser distinta por linha.
+        """
+        consulta = normalizar_nome(consulta)
+        if not consulta or limite <= 0:
+            return np.empty(0, dtype=np.int64)
+        inicio = int(np.searchsorted(self.trechos, consulta, side='left'))
+        fim = int(np.searchsorted(self.trechos, consulta + '\U0010ffff', side='left'))
+        if inicio == fim:
+            return np.empty(0, dtype=np.int64)
+
+        linhas = self.linhas[inicio:fim]
+        chaves = np.where(self.inicio_nome[inicio:fim], 0, len(prioridade)) + prioridade[linhas]
+        # Uma linha aparece no intervalo no máximo uma vez por palavra: bastam alguns múltiplos
+        # do limite para completar o resultado sem ordenar o intervalo inteiro
+        candidatos = min(len(chaves), limite * 8)
+        while True:
+            if candidatos < len(chaves):
+                menores = np.argpartition(chaves, candidatos - 1)[:candidatos]
+            else:
+                menores = np.arange(len(chaves))
+            menores = menores[np.argsort(chaves[menores], kind="stable")]
+            unicas, primeira = np.unique(linhas[menores], return_index=True)
+            if len(unicas) >= limite or candidatos >= len(chaves):
+                return linhas[menores[np.sort(primeira)]][:limite]
+            candidatos = min(len(chaves), candidatos * 4)
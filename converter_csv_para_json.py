@@ -1,8 +1,24 @@
+import argparse
 import csv
+import hashlib
 import json
+import os
 
-def converter_csv_para_json(csv_filepath, json_filepath):
-    """Converte um arquivo CSV para JSON."""
+import numpy as np
+
+# Colunas numéricas, gravadas já convertidas para float no formato colunar
+COLUNAS_NUMERICAS = ['CLAS. AMPLA', 'CLAS. COTAS', 'LP', 'LI', 'RLM', 'AT', 'LEG. PMDF', 'CONH. BÁS.', 'CONH. ESP.', 'TOTAL OBJETIVA', 'REDAÇÃO', 'NOTA TOTAL']
+
+# Marcação de situação derivada do nome, calculada uma única vez na conversão ou na carga
+COLUNA_SUB_JUDICE = 'SUB JUDICE'
+MARCA_SUB_JUDICE = '(sub judice)'
+
+# Arquivo com o esquema (nomes, tipos e arquivos das colunas) dentro do diretório colunar
+ARQUIVO_ESQUEMA = 'esquema.json'
+VERSAO_FORMATO_COLUNAR = 1
+
+def ler_csv(csv_filepath):
+    """Lê o CSV de candidatos, limpando espaços e convertendo vírgula para ponto em números."""
     data = []
     with open(csv_filepath, mode='r', encoding='utf-8') as csvfile:
         csv_reader = csv.DictReader(csvfile)
@@ -15,12 +31,101 @@ def converter_csv_para_json(csv_filepath, json_filepath):
                     cleaned_value = cleaned_value.replace(',', '.')
                 cleaned_row[key.strip()] = cleaned_value
             data.append(cleaned_row)
+    return data
+
+def marcar_sub_judice(nomes):
+    """Marca os nomes que contêm "(Sub Judice)" (texto literal, sem diferenciar maiúsculas)."""
+    nomes = np.asarray(nomes, dtype=str)
+    if nomes.size == 0:
+        return np.zeros(nomes.shape, dtype=bool)
+    return np.char.find(np.char.lower(nomes), MARCA_SUB_JUDICE) >= 0
+
+def converter_csv_para_json(csv_filepath, json_filepath):
+    """Converte um arquivo CSV para JSON."""
+    data = ler_csv(csv_filepath)
 
     with open(json_filepath, mode='w', encoding='utf-8') as jsonfile:
         json.dump(data, jsonfile, indent=4)
 
+def _para_float(valor):
+    """Converte um valor textual para float (NaN quando vazio ou inválido)."""
+    try:
+        return float(valor.replace(',', '.'))
+    except ValueError:
+        return np.nan
+
+def converter_csv_para_colunar(csv_filepath, diretorio):
+    """
+    Converte um arquivo CSV para o formato colunar: um arquivo .npy tipado por coluna
+    (float64 para as colunas numéricas, texto de largura fixa para as demais, mais a
+    marcação booleana de Sub Judice) e um esquema JSON. As colunas podem ser abertas com memory-map, sem reprocessar o CSV.
+    """
+    data = ler_csv(csv_filepath)
+    colunas = list(data[0].keys()) if data else []
+    gravar_colunar({coluna: [row[coluna] for row in data] for coluna in colunas}, diretorio)
+
+def gravar_colunar(colunas, diretorio):
+    """Grava no formato colunar um dicionário nome -> valores textuais (na ordem das colunas do arquivo)."""
+    os.makedirs(diretorio, exist_ok=True)
+    linhas = len(next(iter(colunas.values()))) if colunas else 0
+
+    esquema = {'versao_formato': VERSAO_FORMATO_COLUNAR, 'linhas': linhas, 'colunas': []}
+    # Resumo do conteúdo gravado, para que quem carrega identifique a versão dos dados sem reler as colunas
+    resumo = hashlib.sha256()
+    for i, (coluna, valores) in enumerate(colunas.items()):
+        if coluna in COLUNAS_NUMERICAS:
+            array = np.array([_para_float(valor) for valor in valores], dtype=np.float64)
+            tipo = 'float64'
+        else:
+            array = np.array(valores, dtype=str)
+            tipo = 'texto'
+
+        arquivo = f'coluna_{i:02d}.npy'
+        np.save(os.path.join(diretorio, arquivo), array)
+        esquema['colunas'].append({'nome': coluna, 'tipo': tipo, 'arquivo': arquivo})
+        resumo.update(f'{coluna}:{array.dtype.str}:'.encode('utf-8'))
+        resumo.update(np.ascontiguousarray(array).view(np.uint8))
+
+    # Marcação booleana de Sub Judice, para que a carga não precise procurar no texto dos nomes
+    if 'NOME' in colunas:
+        arquivo = f'coluna_{len(esquema["colunas"]):02d}.npy'
+        np.save(os.path.join(diretorio, arquivo), marcar_sub_judice(colunas['NOME']))
+        esquema['colunas'].append({'nome': COLUNA_SUB_JUDICE, 'tipo': 'bool', 'arquivo': arquivo})
+    esquema['hash_conteudo'] = resumo.hexdigest()
+
+    # O esquema é gravado por último para que um diretório incompleto nunca pareça válido
+    caminho_esquema = os.path.join(diretorio, ARQUIVO_ESQUEMA)
+    with open(caminho_esquema + '.tmp', mode='w', encoding='utf-8') as f:
+        json.dump(esquema, f, ensure_ascii=False, indent=4)
+    os.replace(caminho_esquema + '.tmp', caminho_esquema)
+
+def ler_colunar(diretorio, mmap_mode='r', colunas=None):
+    """
+    Abre as colunas de um diretório colunar (com memory-map por padrão) e as retorna em um dicionário.
+    Se colunas for informada, abre só as colunas dela presentes no diretório.
+    """
+    with open(os.path.join(diretorio, ARQUIVO_ESQUEMA), mode='r', encoding='utf-8') as f:
+        esquema = json.load(f)
+    if esquema.get('versao_formato') != VERSAO_FORMATO_COLUNAR:
+        raise ValueError(f"Versão de formato colunar não suportada: {esquema.get('versao_formato')}")
+
+    return {
+        coluna['nome']: np.load(os.path.join(diretorio, coluna['arquivo']), mmap_mode=mmap_mode)
+        for coluna in esquema['colunas']
+        if colunas is None or coluna['nome'] in colunas
+    }
+
 if __name__ == "__main__":
-    csv_arquivo = 'dados_candidatos.csv'
-    json_arquivo = 'dados_candidatos.json'
-    converter_csv_para_json(csv_arquivo, json_arquivo)
-    print(f"Arquivo '{csv_arquivo}' convertido para '{json_arquivo}' com sucesso!")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Converte o CSV de candidatos para JSON e, opcionalmente, para o formato colunar.")
+    parser.add_argument('--csv', default='dados_candidatos.csv')
+    parser.add_argument('--json', default='dados_candidatos.json')
+    parser.add_argument('--colunar', nargs='?', const='dados_candidatos.colunar', default=None,
+                        help="também gera o diretório colunar (padrão: dados_candidatos.colunar)")
+    args = parser.parse_args()
+
+    converter_csv_para_json(args.csv, args.json)
+    print(f"Arquivo '{args.csv}' convertido para '{args.json}' com sucesso!")
+
+    if args.colunar:
+        converter_csv_para_colunar(args.csv, args.colunar)
+        print(f"Arquivo '{args.csv}' convertido para o formato colunar em '{args.colunar}' com sucesso!")
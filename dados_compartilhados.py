@@ -0,0 +1,62 @@
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+def publicar_arrays(arrays, prefixo):
+    """
+    Copia cada array para um bloco de memória compartilhada.
+    Retorna (descrição serializável em JSON, blocos criados); o processo que publica
+    deve manter os blocos abertos enquanto houver leitores e removê-los ao final.
+    """
+    descricao = {}
+    blocos = []
+    for nome, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype == object:
+            # Textos viram unicode de largura fixa, que pode ser lido direto do buffer
+            array = array.astype(str)
+
+        bloco = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1), name=f"{prefixo}_{len(blocos)}")
+        np.ndarray(array.shape, dtype=array.dtype, buffer=bloco.buf)[...] = array
+        descricao[nome] = {'bloco': bloco.name, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        blocos.append(bloco)
+    return descricao, blocos
+
+def _abrir_bloco(nome):
+    """Abre um bloco existente sem registrá-lo para remoção quando este processo terminar."""
+    try:
+        return shared_memory.SharedMemory(name=nome, track=False)
+    except TypeError:
+        # Python < 3.13: o resource_tracker removeria o bloco ao fim do processo leitor
+        bloco = shared_memory.SharedMemory(name=nome)
+        resource_tracker.unregister(bloco._name, 'shared_memory')
+        return bloco
+
+def anexar_arrays(descricao, abertos=None):
+    """
+    Abre os blocos descritos e retorna (arrays somente leitura sobre a memória compartilhada, blocos).
+    Blocos já abertos neste processo (por exemplo, pelo próprio publicador) podem ser informados em abertos.
+    """
+    abertos = {bloco.name: bloco for bloco in (abertos or [])}
+    arrays = {}
+    blocos = []
+    for nome, info in descricao.items():
+        bloco = abertos.get(info['bloco']) or _abrir_bloco(info['bloco'])
+        array = np.ndarray(tuple(info['shape']), dtype=np.dtype(info['dtype']), buffer=bloco.buf)
+        array.flags.writeable = False
+        arrays[nome] = array
+        blocos.append(bloco)
+    return arrays, blocos
+
+def liberar_blocos(blocos, remover=False):
+    """Fecha os blocos e, se solicitado, remove-os do sistema (apenas o processo que os publicou)."""
+    for bloco in blocos:
+        try:
+            bloco.close()
+        except BufferError:
+            # Ainda há arrays apontando para o bloco; o mapeamento some com o processo
+            pass
+        if remover:
+            try:
+                bloco.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,156 @@
+import argparse
+import csv
+import json
+from datetime import date, timedelta
+
+import numpy as np
+
+from converter_csv_para_json import gravar_colunar
+
+# Colunas na mesma ordem do arquivo real de candidatos
+COLUNAS = ['CLAS. AMPLA', 'CLAS. COTAS', 'NOME', 'INSCRIÇÃO', 'LP', 'LI', 'RLM', 'AT', 'LEG. PMDF', 'CONH. BÁS.',
+           'CONH. ESP.', 'TOTAL OBJETIVA', 'REDAÇÃO', 'NOTA TOTAL', 'SITUAÇÃO', 'DATA CONVOCAÇÃO',
+           'CONCORRENDO NA VAGA DE', 'NOMEADO NA VAGA DE', 'OBS.']
+
+# Questões por disciplina da prova objetiva (77 no total, valendo 80 pontos)
+QUESTOES_BASICOS = {'LP': 10, 'LI': 5, 'RLM': 8, 'AT': 6, 'LEG. PMDF': 10}
+QUESTOES_ESPECIFICOS = 38
+VALOR_QUESTAO = 80 / 77
+
+PRENOMES = ['Lucas', 'Felipe', 'Vinícius', 'Ana', 'Maria', 'João', 'Pedro', 'Gabriel', 'Mateus', 'Rafael',
+            'Bruno', 'Thiago', 'Juliana', 'Camila', 'Larissa', 'Gustavo', 'Rodrigo', 'Marcos', 'Paulo', 'Letícia',
+            'André', 'Carlos', 'Daniel', 'Eduardo', 'Fernanda', 'Beatriz', 'Igor', 'Leonardo', 'Natália', 'Renata']
+SOBRENOMES = ['Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Lima', 'Carvalho', 'Ferreira', 'Rodrigues',
+              'Almeida', 'Costa', 'Gomes', 'Martins', 'Araújo', 'Barbosa', 'Ribeiro', 'Alves', 'Cardoso', 'Rocha',
+              'Dias', 'Teixeira', 'Moreira', 'Reis', 'Couto', 'Brandão', 'Figueirêdo', 'Batista', 'De Jesus',
+              'Do Patrocínio', 'Nascimento']
+
+# Observações que aparecem em parte dos convocados
+OBSERVACOES = ['FINAL DE FILA', 'ELIMINADO', 'AUSENTE', 'SEM EFEITO']
+
+def ler_quantidade(texto):
+    """Converte quantidades como 10000, 10k ou 1M para inteiro."""
+    texto = texto.strip().lower()
+    multiplicador = {'k': 1_000, 'm': 1_000_000}.get(texto[-1:], 1)
+    if multiplicador > 1:
+        texto = texto[:-1]
+    return int(float(texto) * multiplicador)
+
+def _formatar(valores, casas):
+    return [f"{valor:.{casas}f}" for valor in valores]
+
+def gerar_candidatos(linhas, semente=0, fracao_cotistas=0.17, fracao_sub_judice=0.045, fracao_convocados=0.40,
+                     rodadas=8, data_inicial=date(2024, 8, 6)):
+    """
+    Gera um conjunto sintético de candidatos com o esquema do arquivo real e retorna um
+    dicionário coluna -> lista de valores textuais. As notas vêm de uma habilidade latente
+    por candidato; CLAS. AMPLA segue a nota total (desempate por conhecimentos específicos e
+    redação) e CLAS. COTAS segue a mesma ordem entre os cotistas. Os convocados são os
+    primeiros pela regra de 80% ampla e 20% cotas, distribuídos em rodadas com datas e o
+    tipo de vaga em que foram nomeados. A mesma semente produz sempre o mesmo arquivo.
+    """
+    rng = np.random.default_rng(semente)
+    habilidade = rng.beta(6, 3, linhas)
+
+    basicos = {disciplina: rng.binomial(questoes, habilidade) * VALOR_QUESTAO for disciplina, questoes in QUESTOES_BASICOS.items()}
+    conh_basicos = sum(basicos.values())
+    conh_especificos = rng.binomial(QUESTOES_ESPECIFICOS, habilidade) * VALOR_QUESTAO
+    total_objetiva = conh_basicos + conh_especificos
+    redacao = np.clip(np.round(rng.normal(8 + 11 * habilidade, 1.5) * 2) / 2, 10, 20)
+    nota_total = total_objetiva + redacao
+
+    # Classificação: maior nota total, depois conhecimentos específicos e redação
+    ordem = np.lexsort((-redacao, -conh_especificos, -nota_total))
+    clas_ampla = np.empty(linhas, dtype=np.int64)
+    clas_ampla[ordem] = np.arange(1, linhas + 1)
+
+    cotista = rng.random(linhas) < fracao_cotistas
+    ordem_cotas = ordem[cotista[ordem]]
+    clas_cotas = np.zeros(linhas, dtype=np.int64)
+    clas_cotas[ordem_cotas] = np.arange(1, len(ordem_cotas) + 1)
+
+    # Convocações em rodadas: a primeira concentra a maior parte das vagas
+    total_convocados = int(linhas * fracao_convocados)
+    rodada = np.full(linhas, -1, dtype=np.int64)
+    tipo_nomeacao = np.full(linhas, '', dtype=object)
+    cortes = np.linspace(0.85, 1.0, rodadas) if rodadas > 1 else np.ones(1)
+    posicao_ampla = clas_ampla - 1
+    for k, fracao in enumerate(cortes):
+        vagas = int(total_convocados * fracao)
+        vagas_cotas = int(vagas * 0.20)
+        vagas_ampla = vagas - vagas_cotas
+        ampla = ordem[:vagas_ampla]
+        cotas = ordem_cotas[posicao_ampla[ordem_cotas] >= vagas_ampla][:vagas_cotas]
+        for linhas_tipo, tipo in ((ampla, 'AMPLA'), (cotas, 'COTAS')):
+            novas = linhas_tipo[rodada[linhas_tipo] < 0]
+            rodada[novas] = k
+            tipo_nomeacao[novas] = tipo
+
+    convocado = rodada >= 0
+    intervalos = np.concatenate(([0], np.cumsum(rng.integers(7, 15, rodadas - 1))))
+    datas = [data_inicial + timedelta(days=int(dias)) for dias in intervalos]
+    textos_datas = np.array([''] + [f"{d.month}/{d.day}/{d.year}" for d in datas], dtype=object)
+    observacao = np.where(convocado & (rng.random(linhas) < 0.06), rng.choice(OBSERVACOES, linhas), '')
+
+    sub_judice = rng.random(linhas) < fracao_sub_judice
+    nomes = [
+        f"{PRENOMES[p]} {SOBRENOMES[s1]} {SOBRENOMES[s2]}" + (" (Sub Judice)" if sj else "")
+        for p, s1, s2, sj in zip(rng.integers(0, len(PRENOMES), linhas), rng.integers(0, len(SOBRENOMES), linhas),
+                                 rng.integers(0, len(SOBRENOMES), linhas), sub_judice)
+    ]
+    inscricoes = 4300000000 + rng.choice(max(linhas * 4, 100_000), linhas, replace=False)
+
+    # O arquivo real é ordenado pela classificação na ampla
+    colunas = {
+        'CLAS. AMPLA': [str(c) for c in clas_ampla],
+        'CLAS. COTAS': [str(c) if c else '' for c in clas_cotas],
+        'NOME': nomes,
+        'INSCRIÇÃO': [str(i) for i in inscricoes],
+        **{disciplina: _formatar(pontos, 8) for disciplina, pontos in basicos.items()},
+        'CONH. BÁS.': _formatar(conh_basicos, 8),
+        'CONH. ESP.': _formatar(conh_especificos, 8),
+        'TOTAL OBJETIVA': _formatar(total_objetiva, 8),
+        'REDAÇÃO': _formatar(redacao, 2),
+        'NOTA TOTAL': _formatar(nota_total, 8),
+        'SITUAÇÃO': np.where(convocado, 'CONVOCADO', '').tolist(),
+        'DATA CONVOCAÇÃO': textos_datas[rodada + 1].tolist(),
+        'CONCORRENDO NA VAGA DE': np.where(cotista, 'AMPLA/COTAS', 'AMPLA').tolist(),
+        'NOMEADO NA VAGA DE': tipo_nomeacao.tolist(),
+        'OBS.': observacao.tolist(),
+    }
+    return {coluna: [colunas[coluna][i] for i in ordem] for coluna in COLUNAS}
+
+def gravar_json(colunas, caminho):
+    """Grava os candidatos no mesmo formato JSON do conversor, registro a registro."""
+    nomes = list(colunas)
+    with open(caminho, mode='w', encoding='utf-8') as f:
+        f.write('[')
+        for i, valores in enumerate(zip(*colunas.values())):
+            registro = json.dumps(dict(zip(nomes, valores)), indent=4).replace('\n', '\n    ')
+            f.write((',\n    ' if i else '\n    ') + registro)
+        f.write('\n]' if colunas[nomes[0]] else ']')
+
+def gravar_csv(colunas, caminho):
+    """Grava os candidatos em CSV, com o cabeçalho do arquivo original."""
+    with open(caminho, mode='w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(colunas.keys())
+        escritor.writerows(zip(*colunas.values()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera um arquivo sintético de candidatos com o esquema de dados_candidatos.")
+    parser.add_argument('--linhas', type=ler_quantidade, default=ler_quantidade('10k'), help="quantidade de candidatos (ex.: 10k, 100k, 1M)")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--json', help="arquivo JSON de saída")
+    parser.add_argument('--csv', help="arquivo CSV de saída")
+    parser.add_argument('--colunar', help="diretório colunar de saída")
+    args = parser.parse_args()
+
+    if not (args.json or args.csv or args.colunar):
+        args.json = f'dados_candidatos_sinteticos_{args.linhas}.json'
+
+    colunas = gerar_candidatos(args.linhas, args.semente)
+    for caminho, gravar in ((args.json, gravar_json), (args.csv, gravar_csv), (args.colunar, gravar_colunar)):
+        if caminho:
+            gravar(colunas, caminho)
+            print(f"{args.linhas} candidatos sintéticos gravados em '{caminho}'.")
@@ -0,0 +1,94 @@
+# Configuração do gunicorn: gunicorn -c gunicorn.conf.py app:app
+# O processo mestre carrega os candidatos uma única vez e publica as colunas usadas pela
+# simulação e pelo PDF, junto com os índices, em memória compartilhada somente leitura.
+# Os workers herdam esses arrays (ou os anexam pelo manifesto na variável de ambiente),
+# então a memória não cresce com o número de workers e um worker novo não relê o arquivo.
+# Recargas também passam pelo mestre: ao receber SIGHUP (do monitor do arquivo, de
+# /admin/recarregar ou do operador), ele relê o arquivo, republica os dados e o gunicorn
+# troca os workers, que passam todos a usar os novos blocos e a mesma versão dos dados.
+# As métricas de /metrics são somadas entre os processos por um diretório compartilhado
+# (DIRETORIO_METRICAS ou um diretório temporário), esvaziado a cada início do servidor.
+import glob
+import json
+import logging
+import os
+import shutil
+import signal
+import tempfile
+
+bind = os.environ.get("BIND", "0.0.0.0:5001")
+workers = int(os.environ.get("WORKERS", "4"))
+
+# Diretório das métricas criado pelo próprio servidor (removido ao sair)
+_diretorio_metricas_temporario = None
+
+def _publicar(server, sistema):
+    from app import VARIAVEL_DADOS_COMPARTILHADOS
+
+    # O próprio mestre passa a usar a memória compartilhada e descarta a cópia em pandas,
+    # para que os workers criados por fork herdem apenas os arrays compartilhados
+    manifesto = sistema.compartilhar_dados()
+    os.environ[VARIAVEL_DADOS_COMPARTILHADOS] = json.dumps(manifesto)
+    server.log.info(f"Dados publicados em memória compartilhada (versão {manifesto['versao_dados']})")
+
+def on_starting(server):
+    # Os logs do simulador saem pelos mesmos handlers do log de erros do gunicorn
+    logger = logging.getLogger("simulador")
+    logger.handlers = server.log.error_log.handlers
+    logger.setLevel(os.environ.get("NIVEL_LOG", "INFO").upper())
+    logger.propagate = False
+
+    # Métricas somadas entre os processos: cada um grava os seus valores no diretório compartilhado
+    from metricas import VARIAVEL_DIRETORIO_METRICAS, registro
+    global _diretorio_metricas_temporario
+    diretorio = os.environ.get(VARIAVEL_DIRETORIO_METRICAS)
+    if diretorio:
+        for arquivo in glob.glob(os.path.join(diretorio, "*.json")):
+            os.remove(arquivo)
+    else:
+        diretorio = _diretorio_metricas_temporario = tempfile.mkdtemp(prefix="simulador_metricas_")
+    registro.compartilhar(diretorio)
+
+    import app
+    _publicar(server, app.obter_sistema())
+
+def when_ready(server):
+    # Só o mestre monitora o arquivo: uma alteração vira um SIGHUP para ele mesmo
+    import app
+    if os.environ.get(app.VARIAVEL_INTERVALO_RECARGA):
+        app.obter_sistema().monitorar_arquivo(float(os.environ[app.VARIAVEL_INTERVALO_RECARGA]),
+                                              ao_alterar=lambda: os.kill(server.pid, signal.SIGHUP))
+
+def on_reload(server):
+    # Chamado no mestre antes de criar os novos workers; se a recarga falhar, eles herdam os dados atuais
+    import app
+    sistema = app.obter_sistema()
+    try:
+        resumo = sistema.recarregar(forcar=True)
+        server.log.info(f"Dados recarregados (modo {resumo['modo']}, {resumo['total']} candidatos)")
+        _publicar(server, sistema)
+    except Exception as e:
+        server.log.exception(f"Erro ao recarregar os dados: {e}")
+
+def post_fork(server, worker):
+    # Os workers não recarregam sozinhos: pedem a recarga ao mestre, que a aplica a todos
+    import app
+    sistema = app.obter_sistema()
+    sistema.pedir_recarga = lambda: os.kill(worker.ppid, signal.SIGHUP)
+    # Cada worker tem os seus pools: os processos configurados são divididos entre eles
+    sistema.dividir_pools(server.num_workers)
+
+def worker_exit(server, worker):
+    # Últimos valores do worker, antes que o mestre os some aos dos processos encerrados
+    from metricas import registro
+    registro.gravar()
+
+def child_exit(server, worker):
+    from metricas import registro
+    registro.marcar_processo_encerrado(worker.pid)
+
+def on_exit(server):
+    import app
+    app.obter_sistema().liberar_publicados()
+    if _diretorio_metricas_temporario:
+        shutil.rmtree(_diretorio_metricas_temporario, ignore_errors=True)
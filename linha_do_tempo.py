@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import numpy as np
+
+# Módulo sem dependência do app: agrupamento das convocações já feitas em rodadas (pela data
+# de convocação) e divisão das vagas das rodadas projetadas a partir das rodadas observadas.
+
+# Formatos aceitos para DATA CONVOCAÇÃO (o arquivo usa mês/dia/ano)
+FORMATOS_DATA_CONVOCACAO = ('%m/%d/%Y', '%Y-%m-%d')
+
+def ler_data_convocacao(texto):
+    """Data da convocação, ou None quando vazia ou em formato desconhecido."""
+    texto = str(texto).strip()
+    for formato in FORMATOS_DATA_CONVOCACAO:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+def agrupar_rodadas(datas):
+    """
+    Agrupa as convocações em rodadas, uma por data. Retorna (datas das rodadas em ordem, número
+    da rodada de cada convocação, de 1 em diante; 0 para convocações sem data reconhecida).
+    """
+    lidas = [ler_data_convocacao(data) for data in datas]
+    datas_rodadas = sorted({data for data in lidas if data is not None})
+    numeros = {data: k + 1 for k, data in enumerate(datas_rodadas)}
+    return datas_rodadas, np.array([numeros.get(data, 0) for data in lidas], dtype=np.int64)
+
+def codigos_nomeacao(vagas_de, nomes_categorias):
+    """
+    Tipo de vaga de cada convocação (NOMEADO NA VAGA DE): 0 para a ampla e k + 1 para a
+    categoria k da política, reconhecida pelo nome sem diferença de maiúsculas.
+    """
+    numeros = {nome.strip().casefold(): k + 1 for k, nome in enumerate(nomes_categorias)}
+    return np.array([numeros.get(str(valor).strip().casefold(), 0) for valor in vagas_de], dtype=np.int64)
+
+def divisoes_projetadas(tamanhos, proporcoes, convocados_anteriores, por_categoria_anteriores):
+    """
+    Divide as vagas de cada rodada projetada (tamanhos) entre a ampla e as categorias, mantendo
+    a proporção acumulada de cada categoria (proporcoes) sobre o total convocado desde o início:
+    cada rodada recebe a diferença entre o alvo acumulado arredondado e o já convocado, como nas
+    rodadas pequenas observadas, que alternam vagas de ampla e de cotas.
+    Retorna uma lista de (vagas da ampla, tupla com as vagas de cada categoria).
+    """
+    total = int(convocados_anteriores)
+    acumulado = [int(valor) for valor in por_categoria_anteriores]
+    divisoes = []
+    for tamanho in tamanhos:
+        total += int(tamanho)
+        restantes = int(tamanho)
+        vagas_categorias = []
+        for k, proporcao in enumerate(proporcoes):
+            vagas = min(max(int(np.floor(proporcao * total + 0.5)) - acumulado[k], 0), restantes)
+            acumulado[k] += vagas
+            restantes -= vagas
+            vagas_categorias.append(vagas)
+        divisoes.append((restantes, tuple(vagas_categorias)))
+    return divisoes
@@ -0,0 +1,291 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+# Limites (em segundos) dos histogramas de latência
+LIMITES_PADRAO = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Diretório compartilhado pelos processos do servidor no modo multiprocesso (ver RegistroMetricas.compartilhar)
+VARIAVEL_DIRETORIO_METRICAS = "DIRETORIO_METRICAS"
+# Intervalo (em segundos) entre as gravações dos valores de cada processo no diretório compartilhado
+INTERVALO_GRAVACAO = 1.0
+# Arquivo com a soma dos valores dos processos já encerrados
+ARQUIVO_ENCERRADOS = "encerrados.json"
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _formatar_rotulos(nomes, valores, extra=()):
+    pares = list(zip(nomes, valores)) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + "}"
+
+class Contador:
+    """Contador monotônico com rótulos, no formato de métricas do Prometheus."""
+    tipo = "counter"
+
+    def __init__(self, nome, descricao, rotulos=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, valor=1, **rotulos):
+        chave = tuple(rotulos.get(nome, "") for nome in self.rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def copiar(self):
+        """Cópia dos valores do processo: {rótulos: valor}."""
+        with self._lock:
+            return dict(self._valores)
+
+    def zerar(self):
+        """Descarta os valores (e o lock, que pode ter sido copiado travado por um fork)."""
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def somar(valor, outro):
+        return valor + outro
+
+    def exportar(self, valores=None):
+        itens = sorted((self.copiar() if valores is None else valores).items())
+        return [f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {valor}" for chave, valor in itens]
+
+class Histograma:
+    """Histograma cumulativo com rótulos, no formato de métricas do Prometheus."""
+    tipo = "histogram"
+
+    def __init__(self, nome, descricao, rotulos=(), limites=LIMITES_PADRAO):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self.limites = tuple(limites)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, **rotulos):
+        chave = tuple(rotulos.get(nome, "") for nome in self.rotulos)
+        posicao = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            serie[0][posicao] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def copiar(self):
+        """Cópia das séries do processo: {rótulos: [contagens por faixa, soma, total]}."""
+        with self._lock:
+            return {chave: [list(contagens), soma, total] for chave, (contagens, soma, total) in self._series.items()}
+
+    def zerar(self):
+        """Descarta as séries (e o lock, que pode ter sido copiado travado por um fork)."""
+        self._series = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def somar(serie, outra):
+        return [[a + b for a, b in zip(serie[0], outra[0])], serie[1] + outra[1], serie[2] + outra[2]]
+
+    def exportar(self, valores=None):
+        itens = sorted((self.copiar() if valores is None else valores).items())
+        linhas = []
+        for chave, (contagens, soma, total) in itens:
+            acumulado = 0
+            for limite, contagem in zip(self.limites + (float("inf"),), contagens):
+                acumulado += contagem
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, [('le', le)])} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(self.rotulos, chave)} {soma}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(self.rotulos, chave)} {total}")
+        return linhas
+
+class _Cronometro:
+    """Gerenciador de contexto que registra a duração do bloco em um histograma."""
+    __slots__ = ("histograma", "rotulos", "inicio")
+
+    def __init__(self, histograma, rotulos):
+        self.histograma = histograma
+        self.rotulos = rotulos
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        self.histograma.observar(time.perf_counter() - self.inicio, **self.rotulos)
+        return False
+
+class RegistroMetricas:
+    """
+    Conjunto de métricas do processo, exportado em texto no formato do Prometheus.
+    Sob o gunicorn, cada worker tem os seus valores; no modo multiprocesso (compartilhar), cada
+    processo grava os seus valores em um diretório comum e a exportação soma todos os processos,
+    inclusive os já encerrados, para que os totais não voltem quando um worker é trocado.
+    """
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+        self._diretorio = None
+        self._intervalo = INTERVALO_GRAVACAO
+        self._gravado = None
+        self._thread = None
+
+    def _registrar(self, metrica):
+        with self._lock:
+            return self._metricas.setdefault(metrica.nome, metrica)
+
+    def contador(self, nome, descricao, rotulos=()):
+        return self._registrar(Contador(nome, descricao, rotulos))
+
+    def histograma(self, nome, descricao, rotulos=(), limites=LIMITES_PADRAO):
+        return self._registrar(Histograma(nome, descricao, rotulos, limites))
+
+    def compartilhar(self, diretorio, intervalo=INTERVALO_GRAVACAO):
+        """
+        Ativa o modo multiprocesso (chamado no mestre do gunicorn, antes do fork dos workers): cada
+        processo grava <pid>.json no diretório a cada intervalo segundos, se algo mudou, e ao sair
+        (gravar). Um processo filho começa com os valores zerados, para não contar de novo os do
+        mestre. Um worker morto sem aviso (SIGKILL) perde no máximo o último intervalo.
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        if self._diretorio is None:
+            os.register_at_fork(after_in_child=self._apos_fork)
+        self._diretorio = diretorio
+        self._intervalo = intervalo
+        self._iniciar_gravacao()
+
+    def _apos_fork(self):
+        self._lock = threading.Lock()
+        for metrica in self._metricas.values():
+            metrica.zerar()
+        self._gravado = None
+        self._thread = None
+        self._iniciar_gravacao()
+
+    def _iniciar_gravacao(self):
+        if self._thread is not None:
+            return
+
+        def gravar_periodicamente():
+            while True:
+                time.sleep(self._intervalo)
+                try:
+                    self.gravar()
+                except OSError:
+                    pass
+
+        self._thread = threading.Thread(target=gravar_periodicamente, name="gravar-metricas", daemon=True)
+        self._thread.start()
+
+    def _valores(self):
+        with self._lock:
+            metricas = list(self._metricas.values())
+        return {metrica.nome: metrica.copiar() for metrica in metricas}
+
+    def gravar(self):
+        """Grava os valores deste processo no diretório compartilhado (se mudaram desde a última gravação)."""
+        if self._diretorio is None:
+            return
+        estado = {nome: [[list(chave), valor] for chave, valor in valores.items()] for nome, valores in self._valores().items()}
+        if estado == self._gravado:
+            return
+        _gravar_json(os.path.join(self._diretorio, f"{os.getpid()}.json"), estado)
+        self._gravado = estado
+
+    def marcar_processo_encerrado(self, pid):
+        """
+        Soma os valores de um processo encerrado aos dos anteriores e remove o seu arquivo.
+        Chamado só pelo mestre (child_exit), então o arquivo dos encerrados tem um único escritor.
+        """
+        if self._diretorio is None:
+            return
+        caminho = os.path.join(self._diretorio, f"{pid}.json")
+        estado = _ler_json(caminho)
+        if estado is None:
+            return
+        encerrados = _ler_json(os.path.join(self._diretorio, ARQUIVO_ENCERRADOS)) or {'processos': [], 'metricas': {}}
+        valores = self._somar_estados({}, [encerrados['metricas'], estado])
+        encerrados = {
+            'processos': encerrados['processos'] + [pid],
+            'metricas': {nome: [[list(chave), valor] for chave, valor in series.items()] for nome, series in valores.items()},
+        }
+        _gravar_json(os.path.join(self._diretorio, ARQUIVO_ENCERRADOS), encerrados)
+        os.remove(caminho)
+
+    def _somar_estados(self, valores, estados):
+        """Soma a valores ({nome: {rótulos: valor}}) os estados gravados ({nome: [[rótulos, valor], ...]})."""
+        for estado in estados:
+            for nome, series in estado.items():
+                metrica = self._metricas.get(nome)
+                if metrica is None:
+                    continue
+                valores_metrica = valores.setdefault(nome, {})
+                for chave, valor in series:
+                    chave = tuple(chave)
+                    atual = valores_metrica.get(chave)
+                    valores_metrica[chave] = valor if atual is None else metrica.somar(atual, valor)
+        return valores
+
+    def _valores_agregados(self):
+        """
+        Valores deste processo somados aos dos demais arquivos do diretório. Os arquivos dos
+        processos são lidos antes do dos encerrados; um processo encerrado nesse meio tempo aparece
+        na lista dos encerrados e o seu arquivo é ignorado, para não ser contado duas vezes.
+        """
+        proprio = f"{os.getpid()}.json"
+        estados = {}
+        for arquivo in os.listdir(self._diretorio):
+            if arquivo.endswith(".json") and arquivo not in (proprio, ARQUIVO_ENCERRADOS) and arquivo[:-5].isdigit():
+                estado = _ler_json(os.path.join(self._diretorio, arquivo))
+                if estado is not None:
+                    estados[int(arquivo[:-5])] = estado
+        encerrados = _ler_json(os.path.join(self._diretorio, ARQUIVO_ENCERRADOS)) or {'processos': [], 'metricas': {}}
+        for pid in encerrados['processos']:
+            estados.pop(pid, None)
+        return self._somar_estados(self._valores(), list(estados.values()) + [encerrados['metricas']])
+
+    def exportar(self):
+        with self._lock:
+            metricas = list(self._metricas.values())
+        valores = self._valores_agregados() if self._diretorio is not None else {}
+        linhas = []
+        for metrica in metricas:
+            linhas.append(f"# HELP {metrica.nome} {metrica.descricao}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            linhas.extend(metrica.exportar(valores.get(metrica.nome, {}) if self._diretorio is not None else None))
+        return "\n".join(linhas) + "\n"
+
+def _gravar_json(caminho, dados):
+    """Grava um JSON por arquivo temporário e troca, para que um leitor nunca veja o arquivo pela metade."""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f)
+    os.replace(temporario, caminho)
+
+def _ler_json(caminho):
+    """Lê um JSON gravado por _gravar_json (None se o arquivo não existe mais)."""
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+registro = RegistroMetricas()
+
+# Duração das etapas internas: carga, filtro, ampla, cotas, remanejamento, varredura, busca, pdf, pdf_fila, monte_carlo, reclassificacao e indice_nomes
+duracao_etapa = registro.histograma("simulador_etapa_duracao_segundos", "Duração das etapas internas da simulação.", rotulos=("etapa",))
+requisicoes = registro.contador("simulador_requisicoes_total", "Requisições HTTP atendidas.", rotulos=("endpoint", "metodo", "status"))
+duracao_requisicao = registro.histograma("simulador_requisicao_duracao_segundos", "Latência das requisições HTTP.", rotulos=("endpoint",))
+acessos_cache = registro.contador("simulador_cache_acessos_total", "Acessos aos caches de simulação e de PDF.", rotulos=("cache", "resultado"))
+
+def medir(etapa):
+    """Cronometra um bloco: with medir('ampla'): ..."""
+    return _Cronometro(duracao_etapa, {"etapa": etapa})
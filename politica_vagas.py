@@ -0,0 +1,112 @@
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+# Módulo sem dependência do app: a política de vagas é só configuração (percentuais,
+# arredondamento e ordem de remanejamento das listas de reserva).
+
+# Destino das vagas de reserva não preenchidas que voltam para a ampla concorrência
+DESTINO_AMPLA = 'ampla'
+
+# Regras de arredondamento das vagas de cada lista de reserva
+ARREDONDAMENTO_BAIXO = 'baixo'        # parte inteira (regra atual: int(vagas * 0,20))
+ARREDONDAMENTO_CIMA = 'cima'          # qualquer fração arredonda para cima
+ARREDONDAMENTO_PROXIMO = 'proximo'    # fração igual ou maior que 0,5 arredonda para cima
+ARREDONDAMENTOS = (ARREDONDAMENTO_BAIXO, ARREDONDAMENTO_CIMA, ARREDONDAMENTO_PROXIMO)
+
+@dataclass(frozen=True)
+class CategoriaReserva:
+    """
+    Lista de reserva de vagas (cotas, PcD...): candidatos com classificação na coluna
+    informada concorrem às vagas reservadas, na ordem dessa classificação. As vagas
+    não preenchidas seguem a ordem de remanejamento (outras listas e, por fim, a ampla).
+    """
+    nome: str
+    coluna: str
+    percentual: float
+    arredondamento: str = ARREDONDAMENTO_BAIXO
+    remanejamento: tuple = (DESTINO_AMPLA,)
+
+    def vagas(self, total_vagas):
+        """Vagas reservadas para a lista quando o total de vagas é total_vagas (um número ou um array)."""
+        # Arredondado antes do piso/teto para que 100 x 0,20 seja 20, como em int(100 * 0.20)
+        bruto = np.round(np.asarray(total_vagas) * self.percentual, 9)
+        if self.arredondamento == ARREDONDAMENTO_CIMA:
+            vagas = np.ceil(bruto)
+        elif self.arredondamento == ARREDONDAMENTO_PROXIMO:
+            vagas = np.floor(bruto + 0.5)
+        else:
+            vagas = np.floor(bruto)
+        return vagas.astype(np.int64) if vagas.ndim else int(vagas)
+
+@dataclass(frozen=True)
+class PoliticaVagas:
+    """Listas de reserva, na ordem em que são preenchidas depois da ampla concorrência."""
+    categorias: tuple
+
+    def __post_init__(self):
+        nomes = [categoria.nome for categoria in self.categorias]
+        if len(set(nomes)) != len(nomes):
+            raise ValueError("Nomes de categorias repetidos na política de vagas.")
+        if sum(categoria.percentual for categoria in self.categorias) >= 1:
+            raise ValueError("A soma dos percentuais das categorias deve ser menor que 100%.")
+        for categoria in self.categorias:
+            if not 0 <= categoria.percentual <= 1:
+                raise ValueError(f"Percentual inválido na categoria {categoria.nome}.")
+            if categoria.arredondamento not in ARREDONDAMENTOS:
+                raise ValueError(f"Arredondamento inválido na categoria {categoria.nome}: {categoria.arredondamento}.")
+            for destino in categoria.remanejamento:
+                if destino != DESTINO_AMPLA and (destino not in nomes or destino == categoria.nome):
+                    raise ValueError(f"Destino de remanejamento inválido na categoria {categoria.nome}: {destino}.")
+
+    @property
+    def colunas(self):
+        """Colunas de classificação das listas de reserva."""
+        return [categoria.coluna for categoria in self.categorias]
+
+    @property
+    def simples(self):
+        """Uma única lista de reserva, cujas sobras só podem voltar para a ampla."""
+        return len(self.categorias) == 1
+
+    def distribuir(self, total_vagas):
+        """
+        Divide total_vagas (um número ou um array) entre a ampla e as listas de reserva. Se o
+        arredondamento das reservas passar do total, as últimas categorias perdem as vagas excedentes.
+        Retorna (vagas da ampla, tupla com as vagas de cada categoria).
+        """
+        restantes = total_vagas
+        vagas_categorias = []
+        for categoria in self.categorias:
+            vagas = np.minimum(categoria.vagas(total_vagas), restantes)
+            vagas = vagas if np.ndim(vagas) else int(vagas)
+            vagas_categorias.append(vagas)
+            restantes = restantes - vagas
+        return restantes, tuple(vagas_categorias)
+
+    @classmethod
+    def de_dict(cls, dados):
+        """
+        Monta a política a partir de um dicionário (por exemplo, lido de JSON):
+        {"categorias": [{"nome": "Cotas", "coluna": "CLAS. COTAS", "percentual": 0.2,
+        "arredondamento": "baixo", "remanejamento": ["ampla"]}, ...]}
+        """
+        categorias = []
+        for categoria in dados['categorias']:
+            categorias.append(CategoriaReserva(
+                nome=str(categoria['nome']),
+                coluna=str(categoria['coluna']),
+                percentual=float(categoria['percentual']),
+                arredondamento=categoria.get('arredondamento', ARREDONDAMENTO_BAIXO),
+                remanejamento=tuple(categoria.get('remanejamento', (DESTINO_AMPLA,))),
+            ))
+        return cls(tuple(categorias))
+
+def ler_politica(caminho):
+    """Lê a política de vagas de um arquivo JSON."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return PoliticaVagas.de_dict(json.load(f))
+
+# Regra do concurso: 20% das vagas para cotas (parte inteira), sobras voltam para a ampla
+POLITICA_PADRAO = PoliticaVagas((CategoriaReserva('Cotas', 'CLAS. COTAS', 0.20),))
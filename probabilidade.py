@@ -0,0 +1,120 @@
+from itertools import repeat
+
+import numpy as np
+
+# Módulo sem dependência do app: os lotes de cenários podem rodar em outros processos
+# sem carregar os dados dos candidatos.
+
+# Células (cenários x candidatos à frente) sorteadas por lote, para limitar a memória de cada lote
+CELULAS_POR_LOTE = 2_000_000
+
+# Códigos do resultado de cada cenário (os mesmos do índice para os tipos de convocação)
+NAO_CONVOCADO, CONVOCADO_AMPLA, CONVOCADO_COTAS, CONVOCADO_REMANEJADA = 0, 1, 2, 3
+
+def perfil_convocacao(indice, linha, total_vagas, politica):
+    """
+    Resume o que decide a convocação de uma linha quando outros candidatos desistem: a divisão
+    das vagas, quais dos candidatos à frente na ampla são cotistas (e quais deles estão à frente
+    também nas cotas) e quantos cotistas estão atrás na ampla, que só importam pela contagem.
+    O perfil é pequeno (proporcional aos candidatos à frente) e pode ser enviado a outro processo.
+    Vale para políticas de vagas com uma única lista de reserva.
+    """
+    if not politica.simples:
+        raise ValueError("A estimativa de probabilidade só está disponível para políticas com uma única lista de reserva.")
+    vagas_ampla, (vagas_cotas,) = politica.distribuir(max(int(total_vagas), 0))
+    reserva = indice.reserva(politica.categorias[0].coluna)
+    posicao = int(indice.posicao_ampla[linha])
+    a_frente = indice.ordem_ampla[:posicao]
+    cotista_a_frente = np.asarray(reserva['membro'][a_frente], dtype=bool)
+    cotista = bool(reserva['membro'][linha])
+
+    perfil = {
+        'vagas_ampla': vagas_ampla,
+        'vagas_cotas': vagas_cotas,
+        'cotista': cotista,
+        'cotista_a_frente': cotista_a_frente,
+        # Cotistas atrás na ampla (sem contar a própria linha)
+        'cotistas_atras': len(reserva['ordem']) - int(np.count_nonzero(cotista_a_frente)) - int(cotista),
+    }
+    if cotista:
+        posicao_cotas = int(reserva['posicao'][linha])
+        cotas_a_frente = cotista_a_frente & (reserva['posicao'][a_frente] < posicao_cotas)
+        perfil['cotas_a_frente'] = cotas_a_frente
+        # À frente nas cotas, mas atrás na ampla
+        perfil['cotas_a_frente_atras'] = posicao_cotas - int(np.count_nonzero(cotas_a_frente))
+    return perfil
+
+def _valor_no_prefixo(acumulado, limites):
+    """Valor da soma acumulada (por linha) nos primeiros limites[i] itens; 0 quando o limite é 0."""
+    valores = acumulado[np.arange(len(limites)), np.maximum(limites - 1, 0)]
+    return np.where(limites > 0, valores, 0)
+
+def avaliar_cenarios(perfil, mantidos, mantidos_atras):
+    """
+    Aplica as regras de convocação (ampla, cotas e remanejamento) a vários cenários de uma vez.
+    mantidos (cenários x candidatos à frente, na ordem ampla) marca quem não desistiu;
+    mantidos_atras traz, por cenário, quantos dos cotistas atrás na ampla (ou, para um
+    cotista, dos que estão à frente nas cotas e atrás na ampla) não desistiram.
+    Retorna o código do resultado de cada cenário.
+    """
+    vagas_ampla, vagas_cotas = perfil['vagas_ampla'], perfil['vagas_cotas']
+    cenarios = len(mantidos)
+    codigos = np.full(cenarios, NAO_CONVOCADO, dtype=np.int8)
+
+    a_frente = mantidos.sum(axis=1)
+    em_ampla = a_frente < vagas_ampla
+    codigos[em_ampla] = CONVOCADO_AMPLA
+    resto = np.flatnonzero(~em_ampla)
+    if len(resto) == 0:
+        return codigos
+    mantidos = mantidos[resto]
+
+    # Corte da ampla em cada cenário: onde os mantidos chegam a vagas_ampla
+    if vagas_ampla > 0:
+        limites = np.argmax(np.cumsum(mantidos, axis=1, dtype=np.int32) >= vagas_ampla, axis=1) + 1
+    else:
+        limites = np.zeros(len(resto), dtype=np.int64)
+
+    if perfil['cotista']:
+        # Cotistas mantidos à frente nas cotas e fora do prefixo da ampla
+        cotas_a_frente = np.cumsum(mantidos & perfil['cotas_a_frente'], axis=1, dtype=np.int32)
+        concorrentes = cotas_a_frente[:, -1] - _valor_no_prefixo(cotas_a_frente, limites) + mantidos_atras[resto]
+        codigos[resto[concorrentes < vagas_cotas]] = CONVOCADO_COTAS
+    else:
+        # Vagas de cotas não preenchidas pelos cotistas mantidos fora do prefixo da ampla
+        cotistas = np.cumsum(mantidos & perfil['cotista_a_frente'], axis=1, dtype=np.int32)
+        cotistas_no_prefixo = _valor_no_prefixo(cotistas, limites)
+        cotistas_restantes = cotistas[:, -1] - cotistas_no_prefixo + mantidos_atras[resto]
+        vagas_remanejadas = np.maximum(vagas_cotas - cotistas_restantes, 0)
+        # Não cotistas mantidos entre o corte da ampla e a linha
+        nao_cotistas = (a_frente[resto] - cotistas[:, -1]) - (vagas_ampla - cotistas_no_prefixo)
+        codigos[resto[nao_cotistas < vagas_remanejadas]] = CONVOCADO_REMANEJADA
+    return codigos
+
+def _contar_lote(perfil, taxa_desistencia, cenarios, semente):
+    """Sorteia um lote de cenários e conta os resultados por código."""
+    rng = np.random.default_rng(semente)
+    mantidos = rng.random((cenarios, len(perfil['cotista_a_frente']))) >= taxa_desistencia
+    atras = perfil['cotas_a_frente_atras'] if perfil['cotista'] else perfil['cotistas_atras']
+    mantidos_atras = rng.binomial(atras, 1 - taxa_desistencia, cenarios)
+    return np.bincount(avaliar_cenarios(perfil, mantidos, mantidos_atras), minlength=4)
+
+def estimar_convocacao(perfil, taxa_desistencia, cenarios, semente=None, executor=None):
+    """
+    Sorteia cenários em que cada um dos demais candidatos desiste com probabilidade
+    taxa_desistencia e conta, por código, em quantos a linha é convocada. Os cenários
+    são avaliados em lotes vetorizados, distribuídos no executor quando informado; cada
+    lote tem sua própria semente derivada, então o resultado depende só da semente.
+    Retorna (contagens por código, entropia da semente usada).
+    """
+    sequencia = np.random.SeedSequence(semente)
+    por_lote = max(CELULAS_POR_LOTE // max(len(perfil['cotista_a_frente']), 1), 1)
+    tamanhos = [min(por_lote, cenarios - inicio) for inicio in range(0, cenarios, por_lote)]
+    sementes = sequencia.spawn(len(tamanhos))
+
+    argumentos = (repeat(perfil), repeat(taxa_desistencia), tamanhos, sementes)
+    if executor is not None and len(tamanhos) > 1:
+        contagens = list(executor.map(_contar_lote, *argumentos))
+    else:
+        contagens = list(map(_contar_lote, *argumentos))
+    return np.sum(contagens, axis=0, dtype=np.int64) if contagens else np.zeros(4, dtype=np.int64), sequencia.entropy
@@ -0,0 +1,139 @@
+import numpy as np
+
+# Módulo sem dependência do app: ordenação das listas de classificação pelas notas e
+# reposicionamento das linhas cujas notas mudaram (recursos), sem reordenar as demais.
+
+# Critérios de classificação, em ordem (maiores notas primeiro); empates seguem a classificação
+# publicada, que já aplica os desempates do edital (outras notas ordenariam os empates de outro modo)
+COLUNAS_DESEMPATE = ['NOTA TOTAL']
+
+# Notas que podem ser alteradas; a nota total (e a objetiva, para as notas objetivas) acompanha a diferença
+COLUNAS_ALTERAVEIS = ['REDAÇÃO', 'CONH. ESP.', 'CONH. BÁS.']
+COLUNAS_OBJETIVAS = ['CONH. ESP.', 'CONH. BÁS.']
+
+def chaves_classificacao(notas, classificacao):
+    """
+    Chaves de ordenação (menor primeiro), uma por critério: linhas sem classificação por último,
+    notas de COLUNAS_DESEMPATE decrescentes (sem nota depois de todas) e a classificação publicada.
+    notas traz um array por coluna de COLUNAS_DESEMPATE, alinhado a classificacao.
+    """
+    classificacao = np.asarray(classificacao, dtype=float)
+    chaves = [np.isnan(classificacao).astype(np.int8)]
+    chaves += [-np.nan_to_num(np.asarray(nota, dtype=float), nan=-np.inf) for nota in notas]
+    chaves.append(np.nan_to_num(classificacao, nan=np.inf))
+    return chaves
+
+class OrdemPorNotas:
+    """
+    Uma lista de classificação (ampla ou de reserva) na ordem publicada, com as chaves guardadas na
+    ordem e também ordenadas, para a busca binária. Alterações de notas são aplicadas retirando as
+    linhas alteradas e inserindo-as na posição encontrada pela busca; as demais linhas mantêm a ordem
+    relativa e a posição de cada uma muda apenas pela quantidade de alteradas que passaram à sua
+    frente ou deixaram de estar. Sem mudança de notas, a ordem é a publicada. Onde as notas contradizem
+    a classificação publicada (divergencias), a posição de uma alterada pode ser ambígua.
+    """
+    def __init__(self, linhas, chaves, total):
+        chaves_linhas = [chave[linhas] for chave in chaves]
+        # Ordem publicada (sem classificação por último, na ordem das linhas), como a do índice
+        self.ordem = linhas[np.argsort(chaves_linhas[-1], kind="stable")]
+        self.chaves = [chave[self.ordem] for chave in chaves]
+        self.posicao = np.full(total, -1, dtype=np.int64)
+        self.posicao[self.ordem] = np.arange(len(self.ordem))
+
+        # Chaves ordenadas e, para cada linha da ordem, quantas chaves são menores que a sua
+        ordenacao = np.lexsort(self.chaves[::-1])
+        self._ordenadas = [chave[ordenacao] for chave in self.chaves]
+        inicio_grupo = np.ones(len(ordenacao), dtype=bool)
+        if len(ordenacao):
+            inicio_grupo[1:] = np.any([np.diff(chave) != 0 for chave in self._ordenadas], axis=0)
+        self.postos = np.empty(len(ordenacao), dtype=np.int64)
+        self.postos[ordenacao] = np.maximum.accumulate(np.where(inicio_grupo, np.arange(len(ordenacao)), 0))
+
+        # Linhas classificadas com alguma chave maior antes delas na ordem publicada
+        classificadas = self.postos[self.chaves[0] == 0]
+        self.divergencias = int(np.count_nonzero(classificadas[1:] < np.maximum.accumulate(classificadas)[:-1]))
+
+    def _buscar(self, chave):
+        """Quantas linhas da ordem têm chave menor que a informada (busca binária, comparação lexicográfica)."""
+        inicio, fim = 0, len(self.ordem)
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            if tuple(valores[meio] for valores in self._ordenadas) < chave:
+                inicio = meio + 1
+            else:
+                fim = meio
+        return inicio
+
+    def reposicionar(self, linhas, novas_chaves):
+        """
+        Nova ordem depois de alterar as chaves das linhas informadas (as que não pertencem à lista
+        são ignoradas). novas_chaves traz uma tupla por linha, no formato de chaves_classificacao.
+        Linhas sem mudança de chave ou sem classificação mantêm o lugar. Retorna (nova ordem, linhas
+        ambíguas): as que não têm um ponto da ordem com todas as chaves menores antes e nenhuma menor
+        depois, o que só acontece onde as notas divergem da classificação publicada.
+        """
+        linhas = np.asarray(linhas, dtype=np.int64)
+        na_lista = np.flatnonzero(self.posicao[linhas] >= 0)
+        if len(na_lista) == 0:
+            return self.ordem, linhas[:0]
+        linhas = linhas[na_lista]
+        novas_chaves = [novas_chaves[i] for i in na_lista]
+
+        # Maior posto antes e menor posto depois de cada ponto da ordem sem as alteradas
+        retiradas = np.sort(self.posicao[linhas])
+        postos = np.delete(self.postos, retiradas)
+        maximo_antes = np.maximum.accumulate(postos)
+        minimo_depois = np.minimum.accumulate(postos[::-1])[::-1]
+
+        destinos = np.empty(len(linhas), dtype=np.int64)
+        ambiguas = []
+        for i, (linha, chave) in enumerate(zip(linhas, novas_chaves)):
+            posicao = self.posicao[linha]
+            if chave[0] or chave == tuple(valores[posicao] for valores in self.chaves):
+                destinos[i] = posicao - np.searchsorted(retiradas, posicao)
+                continue
+            # Posição de inserção: depois de todas as chaves menores que a nova
+            menores = self._buscar(chave)
+            destinos[i] = np.searchsorted(maximo_antes, menores, side="left")
+            if destinos[i] < len(postos) and minimo_depois[destinos[i]] < menores:
+                ambiguas.append(linha)
+
+        # Alteradas que caem no mesmo ponto entram na ordem das suas chaves
+        insercao = sorted(range(len(linhas)), key=lambda i: (destinos[i], novas_chaves[i]))
+        nova_ordem = np.insert(np.delete(self.ordem, retiradas), destinos[insercao], linhas[insercao])
+        return nova_ordem, np.array(ambiguas, dtype=np.int64)
+
+    def classificacoes(self, nova_ordem, classificacao, linhas):
+        """
+        Classificação estimada depois do reposicionamento: cada linha não alterada soma à publicada
+        o quanto andou na ordem; cada alterada mantém a publicada se ela ainda cabe entre as vizinhas
+        e, se não, assume a classificação logo antes da linha seguinte (ou logo depois da anterior, no
+        fim da lista). Candidatos fora do índice (por exemplo, já convocados) não entram na conta.
+        Linhas sem classificação continuam sem.
+        """
+        classificacao = np.asarray(classificacao, dtype=float)
+        nova = classificacao.copy()
+        nova[nova_ordem] = classificacao[nova_ordem] + (np.arange(len(nova_ordem)) - self.posicao[nova_ordem])
+
+        posicoes = np.flatnonzero(np.isin(nova_ordem, linhas) & ~np.isnan(classificacao[nova_ordem]))
+        nova[nova_ordem[posicoes]] = np.nan
+        sem_seguinte = []
+        for posicao in posicoes[::-1]:
+            seguinte = nova[nova_ordem[posicao + 1]] if posicao + 1 < len(nova_ordem) else np.nan
+            anterior = nova[nova_ordem[posicao - 1]] if posicao > 0 else 0
+            publicada = classificacao[nova_ordem[posicao]]
+            if not publicada < anterior and not publicada > seguinte:
+                # Comparações com NaN (vizinha alterada ainda sem estimativa ou fim da lista) são falsas
+                nova[nova_ordem[posicao]] = publicada
+            elif np.isnan(seguinte):
+                sem_seguinte.append(posicao)
+            else:
+                nova[nova_ordem[posicao]] = seguinte - 1
+        for posicao in sem_seguinte[::-1]:
+            nova[nova_ordem[posicao]] = nova[nova_ordem[posicao - 1]] + 1 if posicao > 0 else 1
+
+        # Estimativas de alteradas vizinhas podem se cruzar: a classificação passa a crescer com a nova ordem
+        classificadas = nova_ordem[~np.isnan(nova[nova_ordem])]
+        passos = np.arange(len(classificadas))
+        nova[classificadas] = np.maximum.accumulate(nova[classificadas] - passos) + passos
+        return nova
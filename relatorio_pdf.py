@@ -0,0 +1,184 @@
+import logging
+from io import BytesIO
+
+import numpy as np
+from reportlab.lib.pagesizes import landscape, A4
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm, mm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# Módulo sem dependência do app: pode ser importado pelos processos que renderizam PDFs
+# em segundo plano sem carregar os dados dos candidatos.
+
+logger = logging.getLogger("simulador")
+
+# Linhas de convocados por bloco de tabela no PDF (aproximadamente uma página)
+LINHAS_POR_BLOCO_PDF = 25
+
+def registrar_fontes():
+    """Registra a fonte Arial, se disponível; caso contrário o PDF usa Helvetica."""
+    try:
+        pdfmetrics.registerFont(TTFont('Arial', 'Arial.ttf'))
+    except:
+        logger.warning("Fonte Arial não encontrada. Usando Helvetica como alternativa.")
+
+def renderizar_lista_convocados(dados):
+    """
+    Renderiza em memória o PDF com a lista de convocados e retorna seus bytes.
+    dados traz apenas o necessário (e pode ser enviado a outro processo): data_geracao,
+    as quantidades de convocados por tipo (ampla, cotas, remanejada), cotistas_na_ampla e,
+    para cada convocado na ordem de convocação, inscricoes, nomes, tipos, clas_ampla,
+    clas_cotas e observacoes.
+    """
+    buffer = BytesIO()
+
+    # Configurar o documento
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(A4),
+        rightMargin=1.5*cm,    # Reduzindo as margens para aproveitar melhor o espaço A4
+        leftMargin=1.5*cm,
+        topMargin=1.5*cm,
+        bottomMargin=1.5*cm
+    )
+
+    fontes_registradas = pdfmetrics.getRegisteredFontNames()
+    fonte = 'Arial' if 'Arial' in fontes_registradas else 'Helvetica'
+    fonte_negrito = 'Arial-Bold' if 'Arial-Bold' in fontes_registradas else 'Helvetica-Bold'
+
+    # Estilos para o documento
+    styles = getSampleStyleSheet()
+    titulo_style = ParagraphStyle(
+        'TituloStyle',
+        parent=styles['Heading1'],
+        fontName=fonte,
+        fontSize=16,
+        alignment=1,  # Centralizado
+        spaceAfter=10
+    )
+
+    subtitulo_style = ParagraphStyle(
+        'SubtituloStyle',
+        parent=styles['Heading2'],
+        fontName=fonte,
+        fontSize=12,
+        alignment=1,
+        spaceAfter=5
+    )
+
+    normal_style = ParagraphStyle(
+        'NormalStyle',
+        parent=styles['Normal'],
+        fontName=fonte,
+        fontSize=12,
+        alignment=0  # Esquerda
+    )
+
+    # Elementos do documento
+    elementos = []
+
+    # Título do documento
+    titulo = Paragraph("POLÍCIA MILITAR DO DISTRITO FEDERAL", titulo_style)
+    elementos.append(titulo)
+    elementos.append(Spacer(1, 5*mm))
+
+    subtitulo = Paragraph("Lista de Convocados para o Curso de Formação", subtitulo_style)
+    elementos.append(subtitulo)
+    elementos.append(Spacer(1, 3*mm))
+
+    data_geracao = Paragraph(f"Gerado em: {dados['data_geracao']}", normal_style)
+    elementos.append(data_geracao)
+    elementos.append(Spacer(1, 10*mm))
+
+    # Estatísticas sobre as vagas
+    convocados_ampla_regular = dados['convocados_ampla']
+    convocados_ampla_remanejada = dados['convocados_remanejada']
+    convocados_cotas = dados['convocados_cotas']
+    cotistas_na_ampla = dados['cotistas_na_ampla']
+    total_vagas = convocados_ampla_regular + convocados_cotas + convocados_ampla_remanejada
+
+    # Criar resumo estatístico
+    elementos.append(Paragraph("Resumo da simulação:", subtitulo_style))
+    elementos.append(Spacer(1, 3*mm))
+
+    elementos.append(Paragraph(f"• Total de convocados: {total_vagas} candidatos", normal_style))
+    elementos.append(Paragraph(f"• Convocados pela ampla concorrência: {convocados_ampla_regular + convocados_ampla_remanejada}", normal_style))
+    elementos.append(Paragraph(f"  - Sendo {cotistas_na_ampla} cotistas aprovados pela ampla", normal_style))
+    if convocados_ampla_remanejada > 0:
+        elementos.append(Paragraph(f"  - Sendo {convocados_ampla_remanejada} por remanejamento de vagas de cotas não preenchidas", normal_style))
+    elementos.append(Paragraph(f"• Convocados pelas cotas: {convocados_cotas}", normal_style))
+    elementos.append(Paragraph(f"• Total de cotistas convocados: {cotistas_na_ampla + convocados_cotas}", normal_style))
+
+    elementos.append(Spacer(1, 10*mm))
+
+    # Definir cores personalizadas para a tabela
+    cor_ampla = colors.Color(0.85, 0.95, 0.85)   # Verde claro
+    cor_cotas = colors.Color(0.95, 0.9, 0.8)     # Marrom claro (pardo)
+    cor_remanejada = colors.Color(0.9, 0.9, 1.0)  # Azul bem claro para vagas remanejadas
+    cor_cabecalho = colors.Color(0.2, 0.2, 0.7)  # Azul escuro para o cabeçalho
+
+    # Preparação dos dados para a tabela
+    colunas = ['Nº', 'Inscrição', 'Nome do Candidato', 'Tipo de Vaga', 'Class. Ampla', 'Class. Cotas', 'Observação']
+
+    # Ajustar o tamanho das colunas para melhor utilização do espaço A4
+    larguras_colunas = [1.0*cm, 2.5*cm, 10*cm, 4*cm, 2*cm, 2*cm, 6*cm]
+
+    # Linhas da tabela na ordem de convocação: ampla, cotas e remanejadas (cada tipo é contíguo)
+    clas_ampla = dados['clas_ampla']
+    clas_cotas = dados['clas_cotas']
+    dados_tabela = [
+        [
+            i + 1,
+            inscricao,
+            nome,
+            tipo,
+            "-" if np.isnan(clas_ampla[i]) else int(clas_ampla[i]),
+            "-" if np.isnan(clas_cotas[i]) else int(clas_cotas[i]),
+            observacao
+        ]
+        for i, (inscricao, nome, tipo, observacao) in enumerate(zip(dados['inscricoes'], dados['nomes'], dados['tipos'], dados['observacoes']))
+    ]
+
+    # Faixas de cor por tipo de vaga, em coordenadas da lista completa
+    faixas = [
+        (0, convocados_ampla_regular, cor_ampla),
+        (convocados_ampla_regular, convocados_ampla_regular + convocados_cotas, cor_cotas),
+        (convocados_ampla_regular + convocados_cotas, total_vagas, cor_remanejada),
+    ]
+
+    # Estilo comum a todos os blocos da tabela
+    estilo_base = [
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]
+    estilo_cabecalho = [
+        ('BACKGROUND', (0, 0), (-1, 0), cor_cabecalho),  # Cabeçalho azul
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), fonte_negrito),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ]
+
+    # Dividir a tabela em blocos do tamanho de uma página, evitando que o layout
+    # precise quebrar repetidamente uma única tabela gigante
+    for inicio in range(0, len(dados_tabela), LINHAS_POR_BLOCO_PDF):
+        fim = min(inicio + LINHAS_POR_BLOCO_PDF, len(dados_tabela))
+        bloco = dados_tabela[inicio:fim]
+        deslocamento = 0
+        estilo = list(estilo_base)
+        if inicio == 0:
+            bloco = [colunas] + bloco
+            deslocamento = 1
+            estilo += estilo_cabecalho
+
+        for faixa_inicio, faixa_fim, cor in faixas:
+            a, b = max(faixa_inicio, inicio), min(faixa_fim, fim)
+            if a < b:
+                estilo.append(('BACKGROUND', (0, a - inicio + deslocamento), (-1, b - 1 - inicio + deslocamento), cor))
+
+        elementos.append(Table(bloco, colWidths=larguras_colunas, style=TableStyle(estilo)))
+
+    doc.build(elementos)
+    return buffer.getvalue()
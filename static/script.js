@@ -1,7 +1,47 @@
+// Busca por nome enquanto o usuário digita: espera uma pausa na digitação e ignora respostas antigas
+let temporizadorBusca = null;
+let ultimaBusca = 0;
+
+function buscarNome() {
+    clearTimeout(temporizadorBusca);
+    temporizadorBusca = setTimeout(async () => {
+        const consulta = document.getElementById("busca_nome").value.trim();
+        const sugestoes = document.getElementById("sugestoes_nomes");
+        if (consulta.length < 2 || /^\d+$/.test(consulta)) {
+            sugestoes.innerHTML = "";
+            return;
+        }
+
+        const busca = ++ultimaBusca;
+        const response = await fetch(`/buscar?q=${encodeURIComponent(consulta)}`);
+        const data = await response.json();
+        if (busca !== ultimaBusca || data.erro) {
+            return;
+        }
+
+        sugestoes.innerHTML = "";
+        for (const candidato of data.candidatos) {
+            const opcao = document.createElement("option");
+            opcao.value = candidato.inscricao;
+            opcao.label = `${candidato.nome} (Ampla: ${candidato.classificacao_ampla ?? "-"}, Cotas: ${candidato.classificacao_cotas ?? "-"})`;
+            sugestoes.appendChild(opcao);
+        }
+    }, 150);
+}
+
+function selecionarNome() {
+    // Ao escolher uma sugestão, o campo recebe a inscrição, que é copiada para o campo de inscrição
+    const valor = document.getElementById("busca_nome").value.trim();
+    if (/^\d+$/.test(valor)) {
+        document.getElementById("inscricao").value = valor;
+    }
+}
+
 async function simularConvocacao() {
     const inscricao = document.getElementById("inscricao").value.trim(); // Adicionar .trim()
     const totalVagas = document.getElementById("total_vagas").value; // Pegar o valor do total de vagas
     const desconsiderarSubJudice = document.getElementById("desconsiderar_sub_judice").checked; // Captura o estado do checkbox
+    const desistentes = document.getElementById("desistentes").value;
     const resultadoDiv = document.getElementById("resultado");
     const mensagemConvocacao = document.getElementById("mensagem-convocacao");
     const mensagemAjudaDiv = document.getElementById("mensagem-ajuda");
@@ -16,7 +56,8 @@ async function simularConvocacao() {
         body: JSON.stringify({
             inscricao: inscricao,
             total_vagas: totalVagas,
-            desconsiderar_sub_judice: desconsiderarSubJudice // Envia o estado do checkbox
+            desconsiderar_sub_judice: desconsiderarSubJudice, // Envia o estado do checkbox
+            desistentes: desistentes
         })
     });
 
@@ -31,12 +72,191 @@ async function simularConvocacao() {
     mensagemAjudaDiv.classList.remove('mensagem-ajuda-oculto');
 }
 
+async function consultarVagasMinimas() {
+    const inscricao = document.getElementById("inscricao").value.trim();
+    const desconsiderarSubJudice = document.getElementById("desconsiderar_sub_judice").checked;
+    const resultadoDiv = document.getElementById("resultado");
+    const mensagemConvocacao = document.getElementById("mensagem-convocacao");
+
+    if (!inscricao) {
+        alert("Por favor, insira o número de inscrição.");
+        return;
+    }
+
+    const response = await fetch(`/limiar/${encodeURIComponent(inscricao)}?desconsiderar_sub_judice=${desconsiderarSubJudice}`);
+    const data = await response.json();
+
+    console.log("Resposta do servidor (vagas mínimas):", data);
+
+    if (data.erro) {
+        mensagemConvocacao.textContent = data.erro;
+    } else {
+        document.getElementById("total_vagas").value = data.vagas_minimas;
+        mensagemConvocacao.textContent = `${data.nome} é convocado(a) a partir de ${data.vagas_minimas} vagas (${data.tipo}).`;
+    }
+
+    resultadoDiv.classList.remove('resultado-oculto');
+}
+
+async function estimarProbabilidade() {
+    const inscricao = document.getElementById("inscricao").value.trim();
+    const totalVagas = document.getElementById("total_vagas").value;
+    const desconsiderarSubJudice = document.getElementById("desconsiderar_sub_judice").checked;
+    const taxaDesistencia = parseFloat(document.getElementById("taxa_desistencia").value) / 100;
+    const resultadoDiv = document.getElementById("resultado");
+    const mensagemConvocacao = document.getElementById("mensagem-convocacao");
+
+    if (!inscricao) {
+        alert("Por favor, insira o número de inscrição.");
+        return;
+    }
+
+    const response = await fetch('/probabilidade', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            inscricao: inscricao,
+            total_vagas: totalVagas,
+            taxa_desistencia: taxaDesistencia,
+            desconsiderar_sub_judice: desconsiderarSubJudice
+        })
+    });
+    const data = await response.json();
+
+    console.log("Resposta do servidor (probabilidade):", data);
+
+    if (data.erro) {
+        mensagemConvocacao.textContent = data.erro;
+    } else {
+        const percentual = (data.probabilidade * 100).toFixed(1);
+        const margem = (1.96 * data.erro_padrao * 100).toFixed(1);
+        mensagemConvocacao.textContent = `${data.nome}: probabilidade de convocação de ${percentual}% (± ${margem} p.p.) com ${data.total_vagas} vagas e ${(data.taxa_desistencia * 100).toFixed(1)}% de desistência (${data.cenarios} cenários).`;
+    }
+
+    resultadoDiv.classList.remove('resultado-oculto');
+}
+
+async function simularRecurso() {
+    const inscricao = document.getElementById("inscricao").value.trim();
+    const totalVagas = document.getElementById("total_vagas").value;
+    const desconsiderarSubJudice = document.getElementById("desconsiderar_sub_judice").checked;
+    const desistentes = document.getElementById("desistentes").value;
+    const novaRedacao = document.getElementById("nova_redacao").value;
+    const resultadoDiv = document.getElementById("resultado");
+    const mensagemConvocacao = document.getElementById("mensagem-convocacao");
+
+    if (!inscricao || novaRedacao === "") {
+        alert("Por favor, insira o número de inscrição e a nova nota de redação.");
+        return;
+    }
+
+    const response = await fetch('/reclassificar', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            inscricao: inscricao,
+            total_vagas: totalVagas,
+            desconsiderar_sub_judice: desconsiderarSubJudice,
+            desistentes: desistentes,
+            alteracoes: [{ inscricao: inscricao, "REDAÇÃO": parseFloat(novaRedacao) }]
+        })
+    });
+    const data = await response.json();
+
+    console.log("Resposta do servidor (reclassificação):", data);
+
+    if (data.erro) {
+        mensagemConvocacao.textContent = data.erro;
+    } else {
+        const alteracao = data.alteracoes[0];
+        mensagemConvocacao.textContent = `${data.resultado} (Classificação ampla estimada: ${alteracao.antes["CLAS. AMPLA"]} → ${alteracao.depois["CLAS. AMPLA"]})`;
+    }
+
+    resultadoDiv.classList.remove('resultado-oculto');
+}
+
+async function projetarRodadas() {
+    const inscricao = document.getElementById("inscricao").value.trim();
+    const rodadas = document.getElementById("rodadas_projetadas").value;
+    const desconsiderarSubJudice = document.getElementById("desconsiderar_sub_judice").checked;
+    const resultadoDiv = document.getElementById("resultado");
+    const mensagemConvocacao = document.getElementById("mensagem-convocacao");
+
+    const response = await fetch('/linha_do_tempo/projetar', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            rodadas: rodadas,
+            inscricao: inscricao,
+            desconsiderar_sub_judice: desconsiderarSubJudice
+        })
+    });
+    const data = await response.json();
+
+    console.log("Resposta do servidor (projeção de rodadas):", data);
+
+    if (data.erro) {
+        mensagemConvocacao.textContent = data.erro;
+    } else if (!inscricao) {
+        mensagemConvocacao.textContent = `Projeção de ${data.rodadas.length} rodadas de ${data.tamanho} vagas a partir da rodada ${data.a_partir_da_rodada}.`;
+    } else if (data.rodada_candidato) {
+        mensagemConvocacao.textContent = `Com rodadas de ${data.tamanho} vagas, a inscrição ${inscricao} seria convocada na rodada ${data.rodada_candidato} (${data.rodada_candidato - data.a_partir_da_rodada}ª rodada a partir de hoje).`;
+    } else {
+        mensagemConvocacao.textContent = `Com rodadas de ${data.tamanho} vagas, a inscrição ${inscricao} não seria convocada nas próximas ${data.rodadas.length} rodadas.`;
+    }
+
+    resultadoDiv.classList.remove('resultado-oculto');
+}
+
 async function gerarPDF() {
     const inscricao = document.getElementById("inscricao").value;
     const totalVagas = document.getElementById("total_vagas").value;
-    if (inscricao) {
-        window.open(`/gerar_pdf/${inscricao}?total_vagas=${totalVagas}`, '_blank');
-    } else {
+    const desconsiderarSubJudice = document.getElementById("desconsiderar_sub_judice").checked;
+    const desistentes = document.getElementById("desistentes").value;
+    if (!inscricao) {
         alert("Por favor, insira o número de inscrição antes de gerar o PDF.");
+        return;
     }
-}
\ No newline at end of file
+
+    // O PDF é gerado em segundo plano: cria a tarefa e consulta o estado até ela terminar
+    const response = await fetch('/pdf/tarefas', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            total_vagas: totalVagas,
+            desconsiderar_sub_judice: desconsiderarSubJudice,
+            desistentes: desistentes
+        })
+    });
+    let tarefa = await response.json();
+
+    while (tarefa.estado === 'pendente') {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        tarefa = await (await fetch(tarefa.url_estado)).json();
+    }
+
+    if (tarefa.estado === 'concluida') {
+        window.location.href = tarefa.url_download;
+    } else {
+        alert(tarefa.erro || "Não foi possível gerar o PDF.");
+    }
+}
+
+function baixarCSV() {
+    // Lista completa de convocados do cenário, gerada em streaming pelo servidor
+    const parametros = new URLSearchParams({
+        total_vagas: document.getElementById("total_vagas").value,
+        desconsiderar_sub_judice: document.getElementById("desconsiderar_sub_judice").checked,
+        desistentes: document.getElementById("desistentes").value,
+        formato: "csv"
+    });
+    window.location.href = `/convocados?${parametros}`;
+}
@@ -0,0 +1,283 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Teste de carga de ponta a ponta das rotas /simular e /gerar_pdf: sobe o app no próprio
+# processo (servidor WSGI em uma thread) ou usa um servidor local já iniciado (--url), repete
+# uma mistura de inscrições, vagas e Sub Judice tirada dos dados do próprio servidor e mede
+# latência, erros e a memória (RSS do servidor e arquivos de PDF gravados em disco) ao longo do tempo.
+
+# Frações dos candidatos não convocados usadas como total de vagas quando --vagas não é informado
+FRACOES_VAGAS_PADRAO = [0.01, 0.05, 0.1, 0.25]
+
+# Fração das consultas feitas por candidatos perto do corte da ampla (os demais são sorteados entre todos)
+FRACAO_PERTO_DO_CORTE = 0.7
+
+# Percentis de latência informados
+PERCENTIS = [50, 90, 99]
+
+# Total de vagas que convoca todos os candidatos pela ampla: o CSV de /convocados sai na ordem da ampla
+VAGAS_TODOS_CANDIDATOS = 10**9
+
+def memoria_rss(pid):
+    """Memória residente (bytes) do processo, lida de /proc; None fora do Linux ou sem acesso."""
+    try:
+        with open(f"/proc/{pid}/status", 'r', encoding='utf-8') as f:
+            for linha in f:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+def ocupacao_diretorio(diretorio):
+    """Quantidade de arquivos e soma dos tamanhos (bytes) em um diretório, incluindo subdiretórios."""
+    arquivos, tamanho = 0, 0
+    for raiz, _, nomes in os.walk(diretorio):
+        for nome in nomes:
+            try:
+                tamanho += os.path.getsize(os.path.join(raiz, nome))
+                arquivos += 1
+            except OSError:
+                continue
+    return arquivos, tamanho
+
+def inscricoes_do_servidor(url_base, tempo_limite):
+    """
+    Inscrições dos candidatos não convocados, na ordem da ampla, lidas do CSV de /convocados do
+    próprio servidor com vagas para todos: a mistura não depende de carregar os dados neste processo.
+    """
+    parametros = urllib.parse.urlencode({'total_vagas': VAGAS_TODOS_CANDIDATOS, 'formato': 'csv'})
+    with urllib.request.urlopen(f"{url_base}/convocados?{parametros}", timeout=tempo_limite) as resposta:
+        linhas = csv.DictReader(io.TextIOWrapper(resposta, encoding='utf-8'))
+        return [linha['INSCRIÇÃO'] for linha in linhas]
+
+def gerar_requisicoes(inscricoes_ampla, quantidade, lista_vagas, fracao_pdf, fracao_sub_judice, semente):
+    """
+    Sorteia a sequência de requisições: para cada uma, a rota, o total de vagas (entre lista_vagas),
+    a marcação de Sub Judice e uma inscrição (de inscricoes_ampla, na ordem da ampla), na maior parte
+    das vezes de um candidato perto do corte da ampla para aquele total de vagas, que é quem mais consulta.
+    """
+    rng = random.Random(semente)
+    requisicoes = []
+    for _ in range(quantidade):
+        total_vagas = rng.choice(lista_vagas)
+        if rng.random() < FRACAO_PERTO_DO_CORTE:
+            margem = max(total_vagas // 10, 1)
+            posicao = min(max(total_vagas + rng.randint(-margem, margem), 0), len(inscricoes_ampla) - 1)
+        else:
+            posicao = rng.randrange(len(inscricoes_ampla))
+        requisicoes.append({
+            'rota': '/gerar_pdf' if rng.random() < fracao_pdf else '/simular',
+            'inscricao': inscricoes_ampla[posicao],
+            'total_vagas': total_vagas,
+            'desconsiderar_sub_judice': rng.random() < fracao_sub_judice,
+        })
+    return requisicoes
+
+def enviar(url_base, requisicao, tempo_limite):
+    """Envia uma requisição e retorna (rota, latência em segundos, erro ou None)."""
+    if requisicao['rota'] == '/simular':
+        corpo = json.dumps({
+            'inscricao': requisicao['inscricao'],
+            'total_vagas': requisicao['total_vagas'],
+            'desconsiderar_sub_judice': requisicao['desconsiderar_sub_judice'],
+        }).encode('utf-8')
+        pedido = urllib.request.Request(f"{url_base}/simular", data=corpo, headers={'Content-Type': 'application/json'})
+    else:
+        parametros = urllib.parse.urlencode({
+            'total_vagas': requisicao['total_vagas'],
+            'desconsiderar_sub_judice': str(requisicao['desconsiderar_sub_judice']).lower(),
+        })
+        pedido = urllib.request.Request(f"{url_base}/gerar_pdf/{urllib.parse.quote(requisicao['inscricao'])}?{parametros}")
+
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        with urllib.request.urlopen(pedido, timeout=tempo_limite) as resposta:
+            conteudo = resposta.read()
+            tipo = resposta.headers.get('Content-Type', '')
+        # As rotas respondem 200 com {'erro': ...} em caso de falha
+        if tipo.startswith('application/json') and 'erro' in json.loads(conteudo):
+            erro = 'erro_na_resposta'
+        elif requisicao['rota'] == '/gerar_pdf' and not conteudo.startswith(b'%PDF'):
+            erro = 'pdf_invalido'
+    except urllib.error.HTTPError as e:
+        erro = f'http_{e.code}'
+    except Exception as e:
+        erro = type(e).__name__
+    return requisicao['rota'], time.perf_counter() - inicio, erro
+
+class AmostradorMemoria:
+    """Registra periodicamente, em uma thread, o RSS do servidor e a ocupação dos diretórios de PDFs."""
+    def __init__(self, pid, diretorios, intervalo):
+        self.pid = pid
+        self.diretorios = diretorios
+        self.intervalo = intervalo
+        self.amostras = []
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="amostrador-memoria", daemon=True)
+        self._inicio = None
+
+    def amostrar(self):
+        amostra = {'tempo_s': time.perf_counter() - self._inicio, 'rss_mb': None}
+        rss = memoria_rss(self.pid) if self.pid else None
+        if rss is not None:
+            amostra['rss_mb'] = rss / 2**20
+        for diretorio in self.diretorios:
+            arquivos, tamanho = ocupacao_diretorio(diretorio)
+            amostra[diretorio] = {'arquivos': arquivos, 'mb': tamanho / 2**20}
+        self.amostras.append(amostra)
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            self.amostrar()
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        self.amostrar()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *excecao):
+        self._parar.set()
+        self._thread.join()
+        self.amostrar()
+
+def percentil(valores, p):
+    return float(np.percentile(valores, p)) if len(valores) else float('nan')
+
+def executar(url_base, requisicoes, concorrencia, tempo_limite, amostrador):
+    """Envia as requisições com concorrencia clientes simultâneos e resume latência, vazão e erros por rota."""
+    resultados = []
+    with amostrador:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            resultados = list(executor.map(lambda requisicao: enviar(url_base, requisicao, tempo_limite), requisicoes))
+        duracao = time.perf_counter() - inicio
+
+    resumo = []
+    for rota in sorted({rota for rota, _, _ in resultados}) + ['total']:
+        selecionados = [r for r in resultados if rota in ('total', r[0])]
+        latencias = [latencia for _, latencia, _ in selecionados]
+        erros = {}
+        for _, _, erro in selecionados:
+            if erro:
+                erros[erro] = erros.get(erro, 0) + 1
+        linha = {
+            'concorrencia': concorrencia,
+            'rota': rota,
+            'requisicoes': len(selecionados),
+            'vazao_rps': len(selecionados) / duracao if duracao > 0 else float('nan'),
+            'taxa_erros': sum(erros.values()) / len(selecionados),
+            'erros': erros,
+            'maximo_ms': max(latencias) * 1000,
+        }
+        for p in PERCENTIS:
+            linha[f'p{p}_ms'] = percentil(latencias, p) * 1000
+        resumo.append(linha)
+        print(f"{concorrencia:>5} {rota:<12} {linha['requisicoes']:>8} {linha['vazao_rps']:>9.1f} "
+              + ''.join(f"{linha[f'p{p}_ms']:>10.1f}" for p in PERCENTIS)
+              + f"{linha['maximo_ms']:>10.1f} {linha['taxa_erros'] * 100:>8.2f}%", flush=True)
+    return resumo
+
+def mostrar_memoria(amostras, diretorios):
+    """Mostra as amostras de memória e o crescimento entre a primeira e a última."""
+    print(f"\n{'conc.':>5} {'tempo (s)':>10} {'RSS (MB)':>10}" + ''.join(f" {os.path.basename(d.rstrip(os.sep)) or d:>24}" for d in diretorios))
+    for amostra in amostras:
+        rss = f"{amostra['rss_mb']:>10.1f}" if amostra['rss_mb'] is not None else f"{'-':>10}"
+        ocupacao = ''.join(f" {amostra[d]['arquivos']:>8} arq. {amostra[d]['mb']:>9.2f} MB" for d in diretorios)
+        print(f"{amostra.get('concorrencia', ''):>5} {amostra['tempo_s']:>10.1f} {rss}{ocupacao}")
+    primeira, ultima = amostras[0], amostras[-1]
+    if primeira['rss_mb'] is not None and ultima['rss_mb'] is not None:
+        print(f"Crescimento do RSS: {ultima['rss_mb'] - primeira['rss_mb']:+.1f} MB")
+    for diretorio in diretorios:
+        print(f"Crescimento de {diretorio}: {ultima[diretorio]['arquivos'] - primeira[diretorio]['arquivos']:+d} arquivos, "
+              f"{ultima[diretorio]['mb'] - primeira[diretorio]['mb']:+.2f} MB")
+
+def iniciar_servidor(dados):
+    """
+    Sobe o app em um servidor WSGI com threads, neste processo, em uma porta livre; retorna
+    (url, diretório das tarefas de PDF). O app só é importado (e os dados carregados) neste modo.
+    """
+    from werkzeug.serving import make_server
+    import app
+
+    try:
+        sistema = app.obter_sistema(dados)
+    except RuntimeError:
+        raise SystemExit(f"Não foi possível carregar os dados de '{dados or app.caminho_dados_padrao()}'.")
+    servidor = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, name="servidor-teste-carga", daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_port}", sistema.fila_pdfs.diretorio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga de /simular e /gerar_pdf com latência (percentis), erros e memória.")
+    parser.add_argument('--url', help="servidor já iniciado (ex.: http://127.0.0.1:5001); sem ele, o app sobe neste processo")
+    parser.add_argument('--pid', type=int, help="processo do servidor informado em --url, para acompanhar o RSS")
+    parser.add_argument('--dados', help="arquivo JSON ou diretório colunar carregado pelo app iniciado neste processo "
+                                        "(sem --url); padrão: os dados do app")
+    parser.add_argument('--requisicoes', type=int, default=2000, help="requisições por nível de concorrência")
+    parser.add_argument('--concorrencia', type=int, nargs='+', default=[1, 8, 32], help="clientes simultâneos (um teste por valor)")
+    parser.add_argument('--vagas', type=int, nargs='+', help="valores de total_vagas (padrão: frações dos candidatos)")
+    parser.add_argument('--fracao-pdf', type=float, default=0.05, help="fração das requisições feitas a /gerar_pdf")
+    parser.add_argument('--fracao-sub-judice', type=float, default=0.2, help="fração das requisições que desconsideram Sub Judice")
+    parser.add_argument('--diretorios-pdf', nargs='*',
+                        help="diretórios acompanhados na memória em disco (padrão: pdfs/ e, com o app neste processo, "
+                             "o diretório das tarefas de PDF)")
+    parser.add_argument('--intervalo', type=float, default=1.0, help="intervalo (s) entre as amostras de memória")
+    parser.add_argument('--tempo-limite', type=float, default=60.0, help="tempo limite (s) de cada requisição")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help="grava os resultados em JSON")
+    args = parser.parse_args()
+
+    logging.getLogger("simulador").setLevel(logging.ERROR)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    if args.url:
+        if args.dados:
+            parser.error("--dados só vale com o app iniciado neste processo (sem --url)")
+        url_base, pid, diretorio_tarefas = args.url.rstrip('/'), args.pid, None
+    else:
+        url_base, diretorio_tarefas = iniciar_servidor(args.dados)
+        pid = os.getpid()
+
+    diretorios = args.diretorios_pdf
+    if diretorios is None:
+        diretorios = ['pdfs'] + ([diretorio_tarefas] if diretorio_tarefas else [])
+    diretorios = [diretorio for diretorio in diretorios if os.path.isdir(diretorio)]
+
+    inscricoes_ampla = inscricoes_do_servidor(url_base, args.tempo_limite)
+    if not inscricoes_ampla:
+        raise SystemExit(f"O servidor {url_base} não retornou candidatos para montar a mistura de requisições.")
+    lista_vagas = args.vagas or sorted({max(int(len(inscricoes_ampla) * fracao), 1) for fracao in FRACOES_VAGAS_PADRAO})
+    print(f"Servidor: {url_base} | candidatos: {len(inscricoes_ampla)} | vagas: {lista_vagas} | PDF: {args.fracao_pdf:.0%} | "
+          f"Sub Judice: {args.fracao_sub_judice:.0%}\n")
+    print(f"{'conc.':>5} {'rota':<12} {'requisições':>8} {'req/s':>9}" + ''.join(f"{f'p{p} (ms)':>10}" for p in PERCENTIS)
+          + f"{'máx. (ms)':>10} {'erros':>9}")
+
+    resumo, amostras = [], []
+    for numero, concorrencia in enumerate(args.concorrencia):
+        requisicoes = gerar_requisicoes(inscricoes_ampla, args.requisicoes, lista_vagas, args.fracao_pdf, args.fracao_sub_judice,
+                                        args.semente + numero)
+        amostrador = AmostradorMemoria(pid, diretorios, args.intervalo)
+        resumo += executar(url_base, requisicoes, concorrencia, args.tempo_limite, amostrador)
+        amostras += [{**amostra, 'concorrencia': concorrencia} for amostra in amostrador.amostras]
+
+    mostrar_memoria(amostras, diretorios)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'parametros': vars(args), 'resultados': resumo, 'memoria': amostras}, f, ensure_ascii=False, indent=4)
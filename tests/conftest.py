@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Os módulos do simulador ficam na raiz do repositório (layout plano, sem pacote)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gerar_dados_sinteticos import gerar_candidatos, gravar_json
+from app import IndiceClassificacao, SistemaConvocacao
+
+@pytest.fixture(scope="session")
+def candidatos():
+    """Candidatos sintéticos (valores textuais, como no arquivo real), os mesmos em todos os testes."""
+    return gerar_candidatos(3000, semente=7)
+
+@pytest.fixture(scope="session")
+def arquivo_json(candidatos, tmp_path_factory):
+    caminho = tmp_path_factory.mktemp("dados") / "candidatos.json"
+    gravar_json(candidatos, str(caminho))
+    return str(caminho)
+
+@pytest.fixture
+def sistema(arquivo_json):
+    sistema = SistemaConvocacao(arquivo_json)
+    assert sistema.carregar_dados()
+    return sistema
+
+def indice_aleatorio(rng, total, listas=("CLAS. COTAS",), fracoes=None):
+    """
+    Índice com classificação ampla aleatória e, para cada coluna de listas, uma lista de reserva
+    com uma fração aleatória dos candidatos (classificação aleatória entre os membros).
+    """
+    colunas = {
+        'INSCRIÇÃO': np.array([f"{i:06d}" for i in range(total)], dtype=object),
+        'NOME': np.array([f"Candidato {i}" for i in range(total)], dtype=object),
+        'CLAS. AMPLA': (rng.permutation(total) + 1).astype(float),
+    }
+    for k, coluna in enumerate(listas):
+        fracao = rng.random() if fracoes is None else fracoes[k]
+        classificacao = np.full(total, np.nan)
+        membros = np.flatnonzero(rng.random(total) < fracao)
+        classificacao[membros] = rng.permutation(len(membros)) + 1
+        colunas[coluna] = classificacao
+    if "CLAS. COTAS" not in colunas:
+        colunas["CLAS. COTAS"] = np.full(total, np.nan)
+    return IndiceClassificacao(colunas)
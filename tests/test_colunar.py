@@ -0,0 +1,74 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app import SistemaConvocacao
+from converter_csv_para_json import ARQUIVO_ESQUEMA, COLUNA_SUB_JUDICE, COLUNAS_NUMERICAS, gravar_colunar, ler_colunar
+
+@pytest.fixture
+def diretorio_colunar(candidatos, tmp_path):
+    diretorio = str(tmp_path / "candidatos.colunar")
+    gravar_colunar(candidatos, diretorio)
+    return diretorio
+
+def test_ida_e_volta(candidatos, diretorio_colunar):
+    colunas = ler_colunar(diretorio_colunar)
+    assert set(colunas) == set(candidatos) | {COLUNA_SUB_JUDICE}
+    for nome, valores in candidatos.items():
+        if nome in COLUNAS_NUMERICAS:
+            esperado = np.array([float(valor) if valor else np.nan for valor in valores])
+            np.testing.assert_array_equal(colunas[nome], esperado)
+        else:
+            assert colunas[nome].tolist() == valores
+
+    apenas = ler_colunar(diretorio_colunar, colunas={'NOME', 'CLAS. AMPLA', 'INEXISTENTE'})
+    assert set(apenas) == {'NOME', 'CLAS. AMPLA'}
+
+def test_carga_colunar_igual_a_json(sistema, diretorio_colunar):
+    colunar = SistemaConvocacao(diretorio_colunar)
+    assert colunar.carregar_dados()
+    assert colunar.indice.total == sistema.indice.total
+    for nome, valores in colunar.indice.colunas.items():
+        esperado = sistema.indice.colunas[nome]
+        if np.asarray(valores).dtype.kind == 'f':
+            np.testing.assert_array_equal(valores, esperado)
+        else:
+            assert np.asarray(valores).astype(str).tolist() == np.asarray(esperado).astype(str).tolist(), nome
+
+    # Só as colunas usadas são carregadas
+    assert 'OBS.' not in colunar.indice.colunas and 'LP' not in colunar.indice.colunas
+    for total_vagas in (10, 500, 1700):
+        inscricao = sistema.indice.inscricoes[sistema.indice.ordem_ampla[total_vagas]]
+        assert colunar.simular_convocacao(inscricao, total_vagas) == sistema.simular_convocacao(inscricao, total_vagas)
+        assert colunar.vagas_minimas(inscricao) == sistema.vagas_minimas(inscricao)
+
+def test_versao_dados_pelo_conteudo(candidatos, diretorio_colunar, tmp_path):
+    versao = SistemaConvocacao(diretorio_colunar)._ler_arquivo()[2]
+    assert SistemaConvocacao(diretorio_colunar)._ler_arquivo()[2] == versao
+
+    # Mesmo conteúdo em outro diretório: mesma versão; conteúdo diferente: outra versão
+    copia = str(tmp_path / "copia.colunar")
+    gravar_colunar(candidatos, copia)
+    assert SistemaConvocacao(copia)._ler_arquivo()[2] == versao
+    alterados = dict(candidatos, NOME=list(reversed(candidatos['NOME'])))
+    outro = str(tmp_path / "outro.colunar")
+    gravar_colunar(alterados, outro)
+    assert SistemaConvocacao(outro)._ler_arquivo()[2] != versao
+
+def test_versao_de_diretorio_sem_hash(diretorio_colunar):
+    caminho = os.path.join(diretorio_colunar, ARQUIVO_ESQUEMA)
+    with open(caminho, encoding='utf-8') as f:
+        esquema = json.load(f)
+    del esquema['hash_conteudo']
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(esquema, f)
+
+    versao = SistemaConvocacao(diretorio_colunar)._ler_arquivo()[2]
+    assert SistemaConvocacao(diretorio_colunar)._ler_arquivo()[2] == versao
+    # Uma coluna regravada muda a data de modificação e, com ela, a versão
+    arquivo = os.path.join(diretorio_colunar, esquema['colunas'][0]['arquivo'])
+    estatisticas = os.stat(arquivo)
+    os.utime(arquivo, ns=(estatisticas.st_atime_ns, estatisticas.st_mtime_ns + 1_000_000_000))
+    assert SistemaConvocacao(diretorio_colunar)._ler_arquivo()[2] != versao
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import TIPO_AMPLA, TIPO_COTAS, TIPO_REMANEJADA
+
+def simulacao_pandas(df, total_vagas):
+    """
+    Simulação original, por filtros e ordenações no dataframe (80% ampla, 20% cotas e sobras para
+    a ampla): a referência que o índice de classificação tem de reproduzir.
+    """
+    vagas_cotas = int(total_vagas * 0.20)
+    vagas_ampla = total_vagas - vagas_cotas
+
+    df_ampla = df.sort_values(by="CLAS. AMPLA")
+    ampla = df_ampla.head(vagas_ampla)
+    cotistas = df[df['cotista'] == True]
+    cotistas_restantes = cotistas[~cotistas['INSCRIÇÃO'].isin(ampla['INSCRIÇÃO'])].sort_values(by="CLAS. COTAS")
+    cotas = cotistas_restantes.head(vagas_cotas)
+    remanejada = df_ampla.head(0)
+    if len(cotistas_restantes) < vagas_cotas:
+        ja_convocados = list(ampla['INSCRIÇÃO']) + list(cotas['INSCRIÇÃO'])
+        remanejada = df_ampla[~df_ampla['INSCRIÇÃO'].isin(ja_convocados)].head(vagas_cotas - len(cotas))
+    return {
+        TIPO_AMPLA: ampla['INSCRIÇÃO'].tolist(),
+        TIPO_COTAS: cotas['INSCRIÇÃO'].tolist(),
+        TIPO_REMANEJADA: remanejada['INSCRIÇÃO'].tolist(),
+    }
+
+def simulacao_indice(sistema, total_vagas, desconsiderar_sub_judice=False):
+    resultado = sistema.resultado_simulacao(total_vagas, desconsiderar_sub_judice)
+    inscricoes = resultado.indice.inscricoes
+    return {
+        TIPO_AMPLA: inscricoes[resultado.ampla].tolist(),
+        TIPO_COTAS: inscricoes[resultado.cotas].tolist(),
+        TIPO_REMANEJADA: inscricoes[resultado.remanejada].tolist(),
+    }
+
+def dataframe(sistema, desconsiderar_sub_judice=False):
+    indice = sistema._indice_para(desconsiderar_sub_judice)
+    return pd.DataFrame({
+        'INSCRIÇÃO': indice.inscricoes,
+        'CLAS. AMPLA': indice.clas_ampla,
+        'CLAS. COTAS': indice.clas_cotas,
+        'cotista': indice.cotista,
+    })
+
+VAGAS = [0, 1, 4, 5, 9, 10, 99, 250, 1000, 1500, 1700, 2100, 5000]
+
+@pytest.mark.parametrize("desconsiderar_sub_judice", [False, True])
+def test_simulacao_igual_a_original(sistema, desconsiderar_sub_judice):
+    df = dataframe(sistema, desconsiderar_sub_judice)
+    if desconsiderar_sub_judice:
+        assert len(df) < sistema.indice.total
+    for total_vagas in VAGAS:
+        assert simulacao_indice(sistema, total_vagas, desconsiderar_sub_judice) == simulacao_pandas(df, total_vagas), total_vagas
+
+def test_busca_por_inscricao(sistema):
+    indice = sistema.indice
+    linhas = indice.linhas(list(indice.inscricoes[::7]) + ['inexistente'])
+    np.testing.assert_array_equal(linhas[:-1], np.arange(0, indice.total, 7))
+    assert linhas[-1] == -1
+    assert indice.linha('inexistente') is None
+
+def test_vagas_minimas_e_a_primeira_convocacao(sistema):
+    df = dataframe(sistema)
+    indice = sistema.indice
+    for linha in np.random.default_rng(1).choice(indice.total, 15, replace=False):
+        vagas, tipo = indice.vagas_minimas(linha)
+        inscricao = indice.inscricoes[linha]
+        assert inscricao in simulacao_pandas(df, vagas)[tipo]
+        assert all(inscricao not in convocados for convocados in simulacao_pandas(df, vagas - 1).values())
+
+def test_situacao_lote_igual_a_original(sistema):
+    df = dataframe(sistema)
+    indice = sistema.indice
+    linhas = np.random.default_rng(2).choice(indice.total, 40, replace=False)
+    codigos = indice.situacao_lote(linhas, VAGAS)
+    tipos = [None, TIPO_AMPLA, TIPO_COTAS, TIPO_REMANEJADA]
+    for j, total_vagas in enumerate(VAGAS):
+        original = simulacao_pandas(df, total_vagas)
+        for i, linha in enumerate(linhas):
+            tipo = next((tipo for tipo, convocados in original.items() if indice.inscricoes[linha] in convocados), None)
+            assert tipos[codigos[i, j]] == tipo
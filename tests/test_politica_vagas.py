@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from conftest import indice_aleatorio
+from politica_vagas import ARREDONDAMENTOS, DESTINO_AMPLA, POLITICA_PADRAO, CategoriaReserva, PoliticaVagas
+
+LISTAS = ("CLAS. COTAS", "CLAS. PCD", "CLAS. INDIGENA")
+NOMES = ("Cotas", "PcD", "Indígenas")
+
+def politica_aleatoria(rng):
+    """Duas ou três listas com percentuais, arredondamentos e remanejamento entre elas aleatórios."""
+    quantidade = int(rng.integers(2, 4))
+    percentuais = rng.dirichlet(np.ones(quantidade + 1))[:quantidade] * 0.9
+    categorias = []
+    for k in range(quantidade):
+        outras = [NOMES[j] for j in range(quantidade) if j != k]
+        rng.shuffle(outras)
+        remanejamento = tuple(outras[:int(rng.integers(0, len(outras) + 1))]) + (DESTINO_AMPLA,)
+        categorias.append(CategoriaReserva(NOMES[k], LISTAS[k], float(percentuais[k]),
+                                           ARREDONDAMENTOS[int(rng.integers(0, len(ARREDONDAMENTOS)))], remanejamento))
+    return PoliticaVagas(tuple(categorias))
+
+def codigos_alocacao(indice, alocacao):
+    """Código do tipo de convocação e lista de reserva de cada linha em uma alocação."""
+    codigos = np.zeros(indice.total, dtype=np.int8)
+    codigos[alocacao['ampla']] = 1
+    codigos[alocacao['cotas']] = 2
+    codigos[alocacao['remanejada']] = 3
+    categorias = np.zeros(indice.total, dtype=np.int8)
+    categorias[alocacao['cotas']] = alocacao['categoria_cotas']
+    return codigos, categorias
+
+def test_politica_padrao_e_a_regra_de_20_por_cento():
+    vagas = np.arange(20000)
+    ampla, (cotas,) = POLITICA_PADRAO.distribuir(vagas)
+    np.testing.assert_array_equal(cotas, [int(v * 0.20) for v in vagas])
+    np.testing.assert_array_equal(ampla + cotas, vagas)
+
+def test_ampla_pode_diminuir_com_mais_vagas():
+    # Em 20 vagas as duas listas ganham uma vaga cada ao mesmo tempo
+    politica = PoliticaVagas((CategoriaReserva('Cotas', 'CLAS. COTAS', 0.20), CategoriaReserva('PcD', 'CLAS. PCD', 0.05)))
+    assert politica.distribuir(19) == (16, (3, 0))
+    assert politica.distribuir(20) == (15, (4, 1))
+
+def test_politica_invalida():
+    with pytest.raises(ValueError):
+        PoliticaVagas((CategoriaReserva('Cotas', 'CLAS. COTAS', 0.6), CategoriaReserva('PcD', 'CLAS. PCD', 0.5)))
+    with pytest.raises(ValueError):
+        PoliticaVagas((CategoriaReserva('Cotas', 'CLAS. COTAS', 0.2, remanejamento=('Outra', DESTINO_AMPLA)),))
+
+@pytest.mark.parametrize("semente", range(60))
+def test_varredura_igual_a_alocar_cada_quantidade_de_vagas(semente):
+    rng = np.random.default_rng(semente)
+    politica = POLITICA_PADRAO if semente % 5 == 0 else politica_aleatoria(rng)
+    indice = indice_aleatorio(rng, int(rng.integers(1, 80)), LISTAS)
+    varredura = indice.varredura(politica)
+
+    vagas_minimas = np.zeros(indice.total, dtype=np.int64)
+    codigo_tipo = np.zeros(indice.total, dtype=np.int8)
+    categoria = np.zeros(indice.total, dtype=np.int8)
+    lista_vagas = np.arange(varredura['vagas_maximas'] + 3)
+    situacao = indice.situacao_lote(np.arange(indice.total), lista_vagas, politica)
+    for vagas in lista_vagas:
+        codigos, categorias = codigos_alocacao(indice, indice.alocar(vagas, politica=politica))
+        np.testing.assert_array_equal(situacao[:, vagas], codigos)
+        novas = (codigos > 0) & (vagas_minimas == 0)
+        vagas_minimas[novas] = vagas
+        codigo_tipo[novas] = codigos[novas]
+        categoria[novas] = categorias[novas]
+
+    np.testing.assert_array_equal(varredura['vagas_minimas'], vagas_minimas)
+    np.testing.assert_array_equal(varredura['codigo_tipo'], codigo_tipo)
+    np.testing.assert_array_equal(varredura['categoria'], categoria)
+
+    # A partir de vagas_maximas, todos cabem na ampla; uma vaga antes, não
+    assert (politica.distribuir(varredura['vagas_maximas'])[0] >= indice.total)
+    assert varredura['vagas_maximas'] == indice.total or politica.distribuir(varredura['vagas_maximas'] - 1)[0] < indice.total
+
+def test_lista_reserva_coerente_com_a_participacao():
+    rng = np.random.default_rng(11)
+    politica = PoliticaVagas((CategoriaReserva('Cotas', 'CLAS. COTAS', 0.2), CategoriaReserva('PcD', 'CLAS. PCD', 0.1)))
+    indice = indice_aleatorio(rng, 300, LISTAS[:2], fracoes=(0.2, 0.1))
+    membros = indice.membros_reservas(politica)['membro']
+    varredura = indice.varredura(politica)
+    for linha in range(indice.total):
+        nome, classificacao = indice.lista_reserva(linha, politica)
+        assert (nome is not None) == membros[linha]
+        if nome is None:
+            continue
+        coluna = next(categoria.coluna for categoria in politica.categorias if categoria.nome == nome)
+        assert classificacao == indice.colunas[coluna][linha]
+        if varredura['codigo_tipo'][linha] == 2:
+            assert nome == politica.categorias[varredura['categoria'][linha]].nome
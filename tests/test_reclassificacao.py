@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from app import IndiceClassificacao
+from reclassificacao import OrdemPorNotas, chaves_classificacao
+
+def test_sem_mudanca_de_notas_responde_como_a_simulacao(sistema):
+    # O candidato informa a própria redação: a reclassificação não pode mudar nada
+    indice = sistema.indice
+    for total_vagas in (1, 30, 300, indice.total // 2):
+        for posicao in range(max(total_vagas - 5, 0), min(total_vagas + 5, indice.total)):
+            linha = indice.ordem_ampla[posicao]
+            inscricao = indice.inscricoes[linha]
+            alteracao = {'inscricao': inscricao, 'REDAÇÃO': float(indice.colunas['REDAÇÃO'][linha])}
+            simulado = sistema.simular_convocacao(inscricao, total_vagas)
+            assert sistema.simular_reclassificado(inscricao, total_vagas, [alteracao])[:2] == simulado
+
+def test_nota_maior_sobe_na_ampla(sistema):
+    indice = sistema.indice
+    linha = indice.ordem_ampla[500]
+    alteracao = {'inscricao': indice.inscricoes[linha], 'REDAÇÃO': float(indice.colunas['REDAÇÃO'][linha]) + 5}
+    _, _, alteradas = sistema.simular_reclassificado(indice.inscricoes[linha], 10, [alteracao])
+    assert alteradas[0]['depois']['CLAS. AMPLA'] < alteradas[0]['antes']['CLAS. AMPLA']
+
+def indice_divergente():
+    """Índice em que as notas das classificações 11 a 13 contradizem a ordem publicada."""
+    total = 30
+    nota_total = np.linspace(100, 50, total)
+    nota_total[10:13] = nota_total[10:13][::-1]
+    colunas = {
+        'INSCRIÇÃO': np.array([f"{i:03d}" for i in range(total)], dtype=object),
+        'NOME': np.array([f"Candidato {i}" for i in range(total)], dtype=object),
+        'CLAS. AMPLA': np.arange(1, total + 1, dtype=float),
+        'CLAS. COTAS': np.full(total, np.nan),
+        'NOTA TOTAL': nota_total,
+        'REDAÇÃO': np.full(total, 15.0),
+    }
+    return IndiceClassificacao(colunas)
+
+def test_divergencia_nao_impede_a_reclassificacao():
+    indice = indice_divergente()
+    assert indice.ordem_por_notas("CLAS. AMPLA").divergencias > 0
+
+    # Sem mudança de notas, a ordem publicada se mantém, mesmo dentro da divergência
+    reclassificado = indice.reclassificar({11: {'REDAÇÃO': 15.0}})
+    np.testing.assert_array_equal(reclassificado.ordem_ampla, indice.ordem_ampla)
+
+    # Longe da divergência, a alterada é reposicionada normalmente
+    reclassificado = indice.reclassificar({25: {'REDAÇÃO': 15.0 + (indice.colunas['NOTA TOTAL'][2] - indice.colunas['NOTA TOTAL'][25]) + 0.5}})
+    assert reclassificado.posicao_ampla[25] == 2
+
+def test_posicao_ambigua_recusa_so_a_alteracao_afetada():
+    indice = indice_divergente()
+    # Nota entre as das classificações 11 e 13, que estão invertidas: não há posição coerente
+    nota = (indice.colunas['NOTA TOTAL'][10] + indice.colunas['NOTA TOTAL'][12]) / 2
+    with pytest.raises(ValueError, match="020"):
+        indice.reclassificar({20: {'REDAÇÃO': 15.0 + nota - indice.colunas['NOTA TOTAL'][20]}})
+
+def test_ordem_por_notas_sem_divergencia_e_a_ordenacao_pelas_chaves():
+    rng = np.random.default_rng(3)
+    notas = np.round(rng.normal(70, 10, 200), 1)
+    classificacao = np.empty(200)
+    classificacao[np.lexsort((np.arange(200), -notas))] = np.arange(1, 201)
+    chaves = chaves_classificacao([notas], classificacao)
+    ordem = OrdemPorNotas(np.arange(200), chaves, 200)
+    assert ordem.divergencias == 0
+    np.testing.assert_array_equal(ordem.ordem, np.lexsort(chaves[::-1]))